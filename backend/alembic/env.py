@@ -24,6 +24,12 @@ if config.config_file_name is not None:
 # for 'autogenerate' support
 target_metadata = Base.metadata
 
+# Residence databases (DATABASE_SHARDS) are migrated one at a time with
+# `alembic -x url=sqlite:///./residences/sud.db upgrade head`
+x_url = context.get_x_argument(as_dictionary=True).get("url")
+if x_url:
+    config.set_main_option("sqlalchemy.url", x_url)
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -0,0 +1,62 @@
+"""add keyset pagination indexes
+
+The list endpoints page through their rows in (sort column, id) order
+(app/utils/pagination.py). These indexes cover that order, with and without
+the house filter, so every page is one index seek whatever its depth. The
+(house_id, sort column) indexes they extend are dropped, the new ones serve
+the same lookups.
+
+Checklist items are listed in (step, rowid) order instead, i.e. in insertion
+order within a step: (house_id, step_number) already covers it, since SQLite
+ends every index with the rowid, and (step_number) is added for the unfiltered
+list.
+
+Revision ID: 3c9e41d7a2b8
+Revises: afad65b0b599
+Create Date: 2026-10-17 14:12:40.518203
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3c9e41d7a2b8'
+down_revision = 'afad65b0b599'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ("ix_reservations_house_id_checkin_date_id", "reservations", ["house_id", "checkin_date", "id"]),
+    ("ix_reservations_checkin_date_id", "reservations", ["checkin_date", "id"]),
+    ("ix_checkins_house_id_arrival_date_id", "checkins", ["house_id", "arrival_date", "id"]),
+    ("ix_checkouts_house_id_checkout_date_id", "checkouts", ["house_id", "checkout_date", "id"]),
+    ("ix_checkouts_checkout_date_id", "checkouts", ["checkout_date", "id"]),
+    ("ix_financial_operations_house_id_date_id", "financial_operations", ["house_id", "date", "id"]),
+    ("ix_financial_operations_date_id", "financial_operations", ["date", "id"]),
+    ("ix_maintenance_issues_house_id_reported_at_id", "maintenance_issues", ["house_id", "reported_at", "id"]),
+    ("ix_maintenance_issues_reported_at_id", "maintenance_issues", ["reported_at", "id"]),
+    ("ix_checklist_items_step_number", "checklist_items", ["step_number"]),
+]
+
+# Prefixes of the indexes above
+REPLACED_INDEXES = [
+    ("ix_reservations_house_id_checkin_date", "reservations", ["house_id", "checkin_date"]),
+    ("ix_checkins_house_id_arrival_date", "checkins", ["house_id", "arrival_date"]),
+    ("ix_checkouts_house_id_checkout_date", "checkouts", ["house_id", "checkout_date"]),
+    ("ix_financial_operations_date", "financial_operations", ["date"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+    for name, table, _ in REPLACED_INDEXES:
+        op.drop_index(name, table_name=table, if_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, columns in REPLACED_INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,56 @@
+"""add change log
+
+Sequence-numbered log of the committed writes, served by GET /changes, and
+its compactions (app/core/change_log.py). New databases get the tables from
+`Base.metadata.create_all` (migrate_data.py), hence the checks.
+
+Revision ID: 5e8d2b7f4a10
+Revises: c0cfe1a2962f
+Create Date: 2026-10-17 09:41:12.603277
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8d2b7f4a10'
+down_revision = 'c0cfe1a2962f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("change_log"):
+        op.create_table(
+            "change_log",
+            sa.Column("seq", sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column("table_name", sa.String(), nullable=False),
+            sa.Column("row_id", sa.String(), nullable=True),
+            sa.Column("op", sa.String(), nullable=False),
+            sa.Column("created_at", sa.Float(), nullable=False),
+            sa.PrimaryKeyConstraint("seq"),
+            # Sequence numbers are never reused, even once compacted away
+            sqlite_autoincrement=True,
+        )
+    op.create_index(
+        "ix_change_log_table_name_row_id_seq", "change_log", ["table_name", "row_id", "seq"], if_not_exists=True
+    )
+    op.create_index("ix_change_log_created_at", "change_log", ["created_at"], if_not_exists=True)
+    if not inspector.has_table("change_log_compactions"):
+        op.create_table(
+            "change_log_compactions",
+            sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column("compacted_through", sa.Integer(), nullable=False),
+            sa.Column("removed_entries", sa.Integer(), nullable=False),
+            sa.Column("compacted_at", sa.Float(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("change_log_compactions")
+    op.drop_index("ix_change_log_created_at", table_name="change_log", if_exists=True)
+    op.drop_index("ix_change_log_table_name_row_id_seq", table_name="change_log", if_exists=True)
+    op.drop_table("change_log")
@@ -0,0 +1,55 @@
+"""add hot path indexes
+
+Composite indexes for the filters and orderings used by the API routers.
+Tables are created by `Base.metadata.create_all` (migrate_data.py), which
+already includes these indexes on new databases, hence `if_not_exists`.
+
+Revision ID: afad65b0b599
+Revises: 
+Create Date: 2026-10-17 00:38:04.273712
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'afad65b0b599'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ("ix_reservations_house_id_checkin_date", "reservations", ["house_id", "checkin_date"]),
+    ("ix_reservations_advance_paid", "reservations", ["advance_paid"]),
+    ("ix_checkins_house_id_arrival_date", "checkins", ["house_id", "arrival_date"]),
+    ("ix_checkins_house_id_departure_date", "checkins", ["house_id", "departure_date"]),
+    ("ix_checkins_arrival_date_departure_date", "checkins", ["arrival_date", "departure_date"]),
+    ("ix_checkins_departure_date", "checkins", ["departure_date"]),
+    ("ix_checkins_reservation_id", "checkins", ["reservation_id"]),
+    ("ix_checkouts_checkin_id", "checkouts", ["checkin_id"]),
+    ("ix_checkouts_house_id_checkout_date", "checkouts", ["house_id", "checkout_date"]),
+    ("ix_financial_operations_house_id_type_date", "financial_operations", ["house_id", "type", "date"]),
+    ("ix_financial_operations_type_date", "financial_operations", ["type", "date"]),
+    ("ix_financial_operations_date", "financial_operations", ["date"]),
+    ("ix_financial_operations_reservation_id", "financial_operations", ["reservation_id"]),
+    ("ix_financial_operations_checkin_id", "financial_operations", ["checkin_id"]),
+    ("ix_financial_operations_maintenance_id", "financial_operations", ["maintenance_id"]),
+    ("ix_maintenance_issues_status_reported_at", "maintenance_issues", ["status", "reported_at"]),
+    ("ix_maintenance_issues_house_id_status", "maintenance_issues", ["house_id", "status"]),
+    ("ix_checklist_items_house_id_step_number", "checklist_items", ["house_id", "step_number"]),
+    ("ix_checklist_items_category_id", "checklist_items", ["category_id"]),
+    ("ix_house_checklist_status_house_id_item_id", "house_checklist_status", ["house_id", "item_id"]),
+    ("ix_house_checklist_status_item_id", "house_checklist_status", ["item_id"]),
+    ("ix_house_category_status_house_id_category_id", "house_category_status", ["house_id", "category_id"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
\ No newline at end of file
@@ -0,0 +1,40 @@
+"""add idempotency keys
+
+Responses to the POSTs sent with an Idempotency-Key header, replayed to
+their retries until they expire (app/core/idempotency.py). New databases get
+the table from `Base.metadata.create_all` (migrate_data.py), hence the checks.
+
+Revision ID: c0cfe1a2962f
+Revises: 3c9e41d7a2b8
+Create Date: 2026-10-17 02:05:55.318402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c0cfe1a2962f'
+down_revision = '3c9e41d7a2b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table("idempotency_keys"):
+        op.create_table(
+            "idempotency_keys",
+            sa.Column("key", sa.String(), nullable=False),
+            sa.Column("fingerprint", sa.LargeBinary(), nullable=False),
+            sa.Column("status_code", sa.Integer(), nullable=False),
+            sa.Column("content_type", sa.String(), nullable=True),
+            sa.Column("body", sa.LargeBinary(), nullable=False),
+            sa.Column("expires_at", sa.Float(), nullable=False),
+            sa.PrimaryKeyConstraint("key"),
+        )
+    op.create_index("ix_idempotency_keys_expires_at", "idempotency_keys", ["expires_at"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_idempotency_keys_expires_at", table_name="idempotency_keys", if_exists=True)
+    op.drop_table("idempotency_keys")
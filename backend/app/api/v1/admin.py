@@ -0,0 +1,328 @@
+import asyncio
+import logging
+from datetime import date
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query
+from typing import List, Optional
+
+from app.core.config import settings
+from app.core.database import Shard, pool_metrics, shard_router
+from app.core.slow_queries import slow_query_log
+from app.core.replica import replicas
+from app.core.change_log import change_logs
+from app.schemas.admin import (
+    ArchiveStatus, BackupSnapshot, BackupStatus, ChangeLogStatus, PoolStats, ReplicaCheck, ReplicaStatus,
+    SlowQueryStats,
+)
+from app.services.archive_service import ArchiveService
+from app.services.backup_service import backup_state, get_backup_service
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.get("/db/pools", response_model=List[PoolStats])
+async def get_pool_stats(
+    # current_user = Depends(get_current_admin_user)
+):
+    """
+    Get connection pool metrics for every database engine.
+    
+    Covers the sync engine, the async read-write engine, the read-only
+    engine used by GET routes and the single-writer queue's engine.
+    
+    Returns:
+        One entry per pool with its gauges and usage counters
+    """
+    return [PoolStats(**metrics.snapshot()) for metrics in pool_metrics]
+
+
+@router.get("/db/slow-queries", response_model=List[SlowQueryStats])
+async def get_slow_queries(
+    limit: int = Query(10, ge=1, le=100, description="Number of statement shapes to return"),
+    # current_user = Depends(get_current_admin_user)
+):
+    """
+    Get the slowest statement shapes seen since startup.
+    
+    Only statements above SLOW_QUERY_THRESHOLD_MS are tracked; each one is
+    also written to the slow-query log file.
+    
+    Args:
+        limit: Number of statement shapes to return
+        
+    Returns:
+        Statement shapes ordered by slowest execution first
+    """
+    return [SlowQueryStats(**entry) for entry in slow_query_log.top(limit)]
+
+
+@router.delete("/db/slow-queries")
+async def reset_slow_queries(
+    # current_user = Depends(get_current_admin_user)
+):
+    """
+    Reset the slow-query aggregates (the log file is kept).
+    
+    Returns:
+        Success message
+    """
+    slow_query_log.clear()
+    return {"message": "Slow-query statistics reset"}
+
+
+def archive_shard(shard: Shard, cutoff: Optional[date]) -> List[ArchiveStatus]:
+    # Blocking: moves the rows of one residence database, then reads its progress
+    db = shard.SessionLocal()
+    try:
+        service = ArchiveService(db, batch_size=settings.ARCHIVE_BATCH_SIZE)
+        if cutoff is not None:
+            moved = service.run(cutoff)
+        else:
+            service.ensure_schema()
+            moved = {}
+        return [
+            ArchiveStatus(residence=shard.name, moved=moved.get(entry["table"]), **entry)
+            for entry in service.status()
+        ]
+    finally:
+        db.close()
+
+
+@router.get("/archive", response_model=List[ArchiveStatus])
+async def get_archive_status(
+    # current_user = Depends(get_current_admin_user)
+):
+    """
+    Get the archival progress of every table of every residence database.
+    
+    Returns:
+        One entry per residence and archived table
+        
+    Raises:
+        HTTPException: If archival is disabled
+    """
+    if not settings.ARCHIVE_ENABLED:
+        raise HTTPException(status_code=400, detail="Archival is disabled (ARCHIVE_ENABLED)")
+    
+    results = []
+    for shard in shard_router.shards.values():
+        results.extend(await asyncio.to_thread(archive_shard, shard, None))
+    return results
+
+
+@router.post("/archive", response_model=List[ArchiveStatus])
+async def run_archive(
+    keepYears: int = Query(settings.ARCHIVE_KEEP_YEARS, ge=0, description="Closed fiscal years kept hot"),
+    # current_user = Depends(get_current_admin_user)
+):
+    """
+    Move closed fiscal years to the archive database of every residence.
+    
+    Rows dated before January 1st of (current year - keepYears) are moved in
+    batches of ARCHIVE_BATCH_SIZE, each committed on its own, so an
+    interrupted run is simply started again.
+    
+    Args:
+        keepYears: Closed fiscal years kept in the hot tables
+        
+    Returns:
+        Progress of every table, with the rows moved by this run
+        
+    Raises:
+        HTTPException: If archival is disabled or already running
+    """
+    if not settings.ARCHIVE_ENABLED:
+        raise HTTPException(status_code=400, detail="Archival is disabled (ARCHIVE_ENABLED)")
+    
+    cutoff = ArchiveService.cutoff_for(keepYears)
+    results = []
+    try:
+        for shard in shard_router.shards.values():
+            results.extend(await asyncio.to_thread(archive_shard, shard, cutoff))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return results
+
+
+def backup_status() -> BackupStatus:
+    return BackupStatus(
+        running=backup_state.running,
+        startedAt=backup_state.started_at,
+        finishedAt=backup_state.finished_at,
+        error=backup_state.error,
+        lastRun=[BackupSnapshot(**snapshot) for snapshot in backup_state.last_snapshots],
+        snapshots=[BackupSnapshot(**snapshot) for snapshot in get_backup_service().list_snapshots()],
+    )
+
+
+def run_backups() -> None:
+    # Background task of a run already claimed by the endpoint; the run records its own failures
+    try:
+        get_backup_service().run(claimed=True)
+    except Exception as exc:
+        if backup_state.running:
+            # Failed before the run started (e.g. building the service): release the claim
+            logger.exception("Snapshot run could not start")
+            backup_state.finish([], error=str(exc))
+
+
+@router.get("/backups", response_model=BackupStatus)
+async def get_backups(
+    # current_user = Depends(get_current_admin_user)
+):
+    """
+    Get the snapshot files kept in BACKUP_DIR and the state of the last run.
+    
+    Returns:
+        Snapshot run state and the snapshots on disk, newest first
+    """
+    return await asyncio.to_thread(backup_status)
+
+
+@router.post("/backups", response_model=BackupStatus, status_code=202)
+async def create_backups(
+    background_tasks: BackgroundTasks,
+    # current_user = Depends(get_current_admin_user)
+):
+    """
+    Snapshot every residence database (and archive database) in the background.
+    
+    Pages are copied BACKUP_PAGES_PER_STEP at a time through the SQLite
+    backup API, so request writes are never stalled. Each snapshot is checked
+    with PRAGMA integrity_check before it is kept; only the newest
+    BACKUP_RETENTION snapshots of each database are kept. Poll
+    GET /admin/backups for the outcome.
+    
+    Returns:
+        Snapshot run state when the run is scheduled
+        
+    Raises:
+        HTTPException: If a snapshot run is already in progress
+    """
+    if not backup_state.begin():
+        raise HTTPException(status_code=409, detail="A snapshot run is already in progress")
+    background_tasks.add_task(run_backups)
+    return await asyncio.to_thread(backup_status)
+
+
+def enabled_replicas():
+    # Raises: HTTPException if the analytics replica is disabled
+    if not replicas:
+        raise HTTPException(status_code=400, detail="Analytics replica is disabled (ANALYTICS_REPLICA_ENABLED)")
+    return replicas.values()
+
+
+@router.get("/replica", response_model=List[ReplicaStatus])
+async def get_replica_status(
+    # current_user = Depends(get_current_admin_user)
+):
+    """
+    Get the state and replication lag of the in-memory analytics replicas.
+    
+    Returns:
+        One entry per residence database
+        
+    Raises:
+        HTTPException: If the analytics replica is disabled
+    """
+    return [ReplicaStatus(**replica.status()) for replica in enabled_replicas()]
+
+
+@router.get("/replica/check", response_model=List[ReplicaCheck])
+async def check_replica(
+    # current_user = Depends(get_current_admin_user)
+):
+    """
+    Compare every table of the analytics replicas with their residence database.
+    
+    Runs on each replica's applier thread, after the commits already
+    published; tables that differ are checked again after the next applied
+    commits, so only lasting differences are reported.
+    
+    Returns:
+        One entry per residence and table
+        
+    Raises:
+        HTTPException: If the analytics replica is disabled
+    """
+    results = []
+    for replica in enabled_replicas():
+        report = await asyncio.wrap_future(replica.check())
+        results.extend(
+            ReplicaCheck(
+                residence=replica.shard.name,
+                consistent=not (entry["missingRows"] or entry["staleRows"]),
+                **entry,
+            )
+            for entry in report
+        )
+    return results
+
+
+@router.post("/replica/resync", response_model=List[ReplicaStatus])
+async def resync_replica(
+    # current_user = Depends(get_current_admin_user)
+):
+    """
+    Copy every residence database to its analytics replica again.
+    
+    Needed after writes made outside of the API (scripts, manual SQL),
+    which the replica doesn't see.
+    
+    Returns:
+        State of the reloaded replicas
+        
+    Raises:
+        HTTPException: If the analytics replica is disabled
+    """
+    for replica in enabled_replicas():
+        await asyncio.wrap_future(replica.reload())
+    return [ReplicaStatus(**replica.status()) for replica in replicas.values()]
+
+
+def ready_change_logs():
+    # Raises: HTTPException if the change log is disabled
+    if not change_logs:
+        raise HTTPException(status_code=400, detail="Change log is disabled (CHANGE_LOG_ENABLED)")
+    return [change_log for change_log in change_logs.values() if change_log.ready]
+
+
+@router.get("/change-log", response_model=List[ChangeLogStatus])
+async def get_change_log_status(
+    # current_user = Depends(get_current_admin_user)
+):
+    """
+    Get the size and sequence numbers of the change log of every residence database.
+    
+    Returns:
+        One entry per residence database
+        
+    Raises:
+        HTTPException: If the change log is disabled
+    """
+    ready_change_logs()
+    return [ChangeLogStatus(**await change_log.status()) for change_log in change_logs.values()]
+
+
+@router.post("/change-log/compact", response_model=List[ChangeLogStatus])
+async def compact_change_log(
+    # current_user = Depends(get_current_admin_user)
+):
+    """
+    Compact the change log of every residence database now.
+    
+    Removes the entries superseded by a later change of the same row, then
+    those older than CHANGE_LOG_RETENTION; clients whose last sequence
+    number was removed get `resyncRequired` from GET /changes.
+    
+    Returns:
+        State of the compacted change logs
+        
+    Raises:
+        HTTPException: If the change log is disabled
+    """
+    compacted = ready_change_logs()
+    for change_log in compacted:
+        await change_log.compact()
+    return [ChangeLogStatus(**await change_log.status()) for change_log in compacted]
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.database import get_primary_db
 from app.core.security import create_access_token, create_refresh_token
 from app.schemas.user import UserCreate, UserLogin, UserResponse, Token, PasswordResetRequest
 from app.services.auth_service import AuthService
@@ -11,7 +11,7 @@ from app.utils.dependencies import get_current_user
 router = APIRouter()
 
 @router.post("/register", response_model=UserResponse)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
+def register(user_data: UserCreate, db: Session = Depends(get_primary_db)):
     auth_service = AuthService(db)
     
     # Check if user already exists
@@ -28,7 +28,7 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
 def login(
     request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_primary_db)
 ):
     auth_service = AuthService(db)
     
@@ -61,7 +61,7 @@ def login(
 def login_json(
     request: Request,
     user_login: UserLogin,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_primary_db)
 ):
     """Alternative login endpoint that accepts JSON instead of form data"""
     auth_service = AuthService(db)
@@ -97,7 +97,7 @@ def get_current_user_info(current_user: User = Depends(get_current_user)):
 @router.post("/forgot-password")
 def forgot_password(
     password_reset: PasswordResetRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_primary_db)
 ):
     # TODO: Implement password reset logic with email
     # For now, just return success message
@@ -0,0 +1,280 @@
+import logging
+import re
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.routing import APIRoute
+from starlette.middleware.exceptions import ExceptionMiddleware
+from starlette.routing import Match
+from typing import Any, List, Optional, Tuple
+import orjson
+
+from app.core.config import settings
+from app.core.database import shard_router
+from app.core.write_queue import BatchTransaction, get_writer, write_queues
+from app.schemas.batch import BatchOperation, BatchOperationResult, BatchRequest, BatchResponse
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# "$<index>.<field>[.<field>...]": a field of an earlier operation's response
+_REFERENCE = re.compile(r"^\$(\d+)\.(\w+(?:\.\w+)*)$")
+
+# Statements each operation adds to its route's own budget (SAVEPOINT, RELEASE)
+OPERATION_QUERIES = 2
+
+# Request headers not passed on to the operations (they get a JSON body of their own)
+_OWN_HEADERS = {b"content-type", b"content-length", b"transfer-encoding", b"if-none-match", b"if-match"}
+
+
+class UnresolvedReference(Exception):
+    """A payload refers to a failed, later or missing result."""
+
+
+def find_route(request: Request, operation: BatchOperation) -> Tuple[APIRoute, dict]:
+    """
+    Route an operation of a batch.
+
+    Args:
+        request: The batch request
+        operation: The operation
+
+    Returns:
+        The route and the child scope it matched (endpoint, path parameters)
+
+    Raises:
+        HTTPException: If no route matches it, or the route doesn't write through get_writer
+    """
+    path = settings.API_V1_STR + operation.resource.partition("?")[0]
+    scope = {"type": "http", "method": operation.method, "path": path, "root_path": ""}
+    for route in request.app.router.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        match, child_scope = route.matches(scope)
+        if match == Match.FULL:
+            if not _writes_through_writer(route):
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"{operation.method} {operation.resource} can't be batched"
+                )
+            return route, child_scope
+    raise HTTPException(status_code=400, detail=f"No route for {operation.method} {operation.resource}")
+
+
+def _writes_through_writer(route: APIRoute) -> bool:
+    # Only units of work handed to get_writer can join the batch's transaction
+    dependants = [route.dependant]
+    while dependants:
+        dependant = dependants.pop()
+        if dependant.call is get_writer:
+            return True
+        dependants.extend(dependant.dependencies)
+    return False
+
+
+def resolve_references(value: Any, results: List[BatchOperationResult]) -> Any:
+    """
+    Replace the "$<index>.<field>" strings of a payload by the fields they name.
+
+    Args:
+        value: Payload, or part of it
+        results: Results of the operations run so far
+
+    Returns:
+        The payload with its references replaced
+
+    Raises:
+        UnresolvedReference: If a reference names a failed or missing result, or a missing field
+    """
+    if isinstance(value, dict):
+        return {key: resolve_references(item, results) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve_references(item, results) for item in value]
+    match = _REFERENCE.match(value) if isinstance(value, str) else None
+    if match is None:
+        return value
+
+    index = int(match.group(1))
+    if index >= len(results) or results[index].status >= 400:
+        raise UnresolvedReference(f"{value}: operation {index} has no result")
+    target = results[index].body
+    for field in match.group(2).split("."):
+        if not isinstance(target, dict) or field not in target:
+            raise UnresolvedReference(f"{value}: no such field")
+        target = target[field]
+    return target
+
+
+async def dispatch(
+    request: Request,
+    batch: BatchTransaction,
+    route: APIRoute,
+    child_scope: dict,
+    operation: BatchOperation,
+    payload: Any,
+) -> Tuple[int, Any]:
+    """
+    Run an operation through its route, as a request of its own.
+
+    Args:
+        request: The batch request (its residence and headers are passed on)
+        batch: Transaction the operation writes in
+        route: Route of the operation
+        child_scope: Scope the route matched
+        operation: The operation
+        payload: Its JSON body, references resolved
+
+    Returns:
+        Status code and decoded body of the operation's response
+    """
+    path, _, query = operation.resource.partition("?")
+    body = orjson.dumps(payload) if payload is not None else b""
+    headers = [(name, value) for name, value in request.scope["headers"] if name not in _OWN_HEADERS]
+    headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    scope = {
+        **request.scope,
+        "method": operation.method,
+        "path": settings.API_V1_STR + path,
+        "raw_path": (settings.API_V1_STR + path).encode(),
+        "query_string": query.encode(),
+        "headers": headers,
+        # Same residence (already resolved) and transaction as the batch
+        "state": {"shard": request.state.shard},
+        "batch": batch,
+        **child_scope,
+    }
+
+    received = False
+
+    async def receive():
+        nonlocal received
+        if received:
+            return {"type": "http.disconnect"}
+        received = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    status = 500
+    chunks: List[bytes] = []
+    content_type = ""
+
+    async def send(message):
+        nonlocal status, content_type
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            for name, value in message.get("headers", []):
+                if name == b"content-type":
+                    content_type = value.decode("latin-1")
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    # HTTPException and validation errors become responses, as for a request of its own
+    handlers = {
+        key: handler for key, handler in request.app.exception_handlers.items()
+        if key not in (500, Exception)
+    }
+    try:
+        await ExceptionMiddleware(route.handle, handlers=handlers)(scope, receive, send)
+    except Exception:
+        logger.exception("Batch operation %s %s failed", operation.method, operation.resource)
+        return 500, {"detail": "Internal Server Error"}
+
+    content = b"".join(chunks)
+    if not content:
+        return status, None
+    if content_type.startswith("application/json"):
+        return status, orjson.loads(content)
+    return status, {"detail": content.decode(errors="replace")}
+
+
+@router.post("/", response_model=BatchResponse)
+async def run_batch(
+    batch_request: BatchRequest,
+    request: Request,
+    # current_user = Depends(get_current_user)
+):
+    """
+    Run write operations of the API in one transaction.
+
+    Each operation is served by its own route, exactly as if it had been
+    sent on its own, but in the batch's transaction of the residence's
+    write queue: `all-or-nothing` stops at the first failure and rolls
+    everything back, `best-effort` rolls back the failed operations only.
+    Payloads can use the responses of earlier operations ("$0.id").
+
+    Only routes writing through the write queue (reservation, check-in and
+    checklist task creation) can be batched. All operations go to the
+    residence of the batch request.
+
+    Args:
+        batch_request: Mode and ordered operations
+        request: The batch request
+
+    Returns:
+        Whether the batch was committed, and each operation's status and body
+
+    Raises:
+        HTTPException: If there are too many operations or one of them can't be batched
+    """
+    if len(batch_request.operations) > settings.BATCH_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch has at most {settings.BATCH_MAX_OPERATIONS} operations"
+        )
+
+    # Every operation is routed before anything runs
+    routes = []
+    for index, operation in enumerate(batch_request.operations):
+        try:
+            routes.append(find_route(request, operation))
+        except HTTPException as exc:
+            raise HTTPException(status_code=exc.status_code, detail=f"Operation {index}: {exc.detail}")
+
+    # Statement budget of this batch: those of its operations, plus their SAVEPOINTs
+    budgets = [getattr(route.endpoint, "query_budget", None) for route, _ in routes]
+    if None not in budgets:
+        request.scope["query_budget"] = sum(budgets) + OPERATION_QUERIES * len(budgets)
+
+    shard = await shard_router.resolve(request)
+    batch = BatchTransaction(write_queues[shard.name])
+    all_or_nothing = batch_request.mode == "all-or-nothing"
+
+    results: List[BatchOperationResult] = []
+    failed: Optional[int] = None
+    batch.open()
+    try:
+        for index, ((route, child_scope), operation) in enumerate(zip(routes, batch_request.operations)):
+            if failed is not None and all_or_nothing:
+                results.append(BatchOperationResult(
+                    status=424, body={"detail": f"Not run: operation {failed} failed"}, committed=False
+                ))
+                continue
+
+            await batch.begin_operation()
+            try:
+                payload = resolve_references(operation.payload, results)
+            except UnresolvedReference as exc:
+                status, body = 424, {"detail": f"Unresolved reference {exc}"}
+            else:
+                status, body = await dispatch(request, batch, route, child_scope, operation, payload)
+            try:
+                await batch.end_operation(keep=status < 400)
+            except Exception as exc:
+                logger.exception("Batch operation %d could not be ended", index)
+                status, body = 500, {"detail": f"Error ending operation: {str(exc)}"}
+            if status >= 400 and failed is None:
+                failed = index
+            results.append(BatchOperationResult(status=status, body=body, committed=False))
+    except BaseException:
+        # Cancelled or broken mid-way: nothing of it is committed
+        await batch.close(commit=False)
+        raise
+
+    try:
+        committed = await batch.close(commit=not (all_or_nothing and failed is not None))
+    except Exception as exc:
+        logger.exception("Batch of %d operation(s) failed to commit", len(results))
+        raise HTTPException(status_code=500, detail=f"Error committing batch: {str(exc)}")
+
+    if committed:
+        for result in results:
+            result.committed = result.status < 400
+    return BatchResponse(mode=batch_request.mode, committed=committed, results=results)
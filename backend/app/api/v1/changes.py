@@ -0,0 +1,164 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import BaseModel
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Type
+
+from app.core.change_log import DELETE, RELOAD, UPSERT, change_logs
+from app.core.config import settings
+from app.core.database import get_read_db, shard_router
+from app.core.projections import response_columns
+from app.core.query_stats import query_budget
+from app.core.reference_data import ReferenceData, ReferenceRows, get_reference_data
+from app.core.table_versions import etag_tables
+from app.api.v1.checklist import category_name_column
+from app.models.change_log import ChangeLogCompaction, ChangeLogEntry
+from app.models.checkin import CheckIn, CheckOut
+from app.models.checklist import ChecklistCategory, ChecklistItem
+from app.models.finance import FinancialOperation
+from app.models.maintenance import MaintenanceIssue, MaintenanceType
+from app.models.reservation import Reservation
+from app.schemas.changes import Change, ChangeFeed
+from app.schemas.checkin import CheckInResponse, CheckOutResponse
+from app.schemas.checklist import ChecklistCategoryResponse, ChecklistItemResponse
+from app.schemas.finance import FinancialOperationResponse
+from app.schemas.maintenance import MaintenanceIssueResponse, MaintenanceTypeResponse
+from app.schemas.reservation import ReservationResponse
+
+router = APIRouter()
+
+
+class FeedTable(NamedTuple):
+    """A table of the feed, serialized as its list endpoint returns it."""
+    entity: type
+    schema: Type[BaseModel]
+    # Columns not named after the schema's aliases, given the checklist categories
+    columns: Callable[[ReferenceRows], dict] = lambda categories: {}
+
+
+# Tables of the feed, by name. The other logged tables (statuses, audit
+# logs) have no list endpoint to apply a change to: their entries are skipped
+FEED_TABLES: Dict[str, FeedTable] = {
+    feed_table.entity.__tablename__: feed_table for feed_table in (
+        FeedTable(Reservation, ReservationResponse),
+        FeedTable(CheckIn, CheckInResponse),
+        FeedTable(CheckOut, CheckOutResponse),
+        FeedTable(FinancialOperation, FinancialOperationResponse),
+        FeedTable(MaintenanceIssue, MaintenanceIssueResponse),
+        FeedTable(
+            ChecklistItem, ChecklistItemResponse,
+            lambda categories: {"category_name": category_name_column(categories)},
+        ),
+        FeedTable(ChecklistCategory, ChecklistCategoryResponse),
+        FeedTable(MaintenanceType, MaintenanceTypeResponse, lambda categories: {"name": MaintenanceType.label}),
+    )
+}
+
+
+@router.get("/", response_model=ChangeFeed)
+# BEGIN, head and floor, one page of entries, then the rows of each table in it
+@query_budget(3 + len(FEED_TABLES))
+@etag_tables(ChangeLogEntry, ChangeLogCompaction, *(feed_table.entity for feed_table in FEED_TABLES.values()))
+async def get_changes(
+    request: Request,
+    since: Optional[int] = Query(None, ge=0, description="lastSeq of the previous call"),
+    limit: int = Query(500, ge=1, description="Changes per page (capped at CHANGE_FEED_MAX_LIMIT)"),
+    db: AsyncSession = Depends(get_read_db),
+    refs: ReferenceData = Depends(get_reference_data),
+    # current_user = Depends(get_current_user)
+):
+    """
+    Get the rows changed since a sequence number, for incremental sync.
+
+    Without `since`, only the current sequence number is returned: fetch
+    the lists, then follow the feed from it. Each changed row is returned
+    once per page, as its list endpoint returns it (`upsert`) or as a
+    tombstone (`delete`). `resyncRequired` is set when `since` is older
+    than the last compaction of the log (or unknown to it): the changes in
+    between are lost and the lists must be fetched again.
+
+    Args:
+        request: The request (its residence)
+        since: Last sequence number seen by the client
+        limit: Maximum number of changes returned
+        db: Database session
+        refs: Reference data of the residence
+
+    Returns:
+        The changes in sequence order, and the sequence number to pass next
+
+    Raises:
+        HTTPException: If the change log is disabled or its tables aren't migrated
+    """
+    shard = await shard_router.resolve(request)
+    change_log = change_logs.get(shard.name)
+    if change_log is None:
+        raise HTTPException(status_code=400, detail="Change log is disabled (CHANGE_LOG_ENABLED)")
+    if not change_log.ready:
+        raise HTTPException(
+            status_code=503,
+            detail="Change log tables are missing from the residence database (run `alembic upgrade head`)",
+        )
+    categories = await refs.checklist_categories.rows()
+
+    # One snapshot for the bounds, the entries and the rows: the driver
+    # doesn't open a transaction for SELECTs, so a commit or a compaction
+    # between two of them would otherwise show up in one but not the other
+    await (await db.connection()).exec_driver_sql("BEGIN")
+
+    head, floor = (await db.execute(select(
+        select(func.max(ChangeLogEntry.seq)).scalar_subquery(),
+        select(func.max(ChangeLogCompaction.compacted_through)).scalar_subquery(),
+    ))).one()
+    head, floor = head or 0, floor or 0
+    if since is None:
+        return ChangeFeed(lastSeq=max(head, floor))
+    if since < floor or since > max(head, floor):
+        return ChangeFeed(lastSeq=max(head, floor), resyncRequired=True)
+    if since == head:
+        return ChangeFeed(lastSeq=since)
+
+    limit = min(limit, settings.CHANGE_FEED_MAX_LIMIT)
+    entries = (await db.execute(
+        select(ChangeLogEntry.seq, ChangeLogEntry.table_name, ChangeLogEntry.row_id, ChangeLogEntry.op)
+        .where(ChangeLogEntry.seq > since)
+        .order_by(ChangeLogEntry.seq)
+        .limit(limit + 1)
+    )).all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    # Latest entry of each row (or table reload) of the page, in sequence order
+    latest: Dict[Tuple[str, Optional[str]], int] = {}
+    for entry in entries:
+        if entry.table_name not in FEED_TABLES:
+            continue
+        key = (entry.table_name, entry.row_id)
+        latest.pop(key, None)
+        latest[key] = entry.seq
+
+    # Current state of the rows, one query per table
+    ids: Dict[str, List[str]] = {}
+    for name, row_id in latest:
+        if row_id is not None:
+            ids.setdefault(name, []).append(row_id)
+    rows: Dict[Tuple[str, str], dict] = {}
+    for name, table_ids in ids.items():
+        feed_table = FEED_TABLES[name]
+        pk = feed_table.entity.__table__.primary_key.columns.values()[0]
+        keys = [pk.type.python_type(row_id) for row_id in table_ids]
+        query = select(
+            pk.label("_row_id"),
+            *response_columns(feed_table.schema, feed_table.entity, **feed_table.columns(categories)),
+        ).where(pk.in_(keys))
+        for row in await db.execute(query):
+            rows[(name, str(row._row_id))] = feed_table.schema.model_validate(row).model_dump(mode="json")
+
+    changes = []
+    for (name, row_id), seq in latest.items():
+        if row_id is None:
+            changes.append(Change(seq=seq, table=name, op=RELOAD))
+            continue
+        row = rows.get((name, row_id))
+        changes.append(Change(seq=seq, table=name, id=row_id, op=UPSERT if row is not None else DELETE, row=row))
+    return ChangeFeed(lastSeq=entries[-1].seq if entries else since, hasMore=has_more, changes=changes)
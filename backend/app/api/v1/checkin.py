@@ -1,9 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Tuple, Union
 from datetime import datetime, date
 
-from app.core.database import get_db
+from app.core.database import get_async_db, get_read_db
+from app.core.query_stats import query_budget
+from app.core.idempotency import idempotent
+from app.core.table_versions import etag_tables
+from app.core.projections import response_columns, sparse_response
+from app.core import statements
+from app.core.write_queue import get_writer
 from app.models.checkin import CheckIn, CheckOut
 from app.models.finance import FinancialOperation
 from app.models.reservation import Reservation
@@ -12,18 +20,28 @@ from app.schemas.checkin import (
     CheckInUpdate, 
     CheckInResponse,
     CheckOutCreate,
-    CheckOutResponse,
-    InventaireType
+    CheckOutResponse
 )
+from app.schemas.pagination import Page
 from app.utils.dependencies import get_current_user
+from app.utils.fields import SparseFields
+from app.utils.pagination import Keyset, Pagination
 
 router = APIRouter()
 
+# List order (newest first), also the key of their pages
+CHECKIN_KEYSET = Keyset(CheckIn.arrival_date, CheckIn.id)
+CHECKOUT_KEYSET = Keyset(CheckOut.checkout_date, CheckOut.id)
 
-@router.get("/", response_model=List[CheckInResponse])
+
+@router.get("/", response_model=Union[List[CheckInResponse], Page[CheckInResponse]])
+@query_budget(1)
+@etag_tables(CheckIn)
 async def get_checkins(
     houseId: Optional[str] = Query(None, alias="maison"),
-    db: Session = Depends(get_db),
+    page: Pagination = Depends(),
+    fields: Optional[Tuple[str, ...]] = Depends(SparseFields(CheckInResponse)),
+    db: AsyncSession = Depends(get_read_db),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -31,48 +49,28 @@ async def get_checkins(
     
     Args:
         houseId: Optional house ID to filter check-ins
+        page: limit / cursor of the page (the whole list without them)
+        fields: Fields to return (all of them without ?fields=)
         db: Database session
         
     Returns:
-        List of check-ins in frontend format
+        List of check-ins in frontend format, or one page of them
     """
-    query = db.query(CheckIn)
+    # Only the response columns (or those of ?fields=); the rows are mapped onto the schema
+    query = select(*response_columns(CheckInResponse, CheckIn, fields))
     
     if houseId:
-        query = query.filter(CheckIn.house_id == houseId)
-    
-    checkins = query.order_by(CheckIn.arrival_date.desc()).all()
+        query = query.where(CheckIn.house_id == houseId)
     
-    # Convert to frontend format
-    response_data = []
-    for checkin in checkins:
-        # Convert inventory JSON to InventaireType
-        inventory = InventaireType(**checkin.inventory) if checkin.inventory else InventaireType()
-        
-        response_data.append(CheckInResponse(
-            id=checkin.id,
-            maison=checkin.house_id,
-            nom=checkin.guest_name,
-            telephone=checkin.phone or "",
-            email=checkin.email or "",
-            dateArrivee=checkin.arrival_date.strftime("%Y-%m-%d"),
-            dateDepart=checkin.departure_date.strftime("%Y-%m-%d"),
-            avancePaye=checkin.advance_paid,
-            paiementCheckin=checkin.checkin_payment,
-            montantTotal=checkin.total_amount,
-            inventaire=inventory,
-            responsable=checkin.manager,
-            remarques=checkin.remarks or "",
-            reservationId=checkin.reservation_id
-        ))
-    
-    return response_data
+    return sparse_response(CheckInResponse, fields, await page.fetch(db, query, CHECKIN_KEYSET))
 
 
 @router.get("/{checkin_id}", response_model=CheckInResponse)
+@query_budget(1)
+@etag_tables(CheckIn)
 async def get_checkin(
     checkin_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -88,45 +86,31 @@ async def get_checkin(
     Raises:
         HTTPException: If check-in not found
     """
-    checkin = db.query(CheckIn).filter(CheckIn.id == checkin_id).first()
+    checkin = await db.scalar(statements.CHECKIN_BY_ID, {"id": checkin_id})
     
     if not checkin:
         raise HTTPException(status_code=404, detail="Check-in not found")
     
-    inventory = InventaireType(**checkin.inventory) if checkin.inventory else InventaireType()
-    
-    return CheckInResponse(
-        id=checkin.id,
-        maison=checkin.house_id,
-        nom=checkin.guest_name,
-        telephone=checkin.phone or "",
-        email=checkin.email or "",
-        dateArrivee=checkin.arrival_date.strftime("%Y-%m-%d"),
-        dateDepart=checkin.departure_date.strftime("%Y-%m-%d"),
-        avancePaye=checkin.advance_paid,
-        paiementCheckin=checkin.checkin_payment,
-        montantTotal=checkin.total_amount,
-        inventaire=inventory,
-        responsable=checkin.manager,
-        remarques=checkin.remarks or "",
-        reservationId=checkin.reservation_id
-    )
+    return CheckInResponse.model_validate(checkin)
 
 
 @router.post("/", response_model=CheckInResponse)
+@query_budget(6)
+@idempotent
 async def create_checkin(
     checkin_data: CheckInCreate,
-    db: Session = Depends(get_db),
+    writer = Depends(get_writer),
     # current_user = Depends(get_current_user)
 ):
     """
     Create a new check-in.
     
     Automatically creates a financial transaction for the accommodation payment.
+    Both rows are written in one unit of work through the single-writer queue.
     
     Args:
         checkin_data: Check-in creation data
-        db: Database session
+        writer: Write queue (or inline session writer) committing the unit of work
         
     Returns:
         Created check-in in frontend format
@@ -146,75 +130,61 @@ async def create_checkin(
                 detail="Arrival date must be before departure date"
             )
         
-        # Create check-in
-        checkin = CheckIn(
-            reservation_id=checkin_data.reservationId,
-            house_id=checkin_data.maison,
-            guest_name=checkin_data.nom,
-            phone=checkin_data.telephone,
-            email=checkin_data.email,
-            arrival_date=arrival_date,
-            departure_date=departure_date,
-            advance_paid=checkin_data.avancePaye,
-            checkin_payment=checkin_data.paiementCheckin,
-            total_amount=checkin_data.montantTotal,
-            inventory=checkin_data.inventaire.dict(),
-            manager=checkin_data.responsable,
-            remarks=checkin_data.remarques
-        )
-        
-        db.add(checkin)
-        db.commit()
-        db.refresh(checkin)
-        
-        # Create financial transaction for accommodation payment if amount > 0
-        if checkin_data.paiementCheckin > 0:
-            financial_operation = FinancialOperation(
-                date=arrival_date,
+        def create(db: Session) -> CheckIn:
+            # Create check-in
+            checkin = CheckIn(
+                reservation_id=checkin_data.reservationId,
                 house_id=checkin_data.maison,
-                type="entree",
-                motif=f"Paiement accommodation - {checkin_data.nom}",
-                montant=checkin_data.paiementCheckin,
-                origine="checkin",
-                editable=False,
-                checkin_id=checkin.id,
-                reservation_id=checkin_data.reservationId
+                guest_name=checkin_data.nom,
+                phone=checkin_data.telephone,
+                email=checkin_data.email,
+                arrival_date=arrival_date,
+                departure_date=departure_date,
+                advance_paid=checkin_data.avancePaye,
+                checkin_payment=checkin_data.paiementCheckin,
+                total_amount=checkin_data.montantTotal,
+                inventory=checkin_data.inventaire.dict(),
+                manager=checkin_data.responsable,
+                remarks=checkin_data.remarques
             )
             
-            db.add(financial_operation)
-            db.commit()
+            db.add(checkin)
+            db.flush()
+            
+            # Create financial transaction for accommodation payment if amount > 0
+            if checkin_data.paiementCheckin > 0:
+                financial_operation = FinancialOperation(
+                    date=arrival_date,
+                    house_id=checkin_data.maison,
+                    type="entree",
+                    motif=f"Paiement accommodation - {checkin_data.nom}",
+                    montant=checkin_data.paiementCheckin,
+                    origine="checkin",
+                    editable=False,
+                    checkin_id=checkin.id,
+                    reservation_id=checkin_data.reservationId
+                )
+                
+                db.add(financial_operation)
+            
+            return checkin
         
-        inventory = InventaireType(**checkin.inventory) if checkin.inventory else InventaireType()
+        checkin = await writer.run(create)
         
-        return CheckInResponse(
-            id=checkin.id,
-            maison=checkin.house_id,
-            nom=checkin.guest_name,
-            telephone=checkin.phone or "",
-            email=checkin.email or "",
-            dateArrivee=checkin.arrival_date.strftime("%Y-%m-%d"),
-            dateDepart=checkin.departure_date.strftime("%Y-%m-%d"),
-            avancePaye=checkin.advance_paid,
-            paiementCheckin=checkin.checkin_payment,
-            montantTotal=checkin.total_amount,
-            inventaire=inventory,
-            responsable=checkin.manager,
-            remarques=checkin.remarks or "",
-            reservationId=checkin.reservation_id
-        )
+        return CheckInResponse.model_validate(checkin)
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid date format: {str(e)}")
     except Exception as e:
-        db.rollback()
         raise HTTPException(status_code=500, detail=f"Error creating check-in: {str(e)}")
 
 
 @router.put("/{checkin_id}", response_model=CheckInResponse)
+@query_budget(6)
 async def update_checkin(
     checkin_id: str,
     checkin_data: CheckInUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -231,7 +201,7 @@ async def update_checkin(
     Raises:
         HTTPException: If check-in not found or update fails
     """
-    checkin = db.query(CheckIn).filter(CheckIn.id == checkin_id).first()
+    checkin = await db.scalar(statements.CHECKIN_BY_ID, {"id": checkin_id})
     
     if not checkin:
         raise HTTPException(status_code=404, detail="Check-in not found")
@@ -255,10 +225,9 @@ async def update_checkin(
             checkin.checkin_payment = checkin_data.paiementCheckin
             
             # Update corresponding financial transaction
-            financial_op = db.query(FinancialOperation).filter(
-                FinancialOperation.checkin_id == checkin_id,
-                FinancialOperation.origine == "checkin"
-            ).first()
+            financial_op = await db.scalar(statements.FINANCIAL_OPERATION_BY_CHECKIN, {
+                "checkin_id": checkin_id, "origine": "checkin"
+            })
             
             if financial_op:
                 financial_op.montant = checkin_data.paiementCheckin
@@ -280,39 +249,23 @@ async def update_checkin(
                 detail="Arrival date must be before departure date"
             )
         
-        db.commit()
-        db.refresh(checkin)
-        
-        inventory = InventaireType(**checkin.inventory) if checkin.inventory else InventaireType()
+        await db.commit()
+        await db.refresh(checkin)
         
-        return CheckInResponse(
-            id=checkin.id,
-            maison=checkin.house_id,
-            nom=checkin.guest_name,
-            telephone=checkin.phone or "",
-            email=checkin.email or "",
-            dateArrivee=checkin.arrival_date.strftime("%Y-%m-%d"),
-            dateDepart=checkin.departure_date.strftime("%Y-%m-%d"),
-            avancePaye=checkin.advance_paid,
-            paiementCheckin=checkin.checkin_payment,
-            montantTotal=checkin.total_amount,
-            inventaire=inventory,
-            responsable=checkin.manager,
-            remarques=checkin.remarks or "",
-            reservationId=checkin.reservation_id
-        )
+        return CheckInResponse.model_validate(checkin)
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid date format: {str(e)}")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error updating check-in: {str(e)}")
 
 
 @router.delete("/{checkin_id}")
+@query_budget(10)
 async def delete_checkin(
     checkin_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -330,42 +283,41 @@ async def delete_checkin(
     Raises:
         HTTPException: If check-in not found or deletion fails
     """
-    checkin = db.query(CheckIn).filter(CheckIn.id == checkin_id).first()
+    checkin = await db.scalar(statements.CHECKIN_BY_ID, {"id": checkin_id})
     
     if not checkin:
         raise HTTPException(status_code=404, detail="Check-in not found")
     
     try:
         # Delete corresponding financial transactions
-        financial_ops = db.query(FinancialOperation).filter(
-            FinancialOperation.checkin_id == checkin_id
-        ).all()
+        financial_ops = (await db.scalars(statements.FINANCIAL_OPERATIONS_OF_CHECKIN, {"checkin_id": checkin_id})).all()
         
         for op in financial_ops:
-            db.delete(op)
+            await db.delete(op)
         
         # Delete any checkout records
-        checkouts = db.query(CheckOut).filter(CheckOut.checkin_id == checkin_id).all()
+        checkouts = (await db.scalars(statements.CHECKOUTS_OF_CHECKIN, {"checkin_id": checkin_id})).all()
         for checkout in checkouts:
-            db.delete(checkout)
+            await db.delete(checkout)
         
         # Delete the check-in
-        db.delete(checkin)
-        db.commit()
+        await db.delete(checkin)
+        await db.commit()
         
         return {"message": "Check-in deleted successfully"}
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error deleting check-in: {str(e)}")
 
 
 # Checkout endpoints
 @router.post("/{checkin_id}/checkout", response_model=CheckOutResponse)
+@query_budget(4)
 async def create_checkout(
     checkin_id: str,
     checkout_data: CheckOutCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -382,7 +334,7 @@ async def create_checkout(
     Raises:
         HTTPException: If check-in not found or checkout creation fails
     """
-    checkin = db.query(CheckIn).filter(CheckIn.id == checkin_id).first()
+    checkin = await db.scalar(statements.CHECKIN_BY_ID, {"id": checkin_id})
     
     if not checkin:
         raise HTTPException(status_code=404, detail="Check-in not found")
@@ -401,31 +353,26 @@ async def create_checkout(
         )
         
         db.add(checkout)
-        db.commit()
-        db.refresh(checkout)
+        await db.commit()
+        await db.refresh(checkout)
         
-        return CheckOutResponse(
-            id=checkout.id,
-            checkinId=checkout.checkin_id,
-            maison=checkout.house_id,
-            nom=checkout.guest_name,
-            dateDepart=checkout.checkout_date.strftime("%Y-%m-%d"),
-            inventaireSortie=InventaireType(**checkout.checkout_inventory) if checkout.checkout_inventory else None,
-            notesDommages=checkout.damages_notes,
-            responsable=checkout.manager
-        )
+        return CheckOutResponse.model_validate(checkout)
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid date format: {str(e)}")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error creating checkout: {str(e)}")
 
 
-@router.get("/checkouts/", response_model=List[CheckOutResponse])
+@router.get("/checkouts/", response_model=Union[List[CheckOutResponse], Page[CheckOutResponse]])
+@query_budget(1)
+@etag_tables(CheckOut)
 async def get_checkouts(
     houseId: Optional[str] = Query(None, alias="maison"),
-    db: Session = Depends(get_db),
+    page: Pagination = Depends(),
+    fields: Optional[Tuple[str, ...]] = Depends(SparseFields(CheckOutResponse)),
+    db: AsyncSession = Depends(get_read_db),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -433,29 +380,17 @@ async def get_checkouts(
     
     Args:
         houseId: Optional house ID to filter checkouts
+        page: limit / cursor of the page (the whole list without them)
+        fields: Fields to return (all of them without ?fields=)
         db: Database session
         
     Returns:
-        List of checkouts in frontend format
+        List of checkouts in frontend format, or one page of them
     """
-    query = db.query(CheckOut)
+    # Only the response columns (or those of ?fields=); the rows are mapped onto the schema
+    query = select(*response_columns(CheckOutResponse, CheckOut, fields))
     
     if houseId:
-        query = query.filter(CheckOut.house_id == houseId)
-    
-    checkouts = query.order_by(CheckOut.checkout_date.desc()).all()
-    
-    response_data = []
-    for checkout in checkouts:
-        response_data.append(CheckOutResponse(
-            id=checkout.id,
-            checkinId=checkout.checkin_id,
-            maison=checkout.house_id,
-            nom=checkout.guest_name,
-            dateDepart=checkout.checkout_date.strftime("%Y-%m-%d"),
-            inventaireSortie=InventaireType(**checkout.checkout_inventory) if checkout.checkout_inventory else None,
-            notesDommages=checkout.damages_notes,
-            responsable=checkout.manager
-        ))
+        query = query.where(CheckOut.house_id == houseId)
     
-    return response_data
\ No newline at end of file
+    return sparse_response(CheckOutResponse, fields, await page.fetch(db, query, CHECKOUT_KEYSET))
\ No newline at end of file
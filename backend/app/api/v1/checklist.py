@@ -1,9 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import Integer, case, delete, false, literal_column, null, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Tuple, Union
 from datetime import datetime
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_async_db, get_read_db
+from app.core.query_stats import query_budget
+from app.core.table_versions import etag_tables
+from app.core.projections import response_columns, sparse_response
+from app.core.reference_data import ReferenceData, ReferenceRows, get_reference_data
+from app.core import statements
+from app.core.write_queue import get_writer
 from app.models.checklist import (
     ChecklistCategory, 
     ChecklistItem, 
@@ -22,30 +31,70 @@ from app.schemas.checklist import (
     HouseReadinessStatus,
     ChecklistProgress
 )
+from app.schemas.pagination import Page
 from app.utils.dependencies import get_current_user
+from app.utils.fields import SparseFields
+from app.utils.pagination import Keyset, Pagination
 
 router = APIRouter()
 
+# List order (by step, then in insertion order as the rows are stored), also the key of its pages
+CHECKLIST_ITEM_KEYSET = Keyset(
+    ChecklistItem.step_number,
+    literal_column(f"{ChecklistItem.__tablename__}.rowid", Integer).label("rowid"),
+    descending=False,
+    nullable=True,
+)
+
+
+def category_name_column(categories: ReferenceRows):
+    """
+    Name of an item's category, from the in-memory categories.
+
+    A CASE on the item's category_id rather than a join: the few names are
+    bound as parameters, so the statement stays one cached shape per number
+    of categories.
+
+    Args:
+        categories: Checklist categories of the residence
+
+    Returns:
+        Column expression (NULL when there are no categories)
+    """
+    if not len(categories):
+        return null()
+    return case({category.id: category.name for category in categories}, value=ChecklistItem.category_id)
+
 
 @router.get("/categories", response_model=List[ChecklistCategoryResponse])
+@query_budget(0)
+@etag_tables(ChecklistCategory, max_age=settings.REFERENCE_CACHE_MAX_AGE)
 async def get_checklist_categories(
-    db: Session = Depends(get_db)
+    refs: ReferenceData = Depends(get_reference_data)
 ):
     """
     Get all checklist categories.
     
+    Args:
+        refs: Reference data of the residence
+        
     Returns:
         List of available checklist categories
     """
-    categories = db.query(ChecklistCategory).order_by(ChecklistCategory.id).all()
+    categories = await refs.checklist_categories.rows()
     return [ChecklistCategoryResponse(id=cat.id, name=cat.name) for cat in categories]
 
 
-@router.get("/items", response_model=List[ChecklistItemResponse])
+@router.get("/items", response_model=Union[List[ChecklistItemResponse], Page[ChecklistItemResponse]])
+@query_budget(1)
+@etag_tables(ChecklistItem, ChecklistCategory)
 async def get_checklist_items(
     houseId: Optional[str] = Query(None, alias="maison"),
     categorie: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    page: Pagination = Depends(),
+    fields: Optional[Tuple[str, ...]] = Depends(SparseFields(ChecklistItemResponse)),
+    db: AsyncSession = Depends(get_read_db),
+    refs: ReferenceData = Depends(get_reference_data),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -54,46 +103,38 @@ async def get_checklist_items(
     Args:
         houseId: Filter by house ID
         categorie: Filter by category name
+        page: limit / cursor of the page (the whole list without them)
+        fields: Fields to return (all of them without ?fields=)
         db: Database session
+        refs: Reference data of the residence
         
     Returns:
-        List of checklist items in frontend format
+        List of checklist items in frontend format, or one page of them
     """
-    query = db.query(ChecklistItem)
+    categories = await refs.checklist_categories.rows()
+    
+    # Category names are filled in from memory, in the same query
+    query = select(
+        *response_columns(ChecklistItemResponse, ChecklistItem, fields, category_name=category_name_column(categories))
+    )
     
     if houseId:
-        query = query.filter(ChecklistItem.house_id == houseId)
+        query = query.where(ChecklistItem.house_id == houseId)
     
     if categorie:
-        # Join with category to filter by name
-        query = query.join(ChecklistCategory).filter(ChecklistCategory.name == categorie)
-    
-    items = query.order_by(ChecklistItem.step_number).all()
-    
-    # Convert to frontend format
-    response_data = []
-    for item in items:
-        category_name = db.query(ChecklistCategory).filter(
-            ChecklistCategory.id == item.category_id
-        ).first().name if item.category_id else ""
-        
-        response_data.append(ChecklistItemResponse(
-            id=item.id,
-            maison=item.house_id,
-            etape=item.step_number,
-            categorie=category_name,
-            description=item.description,
-            produitAUtiliser=item.product_required or "",
-            type=item.type
-        ))
+        category = categories.index("name").get(categorie)
+        query = query.where(ChecklistItem.category_id == category.id if category else false())
     
-    return response_data
+    return sparse_response(ChecklistItemResponse, fields, await page.fetch(db, query, CHECKLIST_ITEM_KEYSET))
 
 
 @router.get("/items/{item_id}", response_model=ChecklistItemResponse)
+@query_budget(1)
+@etag_tables(ChecklistItem, ChecklistCategory)
 async def get_checklist_item(
     item_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
+    refs: ReferenceData = Depends(get_reference_data),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -102,6 +143,7 @@ async def get_checklist_item(
     Args:
         item_id: The checklist item ID
         db: Database session
+        refs: Reference data of the residence
         
     Returns:
         Checklist item details in frontend format
@@ -109,14 +151,13 @@ async def get_checklist_item(
     Raises:
         HTTPException: If item not found
     """
-    item = db.query(ChecklistItem).filter(ChecklistItem.id == item_id).first()
+    item = await db.scalar(statements.CHECKLIST_ITEM_BY_ID, {"id": item_id})
     
     if not item:
         raise HTTPException(status_code=404, detail="Checklist item not found")
     
-    category_name = db.query(ChecklistCategory).filter(
-        ChecklistCategory.id == item.category_id
-    ).first().name if item.category_id else ""
+    category = (await refs.checklist_categories.rows()).index("id").get(item.category_id)
+    category_name = category.name if category else ""
     
     return ChecklistItemResponse(
         id=item.id,
@@ -130,9 +171,12 @@ async def get_checklist_item(
 
 
 @router.post("/items", response_model=ChecklistItemResponse)
+# The item and its change log entry, plus the category when it is new
+@query_budget(3)
 async def create_checklist_item(
     item_data: ChecklistItemCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    refs: ReferenceData = Depends(get_reference_data),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -141,6 +185,7 @@ async def create_checklist_item(
     Args:
         item_data: Checklist item creation data
         db: Database session
+        refs: Reference data of the residence
         
     Returns:
         Created checklist item in frontend format
@@ -149,52 +194,47 @@ async def create_checklist_item(
         HTTPException: If validation fails or creation error occurs
     """
     try:
-        # Find or create category
-        category = db.query(ChecklistCategory).filter(
-            ChecklistCategory.name == item_data.categorie
-        ).first()
-        
-        if not category:
-            # Create new category if it doesn't exist
-            category = ChecklistCategory(name=item_data.categorie)
-            db.add(category)
-            db.commit()
-            db.refresh(category)
-        
         # Create checklist item
         item = ChecklistItem(
             house_id=item_data.maison,
             step_number=item_data.etape,
-            category_id=category.id,
             description=item_data.description,
             product_required=item_data.produitAUtiliser,
             type=item_data.type
         )
-        
+        category = (await refs.checklist_categories.rows()).index("name").get(item_data.categorie)
+        if category:
+            item.category_id = category.id
+        else:
+            # New category: inserted along with the item, in the same transaction
+            item.category = ChecklistCategory(name=item_data.categorie)
+
+        # Every column is known (the id is generated here): no refresh after the commit
         db.add(item)
-        db.commit()
-        db.refresh(item)
+        await db.commit()
         
         return ChecklistItemResponse(
             id=item.id,
             maison=item.house_id,
             etape=item.step_number,
-            categorie=category.name,
+            categorie=item_data.categorie,
             description=item.description,
             produitAUtiliser=item.product_required or "",
             type=item.type
         )
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error creating checklist item: {str(e)}")
 
 
 @router.put("/items/{item_id}", response_model=ChecklistItemResponse)
+@query_budget(4)
 async def update_checklist_item(
     item_id: str,
     item_data: ChecklistItemUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    refs: ReferenceData = Depends(get_reference_data),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -204,6 +244,7 @@ async def update_checklist_item(
         item_id: The checklist item ID to update
         item_data: Updated checklist item data
         db: Database session
+        refs: Reference data of the residence
         
     Returns:
         Updated checklist item in frontend format
@@ -211,7 +252,7 @@ async def update_checklist_item(
     Raises:
         HTTPException: If item not found or update fails
     """
-    item = db.query(ChecklistItem).filter(ChecklistItem.id == item_id).first()
+    item = await db.scalar(statements.CHECKLIST_ITEM_BY_ID, {"id": item_id})
     
     if not item:
         raise HTTPException(status_code=404, detail="Checklist item not found")
@@ -224,15 +265,13 @@ async def update_checklist_item(
             item.step_number = item_data.etape
         if item_data.categorie is not None:
             # Find or create category
-            category = db.query(ChecklistCategory).filter(
-                ChecklistCategory.name == item_data.categorie
-            ).first()
+            category = (await refs.checklist_categories.rows()).index("name").get(item_data.categorie)
             
             if not category:
                 category = ChecklistCategory(name=item_data.categorie)
                 db.add(category)
-                db.commit()
-                db.refresh(category)
+                await db.commit()
+                await db.refresh(category)
             
             item.category_id = category.id
         if item_data.description is not None:
@@ -242,12 +281,12 @@ async def update_checklist_item(
         if item_data.type is not None:
             item.type = item_data.type
         
-        db.commit()
-        db.refresh(item)
+        await db.commit()
+        await db.refresh(item)
         
-        category_name = db.query(ChecklistCategory).filter(
-            ChecklistCategory.id == item.category_id
-        ).first().name
+        # Read after the commit, which reloads the categories if it created one
+        category = (await refs.checklist_categories.rows()).index("id").get(item.category_id)
+        category_name = category.name if category else ""
         
         return ChecklistItemResponse(
             id=item.id,
@@ -260,14 +299,15 @@ async def update_checklist_item(
         )
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error updating checklist item: {str(e)}")
 
 
 @router.delete("/items/{item_id}")
+@query_budget(7)
 async def delete_checklist_item(
     item_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -283,32 +323,34 @@ async def delete_checklist_item(
     Raises:
         HTTPException: If item not found or deletion fails
     """
-    item = db.query(ChecklistItem).filter(ChecklistItem.id == item_id).first()
+    item = await db.scalar(statements.CHECKLIST_ITEM_BY_ID, {"id": item_id})
     
     if not item:
         raise HTTPException(status_code=404, detail="Checklist item not found")
     
     try:
         # Delete related status records
-        db.query(HouseChecklistStatus).filter(
+        await db.execute(delete(HouseChecklistStatus).where(
             HouseChecklistStatus.item_id == item_id
-        ).delete()
+        ))
         
         # Delete the item
-        db.delete(item)
-        db.commit()
+        await db.delete(item)
+        await db.commit()
         
         return {"message": "Checklist item deleted successfully"}
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error deleting checklist item: {str(e)}")
 
 
 @router.get("/status/{house_id}", response_model=List[HouseChecklistStatusResponse])
+@query_budget(1)
+@etag_tables(HouseChecklistStatus)
 async def get_house_checklist_status(
     house_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -321,9 +363,7 @@ async def get_house_checklist_status(
     Returns:
         List of checklist item statuses for the house
     """
-    statuses = db.query(HouseChecklistStatus).filter(
-        HouseChecklistStatus.house_id == house_id
-    ).all()
+    statuses = (await db.scalars(statements.HOUSE_CHECKLIST_STATUSES, {"house_id": house_id})).all()
     
     return [HouseChecklistStatusResponse(
         id=status.id,
@@ -336,19 +376,22 @@ async def get_house_checklist_status(
 
 
 @router.post("/status/{house_id}/complete", response_model=HouseChecklistStatusResponse)
+@query_budget(5)
 async def complete_checklist_task(
     house_id: str,
     task_data: TaskCompletionRequest,
-    db: Session = Depends(get_db),
+    writer = Depends(get_writer),
     # current_user = Depends(get_current_user)
 ):
     """
     Mark a checklist task as completed or uncompleted.
     
+    The status row is upserted through the single-writer queue.
+    
     Args:
         house_id: The house ID
         task_data: Task completion data
-        db: Database session
+        writer: Write queue (or inline session writer) committing the unit of work
         
     Returns:
         Updated task status
@@ -357,28 +400,29 @@ async def complete_checklist_task(
         HTTPException: If task not found or update fails
     """
     try:
-        # Find existing status or create new one
-        status = db.query(HouseChecklistStatus).filter(
-            HouseChecklistStatus.house_id == house_id,
-            HouseChecklistStatus.item_id == task_data.taskId
-        ).first()
-        
-        if not status:
-            status = HouseChecklistStatus(
-                house_id=house_id,
-                item_id=task_data.taskId,
-                is_completed=task_data.completed,
-                completed_at=datetime.utcnow() if task_data.completed else None,
-                # updated_by=current_user.id  # Uncomment when auth is implemented
-            )
-            db.add(status)
-        else:
-            status.is_completed = task_data.completed
-            status.completed_at = datetime.utcnow() if task_data.completed else None
-            # status.updated_by = current_user.id  # Uncomment when auth is implemented
+        def complete(db: Session) -> HouseChecklistStatus:
+            # Find existing status or create new one
+            status = db.scalar(statements.HOUSE_CHECKLIST_STATUS, {
+                "house_id": house_id, "item_id": task_data.taskId
+            })
+            
+            if not status:
+                status = HouseChecklistStatus(
+                    house_id=house_id,
+                    item_id=task_data.taskId,
+                    is_completed=task_data.completed,
+                    completed_at=datetime.utcnow() if task_data.completed else None,
+                    # updated_by=current_user.id  # Uncomment when auth is implemented
+                )
+                db.add(status)
+            else:
+                status.is_completed = task_data.completed
+                status.completed_at = datetime.utcnow() if task_data.completed else None
+                # status.updated_by = current_user.id  # Uncomment when auth is implemented
+            
+            return status
         
-        db.commit()
-        db.refresh(status)
+        status = await writer.run(complete)
         
         return HouseChecklistStatusResponse(
             id=status.id,
@@ -390,14 +434,16 @@ async def complete_checklist_task(
         )
         
     except Exception as e:
-        db.rollback()
         raise HTTPException(status_code=500, detail=f"Error updating task status: {str(e)}")
 
 
 @router.get("/readiness/{house_id}", response_model=HouseReadinessStatus)
+@query_budget(4)
+@etag_tables(ChecklistItem, ChecklistCategory, HouseChecklistStatus, HouseCategoryStatus)
 async def get_house_readiness_status(
     house_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
+    refs: ReferenceData = Depends(get_reference_data),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -406,36 +452,27 @@ async def get_house_readiness_status(
     Args:
         house_id: The house ID
         db: Database session
+        refs: Reference data of the residence
         
     Returns:
         Complete house readiness status
     """
     # Get all checklist items for this house
-    total_tasks = db.query(ChecklistItem).filter(
-        ChecklistItem.house_id == house_id
-    ).count()
+    total_tasks = await db.scalar(statements.HOUSE_CHECKLIST_ITEMS_COUNT, {"house_id": house_id})
     
     # Get all completed tasks for this house
-    completed_tasks = db.query(HouseChecklistStatus).filter(
-        HouseChecklistStatus.house_id == house_id,
-        HouseChecklistStatus.is_completed == True
-    ).count()
+    completed_tasks = await db.scalar(statements.HOUSE_COMPLETED_TASKS_COUNT, {"house_id": house_id})
     
     # Get category status
-    category_statuses = db.query(HouseCategoryStatus).filter(
-        HouseCategoryStatus.house_id == house_id,
-        HouseCategoryStatus.is_ready == True
-    ).count()
+    category_statuses = await db.scalar(statements.HOUSE_READY_CATEGORIES_COUNT, {"house_id": house_id})
     
-    total_categories = db.query(ChecklistCategory).count()
+    total_categories = len(await refs.checklist_categories.rows())
     
     # House is ready if all categories are ready
     is_ready = category_statuses == total_categories
     
     # Get last updated time
-    last_status = db.query(HouseChecklistStatus).filter(
-        HouseChecklistStatus.house_id == house_id
-    ).order_by(HouseChecklistStatus.completed_at.desc()).first()
+    last_status = await db.scalar(statements.HOUSE_LAST_CHECKLIST_STATUS, {"house_id": house_id})
     
     last_updated = None
     if last_status and last_status.completed_at:
@@ -453,10 +490,11 @@ async def get_house_readiness_status(
 
 
 @router.post("/categories/{house_id}/complete")
+@query_budget(3)
 async def complete_category(
     house_id: str,
     category_data: CategoryCompletionRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -475,10 +513,9 @@ async def complete_category(
     """
     try:
         # Find existing status or create new one
-        status = db.query(HouseCategoryStatus).filter(
-            HouseCategoryStatus.house_id == house_id,
-            HouseCategoryStatus.category_id == category_data.categoryId
-        ).first()
+        status = await db.scalar(statements.HOUSE_CATEGORY_STATUS, {
+            "house_id": house_id, "category_id": category_data.categoryId
+        })
         
         if not status:
             status = HouseCategoryStatus(
@@ -492,19 +529,22 @@ async def complete_category(
             status.is_ready = category_data.completed
             status.ready_at = datetime.utcnow() if category_data.completed else None
         
-        db.commit()
+        await db.commit()
         
         return {"message": "Category status updated successfully"}
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error updating category status: {str(e)}")
 
 
 @router.get("/progress/{house_id}", response_model=List[ChecklistProgress])
+@query_budget(3)
+@etag_tables(ChecklistItem, ChecklistCategory, HouseChecklistStatus, HouseCategoryStatus)
 async def get_checklist_progress(
     house_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
+    refs: ReferenceData = Depends(get_reference_data),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -513,32 +553,29 @@ async def get_checklist_progress(
     Args:
         house_id: The house ID
         db: Database session
+        refs: Reference data of the residence
         
     Returns:
         List of progress data by category
     """
-    categories = db.query(ChecklistCategory).all()
-    progress_data = []
+    categories = await refs.checklist_categories.rows()
     
+    # Per-category counts of the house, one grouped query each
+    total_tasks_by_category = dict((await db.execute(statements.CATEGORY_ITEMS_COUNTS, {"house_id": house_id})).all())
+    completed_tasks_by_category = dict(
+        (await db.execute(statements.CATEGORY_COMPLETED_TASKS_COUNTS, {"house_id": house_id})).all()
+    )
+    category_statuses = {}
+    for status in await db.scalars(statements.HOUSE_CATEGORY_STATUSES, {"house_id": house_id}):
+        category_statuses.setdefault(status.category_id, status)
+    
+    progress_data = []
     for category in categories:
-        # Count total tasks in this category for this house
-        total_tasks = db.query(ChecklistItem).filter(
-            ChecklistItem.house_id == house_id,
-            ChecklistItem.category_id == category.id
-        ).count()
-        
-        # Count completed tasks in this category for this house
-        completed_tasks = db.query(HouseChecklistStatus).join(ChecklistItem).filter(
-            ChecklistItem.house_id == house_id,
-            ChecklistItem.category_id == category.id,
-            HouseChecklistStatus.is_completed == True
-        ).count()
+        total_tasks = total_tasks_by_category.get(category.id, 0)
+        completed_tasks = completed_tasks_by_category.get(category.id, 0)
         
         # Check if category is marked as ready
-        category_status = db.query(HouseCategoryStatus).filter(
-            HouseCategoryStatus.house_id == house_id,
-            HouseCategoryStatus.category_id == category.id
-        ).first()
+        category_status = category_statuses.get(category.id)
         
         is_ready = category_status.is_ready if category_status else False
         progress_percentage = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
@@ -552,4 +589,4 @@ async def get_checklist_progress(
             isReady=is_ready
         ))
     
-    return progress_data
\ No newline at end of file
+    return progress_data
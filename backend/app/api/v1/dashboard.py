@@ -1,16 +1,24 @@
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, extract, and_
-from typing import List, Optional
+from sqlalchemy import func, and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 from datetime import datetime, date, timedelta
 
-from app.core.database import get_db
+from app.core.database import shard_router
+from app.core.reference_data import ReferenceData, get_reference_data, reference_data
+from app.core.query_stats import query_budget
+from app.core.table_versions import etag_tables
+from app.core.replica import analytics_sessionmaker, get_analytics_db
+from app.core import statements
+from app.core.archive import HOUSE_REVENUE_TOTALS_HISTORY, financial_operations_source
 from app.models.checkin import CheckIn
 from app.models.reservation import Reservation
 from app.models.maintenance import MaintenanceIssue
 from app.models.finance import FinancialOperation
 from app.models.house import House
-from app.models.checklist import HouseCategoryStatus, ChecklistCategory
+from app.models.checklist import ChecklistCategory, HouseCategoryStatus
+from app.utils.periods import period_bounds, period_filter
 from app.schemas.dashboard import (
     DashboardMetrics,
     OccupancyData,
@@ -24,11 +32,114 @@ from app.utils.dependencies import get_current_user
 
 router = APIRouter()
 
+ALL_RESIDENCES_DESCRIPTION = "Aggregate every residence database instead of the request's one"
+
+
+async def fan_out(compute: Callable[..., Awaitable[Any]], *args, with_reference_data: bool = False) -> List[Any]:
+    """
+    Run a computation on every residence database in parallel.
+    
+    Args:
+        compute: Coroutine function taking a read-only session, then `args`
+        *args: Extra arguments passed to `compute`
+        with_reference_data: Pass the residence's reference data to `compute`
+            right after the session
+        
+    Returns:
+        One result per residence, in configuration order
+    """
+    async def on_shard(shard):
+        async with analytics_sessionmaker(shard)() as db:
+            if with_reference_data:
+                return await compute(db, reference_data[shard.name], *args)
+            return await compute(db, *args)
+
+    return await asyncio.gather(*(on_shard(shard) for shard in shard_router.shards.values()))
+
+
+def parse_target_date(value: Optional[str]) -> date:
+    # YYYY-MM-DD, today when not given
+    return datetime.strptime(value, "%Y-%m-%d").date() if value else date.today()
+
+
+async def compute_metrics(db: AsyncSession, refs: ReferenceData, target_date: date) -> DashboardMetrics:
+    """
+    Calculate the dashboard metrics of one residence database.
+    
+    Args:
+        db: Database session
+        refs: Reference data of the residence
+        target_date: Date the daily counts are computed for
+        
+    Returns:
+        Dashboard metrics
+    """
+    # Count check-ins for the target date
+    checkins_today = await db.scalar(select(func.count()).select_from(CheckIn).where(
+        CheckIn.arrival_date == target_date
+    ))
+    
+    # Count check-outs for the target date
+    checkouts_today = await db.scalar(select(func.count()).select_from(CheckIn).where(
+        CheckIn.departure_date == target_date
+    ))
+    
+    # Count unresolved maintenance issues
+    maintenances_todo = await db.scalar(select(func.count()).select_from(MaintenanceIssue).where(
+        MaintenanceIssue.status == "non-resolue"
+    ))
+    
+    # Count houses that are ready (all categories completed)
+    total_categories = len(await refs.checklist_categories.rows())
+    
+    # Houses are ready if they have all categories marked as ready
+    ready_houses = 0
+    if total_categories > 0:
+        ready_houses = await db.scalar(statements.READY_HOUSES_COUNT, {"total_categories": total_categories})
+    
+    # Count payments completed (reservations with corresponding check-ins)
+    payments_completed = await db.scalar(select(func.count()).select_from(CheckIn))
+    
+    # Count payments open (reservations without check-ins)
+    total_reservations = await db.scalar(select(func.count()).select_from(Reservation))
+    payments_open = max(0, total_reservations - payments_completed)
+    
+    # Count advance payments (reservations with advance > 0)
+    advance_payments = await db.scalar(select(func.count()).select_from(Reservation).where(
+        Reservation.advance_paid > 0
+    ))
+    
+    return DashboardMetrics(
+        checkinToday=checkins_today,
+        checkoutToday=checkouts_today,
+        maintenancesTodo=maintenances_todo,
+        housesReady=ready_houses,
+        paymentsCompleted=payments_completed,
+        paymentsOpen=payments_open,
+        advancePayments=advance_payments
+    )
+
+
+async def residence_metrics(
+    db: AsyncSession, refs: ReferenceData, target_date: date, all_residences: bool
+) -> DashboardMetrics:
+    # Every metric is a count, so residences add up
+    if not all_residences:
+        return await compute_metrics(db, refs, target_date)
+    parts = await fan_out(compute_metrics, target_date, with_reference_data=True)
+    return DashboardMetrics(**{
+        field: sum(getattr(part, field) for part in parts) for field in DashboardMetrics.model_fields
+    })
+
 
 @router.get("/metrics", response_model=DashboardMetrics)
+@query_budget(7)
+@etag_tables(CheckIn, Reservation, MaintenanceIssue, House, ChecklistCategory, HouseCategoryStatus)
 async def get_dashboard_metrics(
     date: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    allResidences: bool = Query(False, description=ALL_RESIDENCES_DESCRIPTION),
+    db: AsyncSession = Depends(get_analytics_db),
+    refs: ReferenceData = Depends(get_reference_data),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -38,72 +149,15 @@ async def get_dashboard_metrics(
     
     Args:
         date: Date filter in YYYY-MM-DD format (defaults to today)
+        allResidences: Sum the metrics of every residence database
         db: Database session
+        refs: Reference data of the residence
         
     Returns:
         Dashboard metrics for the specified date
     """
     try:
-        # Parse date or use today
-        if date:
-            target_date = datetime.strptime(date, "%Y-%m-%d").date()
-        else:
-            from datetime import date as date_module
-            target_date = date_module.today()
-        
-        # Count check-ins for the target date
-        checkins_today = db.query(CheckIn).filter(
-            CheckIn.arrival_date == target_date
-        ).count()
-        
-        # Count check-outs for the target date
-        checkouts_today = db.query(CheckIn).filter(
-            CheckIn.departure_date == target_date
-        ).count()
-        
-        # Count unresolved maintenance issues
-        maintenances_todo = db.query(MaintenanceIssue).filter(
-            MaintenanceIssue.status == "non-resolue"
-        ).count()
-        
-        # Count houses that are ready (all categories completed)
-        total_houses = db.query(House).count()
-        total_categories = db.query(ChecklistCategory).count()
-        
-        # Houses are ready if they have all categories marked as ready
-        ready_houses = 0
-        if total_categories > 0:
-            houses = db.query(House).all()
-            for house in houses:
-                ready_categories = db.query(HouseCategoryStatus).filter(
-                    HouseCategoryStatus.house_id == house.id,
-                    HouseCategoryStatus.is_ready == True
-                ).count()
-                
-                if ready_categories == total_categories:
-                    ready_houses += 1
-        
-        # Count payments completed (reservations with corresponding check-ins)
-        payments_completed = db.query(CheckIn).count()
-        
-        # Count payments open (reservations without check-ins)
-        total_reservations = db.query(Reservation).count()
-        payments_open = max(0, total_reservations - payments_completed)
-        
-        # Count advance payments (reservations with advance > 0)
-        advance_payments = db.query(Reservation).filter(
-            Reservation.advance_paid > 0
-        ).count()
-        
-        return DashboardMetrics(
-            checkinToday=checkins_today,
-            checkoutToday=checkouts_today,
-            maintenancesTodo=maintenances_todo,
-            housesReady=ready_houses,
-            paymentsCompleted=payments_completed,
-            paymentsOpen=payments_open,
-            advancePayments=advance_payments
-        )
+        return await residence_metrics(db, refs, parse_target_date(date), allResidences)
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid date format: {str(e)}")
@@ -111,10 +165,55 @@ async def get_dashboard_metrics(
         raise HTTPException(status_code=500, detail=f"Error calculating metrics: {str(e)}")
 
 
+async def compute_occupancy(db: AsyncSession, refs: ReferenceData, target_date: date) -> OccupancyData:
+    """
+    Calculate the occupancy of one residence database.
+    
+    Args:
+        db: Database session
+        refs: Reference data of the residence
+        target_date: Date to compute the occupancy for
+        
+    Returns:
+        Occupied vs free houses
+    """
+    # Count total houses
+    total_houses = len(await refs.houses.rows())
+    
+    # Count occupied houses (check-ins that span the target date)
+    occupied_houses = await db.scalar(select(func.count()).select_from(CheckIn).where(
+        CheckIn.arrival_date <= target_date,
+        CheckIn.departure_date > target_date
+    ))
+    
+    free_houses = max(0, total_houses - occupied_houses)
+    
+    return OccupancyData(
+        occupied=occupied_houses,
+        free=free_houses
+    )
+
+
+async def residence_occupancy(
+    db: AsyncSession, refs: ReferenceData, target_date: date, all_residences: bool
+) -> OccupancyData:
+    if not all_residences:
+        return await compute_occupancy(db, refs, target_date)
+    parts = await fan_out(compute_occupancy, target_date, with_reference_data=True)
+    return OccupancyData(
+        occupied=sum(part.occupied for part in parts),
+        free=sum(part.free for part in parts)
+    )
+
+
 @router.get("/occupancy", response_model=OccupancyData)
+@query_budget(1)
+@etag_tables(CheckIn, House)
 async def get_occupancy_data(
     date: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    allResidences: bool = Query(False, description=ALL_RESIDENCES_DESCRIPTION),
+    db: AsyncSession = Depends(get_analytics_db),
+    refs: ReferenceData = Depends(get_reference_data),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -122,34 +221,15 @@ async def get_occupancy_data(
     
     Args:
         date: Date filter in YYYY-MM-DD format (defaults to today)
+        allResidences: Add up the houses of every residence database
         db: Database session
+        refs: Reference data of the residence
         
     Returns:
         Occupancy data showing occupied vs free houses
     """
     try:
-        # Parse date or use today
-        if date:
-            target_date = datetime.strptime(date, "%Y-%m-%d").date()
-        else:
-            from datetime import date as date_module
-            target_date = date_module.today()
-        
-        # Count total houses
-        total_houses = db.query(House).count()
-        
-        # Count occupied houses (check-ins that span the target date)
-        occupied_houses = db.query(CheckIn).filter(
-            CheckIn.arrival_date <= target_date,
-            CheckIn.departure_date > target_date
-        ).count()
-        
-        free_houses = max(0, total_houses - occupied_houses)
-        
-        return OccupancyData(
-            occupied=occupied_houses,
-            free=free_houses
-        )
+        return await residence_occupancy(db, refs, parse_target_date(date), allResidences)
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid date format: {str(e)}")
@@ -157,12 +237,65 @@ async def get_occupancy_data(
         raise HTTPException(status_code=500, detail=f"Error calculating occupancy: {str(e)}")
 
 
+async def compute_daily_revenue(db: AsyncSession, start_date: date, end_date: date) -> Dict[date, float]:
+    """
+    Sum the revenue per day of one residence database.
+    
+    Args:
+        db: Database session
+        start_date: First day included
+        end_date: Last day included
+        
+    Returns:
+        Revenue by date (days without revenue are left out)
+    """
+    Operation = await financial_operations_source(db, start_date)
+    revenue_data = (await db.execute(select(
+        Operation.date,
+        func.sum(Operation.montant).label('total_revenue')
+    ).where(
+        Operation.type == "entree",
+        Operation.date >= start_date,
+        Operation.date <= end_date
+    ).group_by(Operation.date))).all()
+    
+    return {item.date: float(item.total_revenue or 0) for item in revenue_data}
+
+
+async def residence_revenue(
+    db: AsyncSession, start_date: date, end_date: date, all_residences: bool
+) -> List[RevenueDataPoint]:
+    if all_residences:
+        revenue_dict: Dict[date, float] = {}
+        for part in await fan_out(compute_daily_revenue, start_date, end_date):
+            for day, revenue in part.items():
+                revenue_dict[day] = revenue_dict.get(day, 0.0) + revenue
+    else:
+        revenue_dict = await compute_daily_revenue(db, start_date, end_date)
+    
+    # Create complete date range with 0 for missing dates
+    result = []
+    current_date = start_date
+    while current_date <= end_date:
+        revenue = revenue_dict.get(current_date, 0.0)
+        result.append(RevenueDataPoint(
+            jour=current_date,
+            revenus=revenue
+        ))
+        current_date += timedelta(days=1)
+    
+    return result
+
+
 @router.get("/revenue", response_model=List[RevenueDataPoint])
+@query_budget(2)
+@etag_tables(FinancialOperation)
 async def get_revenue_data(
     dateFrom: Optional[str] = Query(None),
     dateTo: Optional[str] = Query(None),
     days: Optional[int] = Query(15),
-    db: Session = Depends(get_db),
+    allResidences: bool = Query(False, description=ALL_RESIDENCES_DESCRIPTION),
+    db: AsyncSession = Depends(get_analytics_db),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -172,6 +305,7 @@ async def get_revenue_data(
         dateFrom: Start date in YYYY-MM-DD format
         dateTo: End date in YYYY-MM-DD format
         days: Number of days to include (default 15, used if dateFrom/dateTo not provided)
+        allResidences: Add up the daily revenue of every residence database
         db: Database session
         
     Returns:
@@ -187,30 +321,7 @@ async def get_revenue_data(
             end_date = date.today()
             start_date = end_date - timedelta(days=days-1)
         
-        # Get revenue data grouped by date
-        revenue_data = db.query(
-            FinancialOperation.date,
-            func.sum(FinancialOperation.montant).label('total_revenue')
-        ).filter(
-            FinancialOperation.type == "entree",
-            FinancialOperation.date >= start_date,
-            FinancialOperation.date <= end_date
-        ).group_by(FinancialOperation.date).all()
-        
-        # Create complete date range with 0 for missing dates
-        revenue_dict = {item.date: float(item.total_revenue or 0) for item in revenue_data}
-        
-        result = []
-        current_date = start_date
-        while current_date <= end_date:
-            revenue = revenue_dict.get(current_date, 0.0)
-            result.append(RevenueDataPoint(
-                jour=current_date.strftime("%Y-%m-%d"),
-                revenus=revenue
-            ))
-            current_date += timedelta(days=1)
-        
-        return result
+        return await residence_revenue(db, start_date, end_date, allResidences)
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid date format: {str(e)}")
@@ -219,9 +330,13 @@ async def get_revenue_data(
 
 
 @router.get("/", response_model=DashboardResponse)
+@query_budget(10)
+@etag_tables(CheckIn, Reservation, MaintenanceIssue, FinancialOperation, House, ChecklistCategory, HouseCategoryStatus)
 async def get_complete_dashboard(
     date: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    allResidences: bool = Query(False, description=ALL_RESIDENCES_DESCRIPTION),
+    db: AsyncSession = Depends(get_analytics_db),
+    refs: ReferenceData = Depends(get_reference_data),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -231,16 +346,21 @@ async def get_complete_dashboard(
     
     Args:
         date: Date filter in YYYY-MM-DD format (defaults to today)
+        allResidences: Aggregate every residence database
         db: Database session
+        refs: Reference data of the residence
         
     Returns:
         Complete dashboard data
     """
     try:
         # Get all data components
-        metrics = await get_dashboard_metrics(date, db)
-        occupancy = await get_occupancy_data(date, db)
-        revenue = await get_revenue_data(None, None, 15, db)  # Last 15 days
+        target_date = parse_target_date(date)
+        metrics = await residence_metrics(db, refs, target_date, allResidences)
+        occupancy = await residence_occupancy(db, refs, target_date, allResidences)
+        from datetime import date as date_module
+        today = date_module.today()
+        revenue = await residence_revenue(db, today - timedelta(days=14), today, allResidences)  # Last 15 days
         
         return DashboardResponse(
             metrics=metrics,
@@ -252,61 +372,46 @@ async def get_complete_dashboard(
         raise HTTPException(status_code=500, detail=f"Error getting dashboard data: {str(e)}")
 
 
-@router.get("/house-stats", response_model=List[HouseStats])
-async def get_house_statistics(
-    db: Session = Depends(get_db),
-    # current_user = Depends(get_current_user)
-):
+async def compute_house_statistics(db: AsyncSession, refs: ReferenceData) -> List[HouseStats]:
     """
-    Get detailed statistics for all houses.
+    Calculate the statistics of every house of one residence database.
     
     Args:
         db: Database session
+        refs: Reference data of the residence
         
     Returns:
         List of house statistics
     """
-    houses = db.query(House).all()
+    houses = await refs.houses.rows()
     house_stats = []
     
+    # All-time revenue includes archived years
+    archived = await financial_operations_source(db) is not FinancialOperation
+    revenue_totals = HOUSE_REVENUE_TOTALS_HISTORY if archived else statements.HOUSE_REVENUE_TOTALS
+    
+    # One grouped query per figure for all houses
+    revenues = dict((await db.execute(revenue_totals)).all())
+    maintenance_counts = dict((await db.execute(statements.HOUSE_OPEN_MAINTENANCE_COUNTS)).all())
+    thirty_days_ago = date.today() - timedelta(days=30)
+    checkin_stats = {
+        row[0]: row[1:] for row in await db.execute(statements.HOUSE_CHECKIN_STATS, {"since": thirty_days_ago})
+    }
+    
     for house in houses:
         # Calculate total revenue
-        total_revenue = db.query(func.sum(FinancialOperation.montant)).filter(
-            FinancialOperation.house_id == house.id,
-            FinancialOperation.type == "entree"
-        ).scalar() or 0
+        total_revenue = revenues.get(house.id) or 0
         
         # Calculate maintenance issues
-        maintenance_issues = db.query(MaintenanceIssue).filter(
-            MaintenanceIssue.house_id == house.id,
-            MaintenanceIssue.status == "non-resolue"
-        ).count()
+        maintenance_issues = maintenance_counts.get(house.id, 0)
         
-        # Calculate occupancy rate (simplified - last 30 days)
-        thirty_days_ago = date.today() - timedelta(days=30)
-        occupied_days = db.query(CheckIn).filter(
-            CheckIn.house_id == house.id,
-            CheckIn.arrival_date >= thirty_days_ago
-        ).count()
+        checkins, occupied_days, total_days, last_departure = checkin_stats.get(house.id, (0, 0, 0, None))
         
+        # Calculate occupancy rate (simplified - last 30 days)
         occupancy_rate = min(100.0, (occupied_days / 30) * 100)
         
-        # Get last checkout
-        last_checkin = db.query(CheckIn).filter(
-            CheckIn.house_id == house.id
-        ).order_by(CheckIn.departure_date.desc()).first()
-        
-        last_checkout = None
-        if last_checkin:
-            last_checkout = last_checkin.departure_date.strftime("%Y-%m-%d")
-        
         # Calculate average stay duration
-        checkins = db.query(CheckIn).filter(CheckIn.house_id == house.id).all()
-        if checkins:
-            total_days = sum([(c.departure_date - c.arrival_date).days for c in checkins])
-            avg_stay = total_days / len(checkins)
-        else:
-            avg_stay = 0.0
+        avg_stay = total_days / checkins if checkins else 0.0
         
         house_stats.append(HouseStats(
             houseId=house.id,
@@ -315,17 +420,100 @@ async def get_house_statistics(
             occupancyRate=occupancy_rate,
             maintenanceIssues=maintenance_issues,
             averageStayDuration=avg_stay,
-            lastCheckout=last_checkout
+            lastCheckout=last_departure
         ))
     
     return house_stats
 
 
+@router.get("/house-stats", response_model=List[HouseStats])
+@query_budget(4)
+@etag_tables(CheckIn, MaintenanceIssue, FinancialOperation, House)
+async def get_house_statistics(
+    allResidences: bool = Query(False, description=ALL_RESIDENCES_DESCRIPTION),
+    db: AsyncSession = Depends(get_analytics_db),
+    refs: ReferenceData = Depends(get_reference_data),
+    # current_user = Depends(get_current_user)
+):
+    """
+    Get detailed statistics for all houses.
+    
+    Args:
+        allResidences: List the houses of every residence database
+        db: Database session
+        refs: Reference data of the residence
+        
+    Returns:
+        List of house statistics
+    """
+    if not allResidences:
+        return await compute_house_statistics(db, refs)
+    return [stats for part in await fan_out(compute_house_statistics, with_reference_data=True) for stats in part]
+
+
+async def compute_period_totals(
+    db: AsyncSession, refs: ReferenceData, year: int, month: Optional[int], quarter: Optional[int]
+) -> Dict[str, float]:
+    """
+    Sum the figures of a period in one residence database.
+    
+    Args:
+        db: Database session
+        refs: Reference data of the residence
+        year: The year
+        month: Optional month (1-12)
+        quarter: Optional quarter (1-4), instead of a month
+        
+    Returns:
+        Revenue, expenses, guests, occupied days and houses of the residence
+        
+    Raises:
+        ValueError: If the period is invalid
+    """
+    # Build query filters (plain date ranges, so the date indexes are used)
+    start, _ = period_bounds(year, month, quarter)
+    Operation = await financial_operations_source(db, start)
+    date_filters = period_filter(Operation.date, year, month, quarter)
+    
+    # Calculate revenue and expenses
+    revenue_query = select(func.sum(Operation.montant)).where(
+        and_(*date_filters),
+        Operation.type == "entree"
+    )
+    
+    expenses_query = select(func.sum(Operation.montant)).where(
+        and_(*date_filters),
+        Operation.type == "sortie"
+    )
+    
+    # Calculate guest count and occupied days
+    checkin_filters = period_filter(CheckIn.arrival_date, year, month, quarter)
+    
+    guest_count = await db.scalar(select(func.count()).select_from(CheckIn).where(and_(*checkin_filters)))
+    
+    actual_occupancy_days = await db.scalar(select(func.sum(
+        func.julianday(CheckIn.departure_date) - func.julianday(CheckIn.arrival_date)
+    )).where(and_(*checkin_filters))) or 0
+    
+    return {
+        "revenue": await db.scalar(revenue_query) or 0,
+        "expenses": await db.scalar(expenses_query) or 0,
+        "guests": guest_count,
+        "occupancyDays": actual_occupancy_days,
+        "houses": len(await refs.houses.rows()),
+    }
+
+
 @router.get("/period-stats", response_model=PeriodStats)
+@query_budget(5)
+@etag_tables(CheckIn, FinancialOperation, House)
 async def get_period_statistics(
     year: int = Query(...),
-    month: Optional[int] = Query(None),
-    db: Session = Depends(get_db),
+    month: Optional[int] = Query(None, ge=1, le=12),
+    quarter: Optional[int] = Query(None, ge=1, le=4),
+    allResidences: bool = Query(False, description=ALL_RESIDENCES_DESCRIPTION),
+    db: AsyncSession = Depends(get_analytics_db),
+    refs: ReferenceData = Depends(get_reference_data),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -334,71 +522,52 @@ async def get_period_statistics(
     Args:
         year: The year
         month: Optional month (1-12)
+        quarter: Optional quarter (1-4), instead of a month
+        allResidences: Compute the statistics over every residence database
         db: Database session
+        refs: Reference data of the residence
         
     Returns:
         Period statistics
     """
     try:
-        # Build query filters
-        date_filters = [extract('year', FinancialOperation.date) == year]
         period = str(year)
         
         if month:
-            date_filters.append(extract('month', FinancialOperation.date) == month)
             period = f"{year}-{month:02d}"
+        elif quarter:
+            period = f"{year}-Q{quarter}"
         
-        # Calculate revenue and expenses
-        revenue_query = db.query(func.sum(FinancialOperation.montant)).filter(
-            and_(*date_filters),
-            FinancialOperation.type == "entree"
-        )
-        
-        expenses_query = db.query(func.sum(FinancialOperation.montant)).filter(
-            and_(*date_filters),
-            FinancialOperation.type == "sortie"
-        )
-        
-        total_revenue = revenue_query.scalar() or 0
-        total_expenses = expenses_query.scalar() or 0
-        net_profit = total_revenue - total_expenses
-        
-        # Calculate guest count and average stay value
-        checkin_filters = [extract('year', CheckIn.arrival_date) == year]
-        if month:
-            checkin_filters.append(extract('month', CheckIn.arrival_date) == month)
-        
-        guest_count = db.query(CheckIn).filter(and_(*checkin_filters)).count()
+        # Residences add up their raw totals, the rates are derived from the sums
+        if allResidences:
+            parts = await fan_out(compute_period_totals, year, month, quarter, with_reference_data=True)
+            totals = {key: sum(part[key] for part in parts) for key in parts[0]}
+        else:
+            totals = await compute_period_totals(db, refs, year, month, quarter)
         
+        total_revenue = totals["revenue"]
+        net_profit = total_revenue - totals["expenses"]
+        guest_count = totals["guests"]
         avg_stay_value = (total_revenue / guest_count) if guest_count > 0 else 0
         
         # Calculate occupancy rate (simplified)
-        if month:
-            # Days in the specific month
-            import calendar
-            days_in_period = calendar.monthrange(year, month)[1]
-        else:
-            # Days in the year
-            days_in_period = 366 if year % 4 == 0 else 365
-        
-        total_houses = db.query(House).count()
-        max_possible_occupancy_days = total_houses * days_in_period
+        start, end = period_bounds(year, month, quarter)
+        days_in_period = (end - start).days
+        max_possible_occupancy_days = totals["houses"] * days_in_period
         
-        actual_occupancy_days = db.query(func.sum(
-            func.julianday(CheckIn.departure_date) - func.julianday(CheckIn.arrival_date)
-        )).filter(and_(*checkin_filters)).scalar() or 0
-        
-        occupancy_rate = (actual_occupancy_days / max_possible_occupancy_days * 100) if max_possible_occupancy_days > 0 else 0
+        occupancy_rate = (totals["occupancyDays"] / max_possible_occupancy_days * 100) if max_possible_occupancy_days > 0 else 0
         
         return PeriodStats(
             period=period,
             totalRevenue=float(total_revenue),
-            totalExpenses=float(total_expenses),
+            totalExpenses=float(totals["expenses"]),
             netProfit=float(net_profit),
             occupancyRate=min(100.0, occupancy_rate),
             guestCount=guest_count,
             averageStayValue=float(avg_stay_value)
         )
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid period: {str(e)}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error calculating period stats: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error calculating period stats: {str(e)}")
@@ -1,10 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import extract, func
-from typing import List, Optional
+from sqlalchemy import extract, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Tuple, Union
 from datetime import datetime, date
 
-from app.core.database import get_db
+from app.core.database import get_async_db, get_read_db
+from app.core.query_stats import query_budget
+from app.core.table_versions import etag_tables
+from app.core.projections import response_columns, sparse_response
+from app.core import statements
+from app.core.archive import FINANCIAL_OPERATION_HISTORY_BY_ID, financial_operations_source
+from app.core.config import settings
+from app.core.replica import get_analytics_db
 from app.models.finance import FinancialOperation
 from app.schemas.finance import (
     FinancialOperationCreate, 
@@ -14,19 +21,30 @@ from app.schemas.finance import (
     FinancialFilters,
     MonthlyRevenue
 )
+from app.schemas.pagination import Page
 from app.utils.dependencies import get_current_user
+from app.utils.fields import SparseFields
+from app.utils.pagination import Keyset, Pagination
+from app.utils.periods import period_bounds, period_filter
 
 router = APIRouter()
 
 
-@router.get("/", response_model=List[FinancialOperationResponse])
+@router.get("/", response_model=Union[List[FinancialOperationResponse], Page[FinancialOperationResponse]])
+@query_budget(2)
+@etag_tables(FinancialOperation)
 async def get_financial_operations(
     houseId: Optional[str] = Query(None, alias="maison"),
     type: Optional[str] = Query(None),
     origine: Optional[str] = Query(None),
-    month: Optional[int] = Query(None),
+    month: Optional[int] = Query(None, ge=1, le=12),
     year: Optional[int] = Query(None),
-    db: Session = Depends(get_db),
+    quarter: Optional[int] = Query(None, ge=1, le=4),
+    dateFrom: Optional[date] = Query(None),
+    dateTo: Optional[date] = Query(None),
+    page: Pagination = Depends(),
+    fields: Optional[Tuple[str, ...]] = Depends(SparseFields(FinancialOperationResponse)),
+    db: AsyncSession = Depends(get_read_db),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -38,51 +56,48 @@ async def get_financial_operations(
         origine: Filter by origin ('reservation', 'maintenance', 'checkin', 'manuel')
         month: Filter by month (1-12)
         year: Filter by year
+        quarter: Filter by quarter (1-4) of the year
+        dateFrom: First date included (YYYY-MM-DD)
+        dateTo: Last date included (YYYY-MM-DD)
+        page: limit / cursor of the page (the whole list without them)
+        fields: Fields to return (all of them without ?fields=)
         db: Database session
         
     Returns:
-        List of financial operations in frontend format
+        List of financial operations in frontend format, or one page of them
     """
-    query = db.query(FinancialOperation)
+    try:
+        start, _ = period_bounds(year, month, quarter, dateFrom, dateTo)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Archived years are only read when the period reaches them
+    Operation = await financial_operations_source(db, start)
+    # Only the response columns (or those of ?fields=); the rows are mapped onto the schema
+    query = select(*response_columns(FinancialOperationResponse, Operation, fields))
     
     if houseId:
-        query = query.filter(FinancialOperation.house_id == houseId)
+        query = query.where(Operation.house_id == houseId)
     if type:
-        query = query.filter(FinancialOperation.type == type)
+        query = query.where(Operation.type == type)
     if origine:
-        query = query.filter(FinancialOperation.origine == origine)
-    if month:
-        query = query.filter(extract('month', FinancialOperation.date) == month)
-    if year:
-        query = query.filter(extract('year', FinancialOperation.date) == year)
-    
-    operations = query.order_by(FinancialOperation.date.desc()).all()
-    
-    # Convert to frontend format
-    response_data = []
-    for op in operations:
-        response_data.append(FinancialOperationResponse(
-            id=op.id,
-            date=op.date.strftime("%Y-%m-%d"),
-            maison=op.house_id,
-            type=op.type,
-            motif=op.motif,
-            montant=op.montant,
-            origine=op.origine,
-            pieceJointe=op.piece_jointe,
-            editable=op.editable,
-            reservationId=op.reservation_id,
-            checkinId=op.checkin_id,
-            maintenanceId=op.maintenance_id
-        ))
-    
-    return response_data
+        query = query.where(Operation.origine == origine)
+    try:
+        query = query.where(*period_filter(Operation.date, year, month, quarter, dateFrom, dateTo))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Newest first, also the key of the pages
+    rows = await page.fetch(db, query, Keyset(Operation.date, Operation.id))
+    return sparse_response(FinancialOperationResponse, fields, rows)
 
 
 @router.get("/{operation_id}", response_model=FinancialOperationResponse)
+@query_budget(2)
+@etag_tables(FinancialOperation)
 async def get_financial_operation(
     operation_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -98,31 +113,22 @@ async def get_financial_operation(
     Raises:
         HTTPException: If operation not found
     """
-    operation = db.query(FinancialOperation).filter(FinancialOperation.id == operation_id).first()
+    operation = await db.scalar(statements.FINANCIAL_OPERATION_BY_ID, {"id": operation_id})
+    
+    if not operation and settings.ARCHIVE_ENABLED:
+        operation = await db.scalar(FINANCIAL_OPERATION_HISTORY_BY_ID, {"id": operation_id})
     
     if not operation:
         raise HTTPException(status_code=404, detail="Financial operation not found")
     
-    return FinancialOperationResponse(
-        id=operation.id,
-        date=operation.date.strftime("%Y-%m-%d"),
-        maison=operation.house_id,
-        type=operation.type,
-        motif=operation.motif,
-        montant=operation.montant,
-        origine=operation.origine,
-        pieceJointe=operation.piece_jointe,
-        editable=operation.editable,
-        reservationId=operation.reservation_id,
-        checkinId=operation.checkin_id,
-        maintenanceId=operation.maintenance_id
-    )
+    return FinancialOperationResponse.model_validate(operation)
 
 
 @router.post("/", response_model=FinancialOperationResponse)
+@query_budget(3)
 async def create_financial_operation(
     operation_data: FinancialOperationCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -158,36 +164,24 @@ async def create_financial_operation(
         )
         
         db.add(operation)
-        db.commit()
-        db.refresh(operation)
+        await db.commit()
+        await db.refresh(operation)
         
-        return FinancialOperationResponse(
-            id=operation.id,
-            date=operation.date.strftime("%Y-%m-%d"),
-            maison=operation.house_id,
-            type=operation.type,
-            motif=operation.motif,
-            montant=operation.montant,
-            origine=operation.origine,
-            pieceJointe=operation.piece_jointe,
-            editable=operation.editable,
-            reservationId=operation.reservation_id,
-            checkinId=operation.checkin_id,
-            maintenanceId=operation.maintenance_id
-        )
+        return FinancialOperationResponse.model_validate(operation)
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid date format: {str(e)}")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error creating financial operation: {str(e)}")
 
 
 @router.put("/{operation_id}", response_model=FinancialOperationResponse)
+@query_budget(4)
 async def update_financial_operation(
     operation_id: str,
     operation_data: FinancialOperationUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -206,7 +200,7 @@ async def update_financial_operation(
     Raises:
         HTTPException: If operation not found, not editable, or update fails
     """
-    operation = db.query(FinancialOperation).filter(FinancialOperation.id == operation_id).first()
+    operation = await db.scalar(statements.FINANCIAL_OPERATION_BY_ID, {"id": operation_id})
     
     if not operation:
         raise HTTPException(status_code=404, detail="Financial operation not found")
@@ -233,35 +227,23 @@ async def update_financial_operation(
         if operation_data.editable is not None:
             operation.editable = operation_data.editable
         
-        db.commit()
-        db.refresh(operation)
+        await db.commit()
+        await db.refresh(operation)
         
-        return FinancialOperationResponse(
-            id=operation.id,
-            date=operation.date.strftime("%Y-%m-%d"),
-            maison=operation.house_id,
-            type=operation.type,
-            motif=operation.motif,
-            montant=operation.montant,
-            origine=operation.origine,
-            pieceJointe=operation.piece_jointe,
-            editable=operation.editable,
-            reservationId=operation.reservation_id,
-            checkinId=operation.checkin_id,
-            maintenanceId=operation.maintenance_id
-        )
+        return FinancialOperationResponse.model_validate(operation)
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid date format: {str(e)}")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error updating financial operation: {str(e)}")
 
 
 @router.delete("/{operation_id}")
+@query_budget(4)
 async def delete_financial_operation(
     operation_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -279,7 +261,7 @@ async def delete_financial_operation(
     Raises:
         HTTPException: If operation not found, not editable, or deletion fails
     """
-    operation = db.query(FinancialOperation).filter(FinancialOperation.id == operation_id).first()
+    operation = await db.scalar(statements.FINANCIAL_OPERATION_BY_ID, {"id": operation_id})
     
     if not operation:
         raise HTTPException(status_code=404, detail="Financial operation not found")
@@ -288,22 +270,25 @@ async def delete_financial_operation(
         raise HTTPException(status_code=403, detail="This financial operation cannot be deleted")
     
     try:
-        db.delete(operation)
-        db.commit()
+        await db.delete(operation)
+        await db.commit()
         
         return {"message": "Financial operation deleted successfully"}
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error deleting financial operation: {str(e)}")
 
 
 @router.get("/summary/{house_id}", response_model=FinancialSummary)
+@query_budget(2)
+@etag_tables(FinancialOperation)
 async def get_financial_summary(
     house_id: str,
-    month: Optional[int] = Query(None),
+    month: Optional[int] = Query(None, ge=1, le=12),
     year: Optional[int] = Query(None),
-    db: Session = Depends(get_db),
+    quarter: Optional[int] = Query(None, ge=1, le=4),
+    db: AsyncSession = Depends(get_analytics_db),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -313,19 +298,26 @@ async def get_financial_summary(
         house_id: The house ID
         month: Optional month filter (1-12)
         year: Optional year filter
-        db: Database session
+        quarter: Optional quarter filter (1-4), requires a year
+        db: Analytics session (the in-memory replica when enabled)
         
     Returns:
         Financial summary with totals and balance
     """
-    query = db.query(FinancialOperation).filter(FinancialOperation.house_id == house_id)
+    try:
+        start, _ = period_bounds(year, month, quarter)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    Operation = await financial_operations_source(db, start)
+    query = select(Operation).where(Operation.house_id == house_id)
     
-    if month:
-        query = query.filter(extract('month', FinancialOperation.date) == month)
-    if year:
-        query = query.filter(extract('year', FinancialOperation.date) == year)
+    try:
+        query = query.where(*period_filter(Operation.date, year, month, quarter))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    operations = query.all()
+    operations = (await db.scalars(query)).all()
     
     total_entrees = sum([op.montant for op in operations if op.type == "entree"])
     total_sorties = sum([op.montant for op in operations if op.type == "sortie"])
@@ -334,6 +326,8 @@ async def get_financial_summary(
     period = None
     if year and month:
         period = f"{year}-{month:02d}"
+    elif year and quarter:
+        period = f"{year}-Q{quarter}"
     elif year:
         period = str(year)
     
@@ -347,10 +341,12 @@ async def get_financial_summary(
 
 
 @router.get("/revenue/monthly", response_model=List[MonthlyRevenue])
+@query_budget(2)
+@etag_tables(FinancialOperation)
 async def get_monthly_revenue(
     year: int = Query(...),
     houseId: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -364,18 +360,19 @@ async def get_monthly_revenue(
     Returns:
         List of monthly revenue data points
     """
-    query = db.query(
-        extract('month', FinancialOperation.date).label('month'),
-        func.sum(FinancialOperation.montant).label('revenue')
-    ).filter(
-        extract('year', FinancialOperation.date) == year,
-        FinancialOperation.type == "entree"
+    Operation = await financial_operations_source(db, date(year, 1, 1))
+    query = select(
+        extract('month', Operation.date).label('month'),
+        func.sum(Operation.montant).label('revenue')
+    ).where(
+        *period_filter(Operation.date, year),
+        Operation.type == "entree"
     )
     
     if houseId:
-        query = query.filter(FinancialOperation.house_id == houseId)
+        query = query.where(Operation.house_id == houseId)
     
-    monthly_data = query.group_by(extract('month', FinancialOperation.date)).all()
+    monthly_data = (await db.execute(query.group_by(extract('month', Operation.date)))).all()
     
     # Create complete 12-month data (fill missing months with 0)
     revenue_by_month = {str(month).zfill(2): 0.0 for month in range(1, 13)}
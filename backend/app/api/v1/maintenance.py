@@ -1,9 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Tuple, Union
 from datetime import datetime, date
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_async_db, get_read_db
+from app.core.query_stats import query_budget
+from app.core.idempotency import idempotent
+from app.core.table_versions import etag_tables
+from app.core.projections import response_columns, sparse_response
+from app.core.reference_data import ReferenceData, get_reference_data
+from app.core import statements
 from app.models.maintenance import MaintenanceIssue, MaintenanceType
 from app.models.finance import FinancialOperation
 from app.schemas.maintenance import (
@@ -14,31 +22,46 @@ from app.schemas.maintenance import (
     MaintenanceFilters,
     MaintenanceStats
 )
+from app.schemas.pagination import Page
 from app.utils.dependencies import get_current_user
+from app.utils.fields import SparseFields
+from app.utils.pagination import Keyset, Pagination
 
 router = APIRouter()
 
+# List order (newest first), also the key of its pages
+MAINTENANCE_ISSUE_KEYSET = Keyset(MaintenanceIssue.reported_at, MaintenanceIssue.id)
+
 
 @router.get("/types", response_model=List[MaintenanceTypeResponse])
+@query_budget(0)
+@etag_tables(MaintenanceType, max_age=settings.REFERENCE_CACHE_MAX_AGE)
 async def get_maintenance_types(
-    db: Session = Depends(get_db)
+    refs: ReferenceData = Depends(get_reference_data)
 ):
     """
     Get all maintenance types.
     
+    Args:
+        refs: Reference data of the residence
+        
     Returns:
         List of available maintenance types (electricite, plomberie, etc.)
     """
-    types = db.query(MaintenanceType).all()
+    types = await refs.maintenance_types.rows()
     return [MaintenanceTypeResponse(id=t.id, name=t.label) for t in types]
 
 
-@router.get("/", response_model=List[MaintenanceIssueResponse])
+@router.get("/", response_model=Union[List[MaintenanceIssueResponse], Page[MaintenanceIssueResponse]])
+@query_budget(1)
+@etag_tables(MaintenanceIssue)
 async def get_maintenance_issues(
     houseId: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
     assignedTo: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    page: Pagination = Depends(),
+    fields: Optional[Tuple[str, ...]] = Depends(SparseFields(MaintenanceIssueResponse)),
+    db: AsyncSession = Depends(get_read_db),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -48,45 +71,32 @@ async def get_maintenance_issues(
         houseId: Filter by house ID
         status: Filter by status ('resolue', 'non-resolue')
         assignedTo: Filter by assigned person
+        page: limit / cursor of the page (the whole list without them)
+        fields: Fields to return (all of them without ?fields=)
         db: Database session
         
     Returns:
-        List of maintenance issues in frontend format
+        List of maintenance issues in frontend format, or one page of them
     """
-    query = db.query(MaintenanceIssue)
+    # Only the response columns (or those of ?fields=); the rows are mapped onto the schema
+    query = select(*response_columns(MaintenanceIssueResponse, MaintenanceIssue, fields))
     
     if houseId:
-        query = query.filter(MaintenanceIssue.house_id == houseId)
+        query = query.where(MaintenanceIssue.house_id == houseId)
     if status:
-        query = query.filter(MaintenanceIssue.status == status)
+        query = query.where(MaintenanceIssue.status == status)
     if assignedTo:
-        query = query.filter(MaintenanceIssue.assigned_to.ilike(f"%{assignedTo}%"))
-    
-    issues = query.order_by(MaintenanceIssue.reported_at.desc()).all()
+        query = query.where(MaintenanceIssue.assigned_to.ilike(f"%{assignedTo}%"))
     
-    # Convert to frontend format
-    response_data = []
-    for issue in issues:
-        response_data.append(MaintenanceIssueResponse(
-            id=issue.id,
-            maison=issue.house_id,
-            typePanne=issue.issue_type,
-            dateDeclaration=issue.reported_at.strftime("%Y-%m-%d"),
-            assigne=issue.assigned_to,
-            commentaire=issue.comment or "",
-            statut=issue.status,
-            photoPanne=issue.photo_issue_url,
-            photoFacture=issue.photo_invoice_url,
-            prixMainOeuvre=issue.labor_cost
-        ))
-    
-    return response_data
+    return sparse_response(MaintenanceIssueResponse, fields, await page.fetch(db, query, MAINTENANCE_ISSUE_KEYSET))
 
 
 @router.get("/{issue_id}", response_model=MaintenanceIssueResponse)
+@query_budget(1)
+@etag_tables(MaintenanceIssue)
 async def get_maintenance_issue(
     issue_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -102,29 +112,20 @@ async def get_maintenance_issue(
     Raises:
         HTTPException: If issue not found
     """
-    issue = db.query(MaintenanceIssue).filter(MaintenanceIssue.id == issue_id).first()
+    issue = await db.scalar(statements.MAINTENANCE_ISSUE_BY_ID, {"id": issue_id})
     
     if not issue:
         raise HTTPException(status_code=404, detail="Maintenance issue not found")
     
-    return MaintenanceIssueResponse(
-        id=issue.id,
-        maison=issue.house_id,
-        typePanne=issue.issue_type,
-        dateDeclaration=issue.reported_at.strftime("%Y-%m-%d"),
-        assigne=issue.assigned_to,
-        commentaire=issue.comment or "",
-        statut=issue.status,
-        photoPanne=issue.photo_issue_url,
-        photoFacture=issue.photo_invoice_url,
-        prixMainOeuvre=issue.labor_cost
-    )
+    return MaintenanceIssueResponse.model_validate(issue)
 
 
 @router.post("/", response_model=MaintenanceIssueResponse)
+@query_budget(3)
+@idempotent
 async def create_maintenance_issue(
     issue_data: MaintenanceIssueCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -158,34 +159,24 @@ async def create_maintenance_issue(
         )
         
         db.add(issue)
-        db.commit()
-        db.refresh(issue)
+        await db.commit()
+        await db.refresh(issue)
         
-        return MaintenanceIssueResponse(
-            id=issue.id,
-            maison=issue.house_id,
-            typePanne=issue.issue_type,
-            dateDeclaration=issue.reported_at.strftime("%Y-%m-%d"),
-            assigne=issue.assigned_to,
-            commentaire=issue.comment or "",
-            statut=issue.status,
-            photoPanne=issue.photo_issue_url,
-            photoFacture=issue.photo_invoice_url,
-            prixMainOeuvre=issue.labor_cost
-        )
+        return MaintenanceIssueResponse.model_validate(issue)
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid date format: {str(e)}")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error creating maintenance issue: {str(e)}")
 
 
 @router.put("/{issue_id}", response_model=MaintenanceIssueResponse)
+@query_budget(5)
 async def update_maintenance_issue(
     issue_id: str,
     issue_data: MaintenanceIssueUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -204,7 +195,7 @@ async def update_maintenance_issue(
     Raises:
         HTTPException: If issue not found or update fails
     """
-    issue = db.query(MaintenanceIssue).filter(MaintenanceIssue.id == issue_id).first()
+    issue = await db.scalar(statements.MAINTENANCE_ISSUE_BY_ID, {"id": issue_id})
     
     if not issue:
         raise HTTPException(status_code=404, detail="Maintenance issue not found")
@@ -250,33 +241,23 @@ async def update_maintenance_issue(
             
             db.add(financial_operation)
         
-        db.commit()
-        db.refresh(issue)
+        await db.commit()
+        await db.refresh(issue)
         
-        return MaintenanceIssueResponse(
-            id=issue.id,
-            maison=issue.house_id,
-            typePanne=issue.issue_type,
-            dateDeclaration=issue.reported_at.strftime("%Y-%m-%d"),
-            assigne=issue.assigned_to,
-            commentaire=issue.comment or "",
-            statut=issue.status,
-            photoPanne=issue.photo_issue_url,
-            photoFacture=issue.photo_invoice_url,
-            prixMainOeuvre=issue.labor_cost
-        )
+        return MaintenanceIssueResponse.model_validate(issue)
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid date format: {str(e)}")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error updating maintenance issue: {str(e)}")
 
 
 @router.delete("/{issue_id}")
+@query_budget(8)
 async def delete_maintenance_issue(
     issue_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -294,35 +275,35 @@ async def delete_maintenance_issue(
     Raises:
         HTTPException: If issue not found or deletion fails
     """
-    issue = db.query(MaintenanceIssue).filter(MaintenanceIssue.id == issue_id).first()
+    issue = await db.scalar(statements.MAINTENANCE_ISSUE_BY_ID, {"id": issue_id})
     
     if not issue:
         raise HTTPException(status_code=404, detail="Maintenance issue not found")
     
     try:
         # Delete corresponding financial transactions
-        financial_ops = db.query(FinancialOperation).filter(
-            FinancialOperation.maintenance_id == issue_id
-        ).all()
+        financial_ops = (await db.scalars(statements.FINANCIAL_OPERATIONS_OF_MAINTENANCE, {"maintenance_id": issue_id})).all()
         
         for op in financial_ops:
-            db.delete(op)
+            await db.delete(op)
         
         # Delete the maintenance issue
-        db.delete(issue)
-        db.commit()
+        await db.delete(issue)
+        await db.commit()
         
         return {"message": "Maintenance issue deleted successfully"}
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error deleting maintenance issue: {str(e)}")
 
 
 @router.get("/stats/summary", response_model=MaintenanceStats)
+@query_budget(1)
+@etag_tables(MaintenanceIssue)
 async def get_maintenance_stats(
     houseId: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -335,12 +316,12 @@ async def get_maintenance_stats(
     Returns:
         Maintenance statistics summary
     """
-    query = db.query(MaintenanceIssue)
+    query = select(MaintenanceIssue)
     
     if houseId:
-        query = query.filter(MaintenanceIssue.house_id == houseId)
+        query = query.where(MaintenanceIssue.house_id == houseId)
     
-    issues = query.all()
+    issues = (await db.scalars(query)).all()
     
     total = len(issues)
     resolue = len([i for i in issues if i.status == "resolue"])
@@ -1,9 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Tuple, Union
 from datetime import datetime, date
 
-from app.core.database import get_db
+from app.core.database import get_async_db, get_read_db
+from app.core.query_stats import query_budget
+from app.core.idempotency import idempotent
+from app.core.table_versions import etag_tables
+from app.core.projections import response_columns, sparse_response
+from app.core import statements
+from app.core.write_queue import get_writer
 from app.models.reservation import Reservation
 from app.models.finance import FinancialOperation
 from app.schemas.reservation import (
@@ -11,15 +19,25 @@ from app.schemas.reservation import (
     ReservationUpdate, 
     ReservationResponse
 )
+from app.schemas.pagination import Page
 from app.utils.dependencies import get_current_user
+from app.utils.fields import SparseFields
+from app.utils.pagination import Keyset, Pagination
 
 router = APIRouter()
 
+# List order (newest first), also the key of its pages
+RESERVATION_KEYSET = Keyset(Reservation.checkin_date, Reservation.id)
 
-@router.get("/", response_model=List[ReservationResponse])
+
+@router.get("/", response_model=Union[List[ReservationResponse], Page[ReservationResponse]])
+@query_budget(1)
+@etag_tables(Reservation)
 async def get_reservations(
     house_id: Optional[str] = Query(None, alias="maison"),
-    db: Session = Depends(get_db),
+    page: Pagination = Depends(),
+    fields: Optional[Tuple[str, ...]] = Depends(SparseFields(ReservationResponse)),
+    db: AsyncSession = Depends(get_read_db),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -27,39 +45,28 @@ async def get_reservations(
     
     Args:
         house_id: Optional house ID to filter reservations
+        page: limit / cursor of the page (the whole list without them)
+        fields: Fields to return (all of them without ?fields=)
         db: Database session
         
     Returns:
-        List of reservations matching the frontend response format
+        List of reservations matching the frontend response format, or one page of them
     """
-    query = db.query(Reservation)
+    # Only the response columns (or those of ?fields=); the rows are mapped onto the schema
+    query = select(*response_columns(ReservationResponse, Reservation, fields))
     
     if house_id:
-        query = query.filter(Reservation.house_id == house_id)
-    
-    reservations = query.order_by(Reservation.checkin_date.desc()).all()
-    
-    # Convert database objects to frontend response format
-    response_data = []
-    for reservation in reservations:
-        response_data.append(ReservationResponse(
-            id=reservation.id,
-            maison=reservation.house_id,
-            nom=reservation.guest_name,
-            telephone=reservation.phone or "",
-            email=reservation.email or "",
-            checkin=reservation.checkin_date.strftime("%Y-%m-%d"),
-            checkout=reservation.checkout_date.strftime("%Y-%m-%d"),
-            montantAvance=reservation.advance_paid
-        ))
+        query = query.where(Reservation.house_id == house_id)
     
-    return response_data
+    return sparse_response(ReservationResponse, fields, await page.fetch(db, query, RESERVATION_KEYSET))
 
 
 @router.get("/{reservation_id}", response_model=ReservationResponse)
+@query_budget(1)
+@etag_tables(Reservation)
 async def get_reservation(
     reservation_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -75,37 +82,31 @@ async def get_reservation(
     Raises:
         HTTPException: If reservation not found
     """
-    reservation = db.query(Reservation).filter(Reservation.id == reservation_id).first()
+    reservation = await db.scalar(statements.RESERVATION_BY_ID, {"id": reservation_id})
     
     if not reservation:
         raise HTTPException(status_code=404, detail="Reservation not found")
     
-    return ReservationResponse(
-        id=reservation.id,
-        maison=reservation.house_id,
-        nom=reservation.guest_name,
-        telephone=reservation.phone or "",
-        email=reservation.email or "",
-        checkin=reservation.checkin_date.strftime("%Y-%m-%d"),
-        checkout=reservation.checkout_date.strftime("%Y-%m-%d"),
-        montantAvance=reservation.advance_paid
-    )
+    return ReservationResponse.model_validate(reservation)
 
 
 @router.post("/", response_model=ReservationResponse)
+@query_budget(6)
+@idempotent
 async def create_reservation(
     reservation_data: ReservationCreate,
-    db: Session = Depends(get_db),
+    writer = Depends(get_writer),
     # current_user = Depends(get_current_user)
 ):
     """
     Create a new reservation.
     
     Automatically creates a corresponding financial transaction for the advance payment.
+    Both rows are written in one unit of work through the single-writer queue.
     
     Args:
         reservation_data: Reservation creation data
-        db: Database session
+        writer: Write queue (or inline session writer) committing the unit of work
         
     Returns:
         Created reservation in frontend format
@@ -131,60 +132,54 @@ async def create_reservation(
                 detail="Check-in date cannot be in the past"
             )
         
-        # Create reservation
-        reservation = Reservation(
-            house_id=reservation_data.maison,
-            guest_name=reservation_data.nom,
-            phone=reservation_data.telephone,
-            email=reservation_data.email,
-            checkin_date=checkin_date,
-            checkout_date=checkout_date,
-            advance_paid=reservation_data.montantAvance
-        )
-        
-        db.add(reservation)
-        db.commit()
-        db.refresh(reservation)
-        
-        # Create financial transaction for advance payment if amount > 0
-        if reservation_data.montantAvance > 0:
-            financial_operation = FinancialOperation(
-                date=checkin_date,
+        def create(db: Session) -> Reservation:
+            # Create reservation
+            reservation = Reservation(
                 house_id=reservation_data.maison,
-                type="entree",
-                motif=f"Avance réservation - {reservation_data.nom}",
-                montant=reservation_data.montantAvance,
-                origine="reservation",
-                editable=False,
-                reservation_id=reservation.id
+                guest_name=reservation_data.nom,
+                phone=reservation_data.telephone,
+                email=reservation_data.email,
+                checkin_date=checkin_date,
+                checkout_date=checkout_date,
+                advance_paid=reservation_data.montantAvance
             )
             
-            db.add(financial_operation)
-            db.commit()
+            db.add(reservation)
+            db.flush()
+            
+            # Create financial transaction for advance payment if amount > 0
+            if reservation_data.montantAvance > 0:
+                financial_operation = FinancialOperation(
+                    date=checkin_date,
+                    house_id=reservation_data.maison,
+                    type="entree",
+                    motif=f"Avance réservation - {reservation_data.nom}",
+                    montant=reservation_data.montantAvance,
+                    origine="reservation",
+                    editable=False,
+                    reservation_id=reservation.id
+                )
+                
+                db.add(financial_operation)
+            
+            return reservation
+        
+        reservation = await writer.run(create)
         
-        return ReservationResponse(
-            id=reservation.id,
-            maison=reservation.house_id,
-            nom=reservation.guest_name,
-            telephone=reservation.phone or "",
-            email=reservation.email or "",
-            checkin=reservation.checkin_date.strftime("%Y-%m-%d"),
-            checkout=reservation.checkout_date.strftime("%Y-%m-%d"),
-            montantAvance=reservation.advance_paid
-        )
+        return ReservationResponse.model_validate(reservation)
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid date format: {str(e)}")
     except Exception as e:
-        db.rollback()
         raise HTTPException(status_code=500, detail=f"Error creating reservation: {str(e)}")
 
 
 @router.put("/{reservation_id}", response_model=ReservationResponse)
+@query_budget(6)
 async def update_reservation(
     reservation_id: str,
     reservation_data: ReservationUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -203,7 +198,7 @@ async def update_reservation(
     Raises:
         HTTPException: If reservation not found or update fails
     """
-    reservation = db.query(Reservation).filter(Reservation.id == reservation_id).first()
+    reservation = await db.scalar(statements.RESERVATION_BY_ID, {"id": reservation_id})
     
     if not reservation:
         raise HTTPException(status_code=404, detail="Reservation not found")
@@ -232,10 +227,9 @@ async def update_reservation(
             reservation.advance_paid = reservation_data.montantAvance
             
             # Update corresponding financial transaction
-            financial_op = db.query(FinancialOperation).filter(
-                FinancialOperation.reservation_id == reservation_id,
-                FinancialOperation.origine == "reservation"
-            ).first()
+            financial_op = await db.scalar(statements.FINANCIAL_OPERATION_BY_RESERVATION, {
+                "reservation_id": reservation_id, "origine": "reservation"
+            })
             
             if financial_op:
                 financial_op.montant = reservation_data.montantAvance
@@ -262,31 +256,23 @@ async def update_reservation(
                 detail="Check-in date must be before check-out date"
             )
         
-        db.commit()
-        db.refresh(reservation)
+        await db.commit()
+        await db.refresh(reservation)
         
-        return ReservationResponse(
-            id=reservation.id,
-            maison=reservation.house_id,
-            nom=reservation.guest_name,
-            telephone=reservation.phone or "",
-            email=reservation.email or "",
-            checkin=reservation.checkin_date.strftime("%Y-%m-%d"),
-            checkout=reservation.checkout_date.strftime("%Y-%m-%d"),
-            montantAvance=reservation.advance_paid
-        )
+        return ReservationResponse.model_validate(reservation)
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid date format: {str(e)}")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error updating reservation: {str(e)}")
 
 
 @router.delete("/{reservation_id}")
+@query_budget(9)
 async def delete_reservation(
     reservation_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -304,37 +290,37 @@ async def delete_reservation(
     Raises:
         HTTPException: If reservation not found or deletion fails
     """
-    reservation = db.query(Reservation).filter(Reservation.id == reservation_id).first()
+    reservation = await db.scalar(statements.RESERVATION_BY_ID, {"id": reservation_id})
     
     if not reservation:
         raise HTTPException(status_code=404, detail="Reservation not found")
     
     try:
         # Delete corresponding financial transactions
-        financial_ops = db.query(FinancialOperation).filter(
-            FinancialOperation.reservation_id == reservation_id
-        ).all()
+        financial_ops = (await db.scalars(statements.FINANCIAL_OPERATIONS_OF_RESERVATION, {"reservation_id": reservation_id})).all()
         
         for op in financial_ops:
-            db.delete(op)
+            await db.delete(op)
         
         # Delete the reservation
-        db.delete(reservation)
-        db.commit()
+        await db.delete(reservation)
+        await db.commit()
         
         return {"message": "Reservation deleted successfully"}
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error deleting reservation: {str(e)}")
 
 
 @router.get("/{reservation_id}/availability")
+@query_budget(2)
+@etag_tables(Reservation)
 async def check_availability(
     reservation_id: str,
     checkin: str = Query(...),
     checkout: str = Query(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     # current_user = Depends(get_current_user)
 ):
     """
@@ -354,20 +340,18 @@ async def check_availability(
         checkout_date = datetime.strptime(checkout, "%Y-%m-%d").date()
         
         # Get the current reservation to know which house to check
-        current_reservation = db.query(Reservation).filter(
-            Reservation.id == reservation_id
-        ).first()
+        current_reservation = await db.scalar(statements.RESERVATION_BY_ID, {"id": reservation_id})
         
         if not current_reservation:
             raise HTTPException(status_code=404, detail="Reservation not found")
         
         # Check for conflicts with other reservations for the same house
-        conflicting_reservations = db.query(Reservation).filter(
-            Reservation.house_id == current_reservation.house_id,
-            Reservation.id != reservation_id,
-            Reservation.checkin_date < checkout_date,
-            Reservation.checkout_date > checkin_date
-        ).count()
+        conflicting_reservations = await db.scalar(statements.CONFLICTING_RESERVATIONS_COUNT, {
+            "house_id": current_reservation.house_id,
+            "id": reservation_id,
+            "checkin": checkin_date,
+            "checkout": checkout_date,
+        })
         
         is_available = conflicting_reservations == 0
         
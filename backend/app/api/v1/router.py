@@ -6,6 +6,9 @@ from .finance import router as finance_router
 from .checkin import router as checkin_router
 from .checklist import router as checklist_router
 from .dashboard import router as dashboard_router
+from .admin import router as admin_router
+from .batch import router as batch_router
+from .changes import router as changes_router
 
 api_router = APIRouter()
 
@@ -15,4 +18,7 @@ api_router.include_router(maintenance_router, prefix="/maintenance", tags=["main
 api_router.include_router(finance_router, prefix="/finance", tags=["finance"])
 api_router.include_router(checkin_router, prefix="/checkins", tags=["checkins"])
 api_router.include_router(checklist_router, prefix="/checklist", tags=["checklist"])
-api_router.include_router(dashboard_router, prefix="/dashboard", tags=["dashboard"])
\ No newline at end of file
+api_router.include_router(dashboard_router, prefix="/dashboard", tags=["dashboard"])
+api_router.include_router(admin_router, prefix="/admin", tags=["admin"])
+api_router.include_router(batch_router, prefix="/batch", tags=["batch"])
+api_router.include_router(changes_router, prefix="/changes", tags=["changes"])
\ No newline at end of file
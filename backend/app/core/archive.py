@@ -0,0 +1,107 @@
+"""
+Hot/cold archival of closed periods.
+
+Financial operations and the log tables only ever grow. Rows of closed
+fiscal years are moved (see app/services/archive_service.py) to tables of
+the same name in the archive database, attached as schema `archive` on
+every connection when ARCHIVE_ENABLED is set.
+
+`archive.archive_progress` records, per table, the date before which rows
+may have been archived. Reads whose range starts on or after that date only
+touch the hot table; others select from the UNION ALL of both tables.
+SQLite pushes the WHERE clause into each branch, so both use their indexes.
+"""
+
+from datetime import date
+from typing import Dict, Optional
+
+from sqlalchemy import (
+    Column, Date, DateTime, Index, Integer, MetaData, String, Table, bindparam, func, select, union_all
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.core.config import settings
+from app.core.database import Base
+from app.models import FinancialOperation
+
+ARCHIVE_SCHEMA = "archive"
+
+# Archived tables and the column deciding which period a row belongs to
+ARCHIVED_TABLES: Dict[str, str] = {
+    "financial_operations": "date",
+    "login_attempts": "timestamp",
+    "reservation_audit_log": "timestamp",
+    "task_completion_logs": "timestamp",
+    "maintenance_status_log": "changed_at",
+}
+
+# Extra indexes of the archive tables, besides the period column
+_ARCHIVE_INDEXES = {
+    "financial_operations": [("house_id", "type", "date"), ("house_id", "date", "id"), ("date", "id")],
+}
+
+archive_metadata = MetaData(schema=ARCHIVE_SCHEMA)
+
+
+def _archive_table(name: str, period_column: str) -> Table:
+    # Same columns as the hot table, without foreign keys: referenced rows stay in the main database
+    table = Base.metadata.tables[name]
+    indexes = [(period_column,)] + _ARCHIVE_INDEXES.get(name, [])
+    return Table(
+        name,
+        archive_metadata,
+        *[Column(column.name, column.type, primary_key=column.primary_key) for column in table.columns],
+        *[Index(f"ix_archive_{name}_{'_'.join(columns)}", *columns) for columns in indexes],
+    )
+
+
+archive_tables: Dict[str, Table] = {name: _archive_table(name, column) for name, column in ARCHIVED_TABLES.items()}
+
+archive_progress = Table(
+    "archive_progress",
+    archive_metadata,
+    Column("table_name", String, primary_key=True),
+    Column("archived_before", Date, nullable=False),  # No row on or after this date was archived
+    Column("rows_archived", Integer, nullable=False, default=0),
+    Column("updated_at", DateTime, nullable=False),
+)
+
+ARCHIVED_BEFORE = select(archive_progress.c.archived_before).where(
+    archive_progress.c.table_name == bindparam("table_name")
+)
+
+# Hot and archived financial operations together, loaded as FinancialOperation
+_financial_operations_history = union_all(
+    select(FinancialOperation.__table__),
+    select(archive_tables["financial_operations"]),
+).subquery("financial_operations")
+FinancialOperationHistory = aliased(FinancialOperation, _financial_operations_history)
+
+# History versions of the unbounded statements of app.core.statements
+FINANCIAL_OPERATION_HISTORY_BY_ID = select(FinancialOperationHistory).where(
+    FinancialOperationHistory.id == bindparam("id")
+)
+HOUSE_REVENUE_TOTALS_HISTORY = select(
+    FinancialOperationHistory.house_id, func.sum(FinancialOperationHistory.montant)
+).where(FinancialOperationHistory.type == "entree").group_by(FinancialOperationHistory.house_id)
+
+
+async def financial_operations_source(db: AsyncSession, start: Optional[date] = None):
+    """
+    Pick what a financial operations query should select from.
+
+    Args:
+        db: Database session
+        start: First date of the requested range, None when unbounded
+
+    Returns:
+        FinancialOperation when the range can't reach archived rows,
+        otherwise FinancialOperationHistory (same attributes)
+    """
+    if not settings.ARCHIVE_ENABLED:
+        return FinancialOperation
+    archived_before = await db.scalar(ARCHIVED_BEFORE, {"table_name": "financial_operations"})
+    if archived_before is None or (start is not None and start >= archived_before):
+        return FinancialOperation
+    return FinancialOperationHistory
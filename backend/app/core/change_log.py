@@ -0,0 +1,295 @@
+"""
+Change log of each residence database, served as a change feed.
+
+Offline-capable clients keep a copy of the residence and used to refetch
+every list to catch up. Instead, every committed write is appended to the
+`change_log` table of its database, with a sequence number, and
+`GET /api/v1/changes?since=<seq>` returns the rows changed after the
+last sequence number a client has seen. ORM events record them, the same
+way the analytics replica and the table versions track commits:
+
+- `after_flush` records every row a Session inserted, updated or deleted
+- `do_orm_execute` records a bulk statement (archival) as a `reload` of
+  its table, since the rows it changed aren't known: clients refetch it
+- `before_commit` (outermost transaction only) writes the recorded
+  changes in the committing transaction, with one statement: a rolled back
+  write (or SAVEPOINT, whose changes are dropped) leaves no entry, and a
+  committed one always has its entry. A group commit of the write queue
+  writes the entries of all its units at once.
+
+Entries are written with a Core statement on the Session's connection, so
+they don't go through the ORM hooks themselves. SQLite has one writer at a
+time, so entries are committed in the order of their sequence numbers: a
+client never misses an entry committed below one it has already seen.
+The tables of the user accounts (password hashes, reset tokens) aren't
+logged, nor the bookkeeping tables (idempotency keys, the log itself).
+
+Compaction (every CHANGE_LOG_COMPACT_INTERVAL seconds, or through
+POST /api/v1/admin/change-log/compact) removes the entries superseded by
+a later one of the same row (or a later reload of the table), which
+doesn't affect any client, then the entries older than
+CHANGE_LOG_RETENTION seconds. The highest sequence number removed that
+way is recorded in `change_log_compactions`: a client behind it may have
+missed a deletion and must resync from the list endpoints.
+
+As with the table versions, writes made outside of the API process
+(migrate_data.py, archive_data.py, raw SQL) aren't logged.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from itertools import chain
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Table, delete, event, func, insert, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, SessionTransaction, object_mapper
+
+from app.core.config import settings
+from app.core.database import Base, Shard, shard_router
+from app.core.write_queue import WriteQueue, write_queues
+from app.models.change_log import ChangeLogCompaction, ChangeLogEntry
+
+logger = logging.getLogger(__name__)
+
+UPSERT = "upsert"
+DELETE = "delete"
+RELOAD = "reload"
+
+# User accounts: never sent to the residence clients
+PRIVATE_TABLES = {"users", "auth_providers", "user_providers", "login_attempts", "password_reset_requests"}
+
+# Tables whose rows are logged: those of the residence, not the bookkeeping ones
+LOGGED_TABLES: Dict[str, Table] = {
+    table.name: table
+    for table in Base.metadata.sorted_tables
+    if table.name not in PRIVATE_TABLES and table.info.get("replicated", True)
+}
+
+_change_log = ChangeLogEntry.__table__
+
+_PENDING_KEY = "change_log_entries"
+
+
+class ChangeLog:
+    """
+    Change log of one residence database.
+
+    Args:
+        shard: Residence database
+        writer: Write queue of the residence, running the compactions
+        retention: Seconds an entry is kept once it is the latest of its row
+    """
+
+    def __init__(self, shard: Shard, writer: WriteQueue, retention: float):
+        self.shard = shard
+        self._writer = writer
+        self._retention = retention
+        # False until the table is found in the database (Alembic migration)
+        self.ready = False
+        self.last_compaction: Optional[Dict[str, Any]] = None
+
+    def start(self) -> None:
+        """Enable the logging if the database has the change log tables (blocking)."""
+        with self.shard.engine.connect() as connection:
+            tables = {
+                row[0] for row in connection.exec_driver_sql(
+                    "SELECT name FROM sqlite_master WHERE type = 'table' "
+                    "AND name IN ('change_log', 'change_log_compactions')"
+                )
+            }
+        self.ready = len(tables) == 2
+        if not self.ready:
+            logger.warning(
+                "Residence %s has no change log tables, writes aren't logged (run `alembic upgrade head`)",
+                self.shard.name,
+            )
+
+    async def compact(self) -> Dict[str, Any]:
+        """
+        Remove the superseded entries, then those older than the retention.
+
+        Returns:
+            Entries removed (superseded, expired) and the new resync floor
+        """
+        cutoff = time.time() - self._retention
+
+        def run(db: Session) -> Dict[str, Any]:
+            entries, later = _change_log, _change_log.alias("later")
+            # A later entry of the same row, or a later reload of the table
+            superseded = db.execute(delete(entries).where(
+                entries.c.row_id.is_not(None),
+                entries.c.seq < select(func.max(later.c.seq)).where(
+                    later.c.table_name == entries.c.table_name, later.c.row_id == entries.c.row_id
+                ).scalar_subquery(),
+            )).rowcount
+            superseded += db.execute(delete(entries).where(
+                entries.c.seq < select(func.max(later.c.seq)).where(
+                    later.c.table_name == entries.c.table_name, later.c.row_id.is_(None)
+                ).scalar_subquery(),
+            )).rowcount
+
+            floor = db.execute(select(func.max(ChangeLogCompaction.compacted_through))).scalar() or 0
+            through = db.execute(select(func.max(entries.c.seq)).where(entries.c.created_at < cutoff)).scalar()
+            expired = 0
+            if through is not None:
+                expired = db.execute(delete(entries).where(entries.c.seq <= through)).rowcount
+                floor = max(floor, through)
+            if superseded or expired:
+                db.add(ChangeLogCompaction(
+                    compacted_through=floor, removed_entries=superseded + expired, compacted_at=time.time()
+                ))
+            return {"superseded": superseded, "expired": expired, "compactedThrough": floor}
+
+        result = await self._writer.run(run)
+        self.last_compaction = {**result, "compactedAt": datetime.utcnow()}
+        logger.info("Change log %s compacted: %s", self.shard.name, result)
+        return result
+
+    async def status(self) -> Dict[str, Any]:
+        """Size and sequence numbers of the log, and the outcome of the last compaction."""
+        if not self.ready:
+            return {"residence": self.shard.name, "ready": False}
+        async with self.shard.ReadSessionLocal() as db:
+            entries, head = (await db.execute(
+                select(func.count(), func.max(ChangeLogEntry.seq))
+            )).one()
+            floor = (await db.execute(select(func.max(ChangeLogCompaction.compacted_through)))).scalar()
+        return {
+            "residence": self.shard.name,
+            "ready": True,
+            "entries": entries,
+            # An emptied log still continues from the last sequence number it removed
+            "lastSeq": max(head or 0, floor or 0),
+            "compactedThrough": floor or 0,
+            "lastCompaction": self.last_compaction,
+        }
+
+
+change_logs: Dict[str, ChangeLog] = {}
+_change_logs_by_path: Dict[str, ChangeLog] = {}
+
+
+def _change_log_for(session: Session) -> Optional[ChangeLog]:
+    bind = session.bind
+    if not isinstance(bind, Engine) or not bind.url.database:
+        return None
+    change_log = _change_logs_by_path.get(os.path.abspath(bind.url.database))
+    return change_log if change_log is not None and change_log.ready else None
+
+
+def _pending_entries(session: Session) -> List[Tuple[SessionTransaction, str, Optional[str], str]]:
+    # (transaction, table, row id, op) of the changes not written yet
+    pending = session.info.get(_PENDING_KEY)
+    if pending is None:
+        pending = session.info[_PENDING_KEY] = []
+    return pending
+
+
+def _current_transaction(session: Session) -> SessionTransaction:
+    return session.get_nested_transaction() or session.get_transaction()
+
+
+def _log_flush(session: Session, flush_context) -> None:
+    if _change_log_for(session) is None:
+        return
+    transaction = _current_transaction(session)
+    pending = _pending_entries(session)
+    deleted = {id(instance) for instance in session.deleted}
+    for instance in chain(session.new, session.dirty, session.deleted):
+        mapper = object_mapper(instance)
+        table = mapper.local_table
+        if table.name not in LOGGED_TABLES or table.schema is not None:
+            continue
+        if id(instance) in deleted:
+            op = DELETE
+        elif instance in session.new or session.is_modified(instance):
+            op = UPSERT
+        else:
+            continue  # Only a relationship collection changed
+        pending.append((transaction, table.name, str(mapper.primary_key_from_instance(instance)[0]), op))
+
+
+def _log_bulk_statement(orm_execute_state) -> None:
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = orm_execute_state.statement.table
+    if not isinstance(table, Table) or table.schema is not None or table.name not in LOGGED_TABLES:
+        return  # Archive tables are written with their hot table
+    session = orm_execute_state.session
+    if _change_log_for(session) is None:
+        return
+    _pending_entries(session).append((_current_transaction(session), table.name, None, RELOAD))
+
+
+def _write_entries(session: Session) -> None:
+    if session.in_nested_transaction() or _change_log_for(session) is None:
+        return  # SAVEPOINT released: written with its outer transaction
+    # The commit's own flush is logged too
+    session.flush()
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    # Latest operation of each row (or table reload), in one statement per commit
+    latest: Dict[Tuple[str, Optional[str]], str] = {}
+    for _, name, row_id, op in pending:
+        latest.pop((name, row_id), None)
+        latest[(name, row_id)] = op
+    now = time.time()
+    session.connection().execute(insert(_change_log), [
+        {"table_name": name, "row_id": row_id, "op": op, "created_at": now}
+        for (name, row_id), op in latest.items()
+    ])
+
+
+def _within(transaction: Optional[SessionTransaction], ancestor: SessionTransaction) -> bool:
+    while transaction is not None:
+        if transaction is ancestor:
+            return True
+        transaction = transaction.parent
+    return False
+
+
+def _discard_rolled_back(session: Session, previous_transaction: SessionTransaction) -> None:
+    # A SAVEPOINT (or the whole transaction) rolled back: its changes never happened
+    pending = session.info.get(_PENDING_KEY)
+    if pending:
+        pending[:] = [entry for entry in pending if not _within(entry[0], previous_transaction)]
+
+
+def _discard_changes(session: Session, transaction) -> None:
+    # The outermost transaction ended without a commit (rollback or close)
+    if transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
+
+
+if settings.CHANGE_LOG_ENABLED:
+    for residence in shard_router.shards.values():
+        change_logs[residence.name] = ChangeLog(
+            residence, write_queues[residence.name], retention=settings.CHANGE_LOG_RETENTION
+        )
+        _change_logs_by_path[os.path.abspath(residence.database_path)] = change_logs[residence.name]
+
+    # Class-level listeners: every Session (sync, async, writer queue) is logged
+    event.listen(Session, "after_flush", _log_flush)
+    event.listen(Session, "do_orm_execute", _log_bulk_statement)
+    event.listen(Session, "before_commit", _write_entries)
+    event.listen(Session, "after_soft_rollback", _discard_rolled_back)
+    event.listen(Session, "after_transaction_end", _discard_changes)
+
+
+async def compact_change_logs_periodically(interval: float) -> None:
+    """Compact every change log every `interval` seconds, until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        for change_log in change_logs.values():
+            if not change_log.ready:
+                continue
+            try:
+                await change_log.compact()
+            except Exception:
+                logger.exception("Could not compact the change log of %s", change_log.shard.name)
+
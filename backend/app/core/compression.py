@@ -0,0 +1,229 @@
+"""
+Response compression (gzip, and Brotli when the `brotli` package is installed).
+
+The large list endpoints return megabytes of JSON (the check-in inventory
+alone is 24 fields per row) that compress 5 to 10 times. The middleware
+compresses a response when:
+
+- the client accepts `br` or `gzip` (Brotli is preferred when both are)
+- its content type has a level for that encoding (COMPRESSION_*_LEVELS):
+  JSON compresses well, images and archives are left alone
+- its body is at least COMPRESSION_MIN_SIZE bytes: below a packet or so,
+  compressing costs more CPU than the bytes it saves
+
+Responses without a body to compress go through untouched: 304s answered
+from the client's cache (app/core/table_versions.py), HEAD requests, error
+and partial responses, bodies already encoded and `Cache-Control:
+no-transform`. A body sent in one piece (every JSON route) is compressed in
+one call, in a worker thread once it is large enough to stall the event
+loop (zlib and brotli release the GIL). A streamed body is compressed as it
+goes, each chunk flushed so the client receives it right away.
+
+`benchmarks/bench_compression.py` measures the CPU cost and the bytes saved
+for each level on realistic payloads.
+"""
+
+import asyncio
+import zlib
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only without it
+    brotli = None
+
+# Bodies larger than this are compressed in a worker thread
+THREAD_THRESHOLD = 256 * 1024
+
+# gzip container around a raw deflate stream
+_GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def accepted_encodings(accept_encoding: str) -> Tuple[str, ...]:
+    """
+    Encodings a client accepts, from its Accept-Encoding header.
+
+    Args:
+        accept_encoding: Header value, e.g. "gzip, deflate, br;q=0.9"
+
+    Returns:
+        Accepted codings (lowercase), those with q=0 left out
+    """
+    codings = []
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            codings.append(coding.strip().lower())
+    return tuple(codings)
+
+
+def content_type_level(levels: Dict[str, int], content_type: str) -> Optional[int]:
+    """
+    Compression level of a content type.
+
+    Args:
+        levels: Levels by media type; an entry ending with "/" (e.g. "text/")
+            covers every type of its family
+        content_type: Content-Type header of the response
+
+    Returns:
+        The level, or None when the type isn't to be compressed
+    """
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    level = levels.get(media_type)
+    if level is None:
+        level = levels.get(media_type.split("/", 1)[0] + "/")
+    return level
+
+
+class Encoder:
+    """Compression of one response body with one encoding and level."""
+
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        self.level = level
+        self._stream = None
+
+    def compress(self, body: bytes) -> bytes:
+        """Compress a whole body."""
+        if self.encoding == "br":
+            return brotli.compress(body, quality=self.level, mode=brotli.MODE_TEXT)
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, _GZIP_WBITS)
+        return compressor.compress(body) + compressor.flush()
+
+    def chunk(self, body: bytes, last: bool) -> bytes:
+        """Compress the next chunk of a streamed body, flushed for the client."""
+        if self._stream is None:
+            if self.encoding == "br":
+                self._stream = brotli.Compressor(quality=self.level, mode=brotli.MODE_TEXT)
+            else:
+                self._stream = zlib.compressobj(self.level, zlib.DEFLATED, _GZIP_WBITS)
+        if self.encoding == "br":
+            data = self._stream.process(body)
+            return data + (self._stream.finish() if last else self._stream.flush())
+        data = self._stream.compress(body)
+        return data + self._stream.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing the responses of clients that accept it.
+
+    Args:
+        app: ASGI application
+        minimum_size: Bodies smaller than this are sent uncompressed
+        gzip_levels: gzip level (1-9) by content type
+        brotli_levels: Brotli quality (0-11) by content type, used when the
+            `brotli` package is installed
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        gzip_levels: Optional[Dict[str, int]] = None,
+        brotli_levels: Optional[Dict[str, int]] = None,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {"gzip": gzip_levels or {}}
+        if brotli is not None:
+            self.levels["br"] = brotli_levels or {}
+
+    def encoder(self, accepted: Tuple[str, ...], content_type: str) -> Optional[Encoder]:
+        """
+        Encoder of a response, for the encodings its client accepts.
+
+        Args:
+            accepted: Codings from the request's Accept-Encoding
+            content_type: Content-Type of the response
+
+        Returns:
+            Brotli if accepted and configured for the type, else gzip, else None
+        """
+        for encoding in ("br", "gzip"):
+            if encoding in self.levels and (encoding in accepted or "*" in accepted):
+                level = content_type_level(self.levels[encoding], content_type)
+                if level is not None:
+                    return Encoder(encoding, level)
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        if not accepted:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        encoder: Optional[Encoder] = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, encoder, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk tells how large the body is
+                start = message
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            headers = MutableHeaders(raw=list(start["headers"]))
+
+            if encoder is None:
+                encoder = self._response_encoder(start["status"], headers, accepted, body, more_body)
+                if encoder is None:
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                headers["content-encoding"] = encoder.encoding
+                headers.add_vary_header("Accept-Encoding")
+
+                if not more_body:
+                    # The whole body at once (every JSON route)
+                    if len(body) >= THREAD_THRESHOLD:
+                        body = await asyncio.to_thread(encoder.compress, body)
+                    else:
+                        body = encoder.compress(body)
+                    headers["content-length"] = str(len(body))
+                    await send({**start, "headers": headers.raw})
+                    await send({"type": "http.response.body", "body": body})
+                    return
+
+                # Streamed: the compressed length isn't known up front
+                del headers["content-length"]
+                await send({**start, "headers": headers.raw})
+
+            await send({"type": "http.response.body", "body": encoder.chunk(body, not more_body),
+                        "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _response_encoder(
+        self, status: int, headers: MutableHeaders, accepted: Tuple[str, ...], body: bytes, more_body: bool
+    ) -> Optional[Encoder]:
+        # Only complete bodies of successful responses are worth compressing
+        if status < 200 or status in (204, 206, 304):
+            return None
+        if "content-encoding" in headers or "no-transform" in headers.get("cache-control", ""):
+            return None
+        if not more_body and len(body) < self.minimum_size:
+            return None
+        return self.encoder(accepted, headers.get("content-type", ""))
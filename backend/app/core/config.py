@@ -1,6 +1,26 @@
 from pydantic_settings import BaseSettings
 from decouple import config
-from typing import List
+from typing import Dict, List
+
+
+def async_database_url(database_url: str) -> str:
+    # Same database, opened through the aiosqlite driver
+    return database_url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+
+def read_only_database_url(database_url: str) -> str:
+    # Same SQLite file, opened read-only (URI mode=ro) through aiosqlite
+    path = database_url.split(":///", 1)[1]
+    return f"sqlite+aiosqlite:///file:{path}?mode=ro&uri=true"
+
+
+def compression_levels(value: str) -> Dict[str, int]:
+    # "application/json=6;text/=6" -> {"application/json": 6, "text/": 6}
+    levels = {}
+    for entry in filter(None, (part.strip() for part in value.split(";"))):
+        media_type, level = entry.split("=", 1)
+        levels[media_type.strip().lower()] = int(level)
+    return levels
 
 
 class Settings(BaseSettings):
@@ -21,6 +41,149 @@ class Settings(BaseSettings):
     # Database (SQLite)
     DATABASE_URL: str = config("DATABASE_URL", default="sqlite:///./residence_manager.db")
     
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        return async_database_url(self.DATABASE_URL)
+    
+    @property
+    def READ_DATABASE_URL(self) -> str:
+        return read_only_database_url(self.DATABASE_URL)
+    
+    # One SQLite file per residence (group of houses), so each residence has its
+    # own writer lock. DATABASE_URL is the DEFAULT_RESIDENCE database, used when a
+    # request names no residence; others are listed as "name=url;name=url".
+    DATABASE_SHARDS: str = config("DATABASE_SHARDS", default="")
+    DEFAULT_RESIDENCE: str = config("DEFAULT_RESIDENCE", default="default")
+    SHARD_HOUSE_INDEX_TTL: float = config("SHARD_HOUSE_INDEX_TTL", default=5.0, cast=float)  # Seconds
+    
+    @property
+    def SHARD_URLS(self) -> Dict[str, str]:
+        # Residence name -> database URL, the default residence first
+        urls = {self.DEFAULT_RESIDENCE: self.DATABASE_URL}
+        for entry in filter(None, (part.strip() for part in self.DATABASE_SHARDS.split(";"))):
+            name, url = entry.split("=", 1)
+            urls[name.strip()] = url.strip()
+        return urls
+    
+    # Connection pools of the async engines (read-write and read-only)
+    DATABASE_POOL_SIZE: int = config("DATABASE_POOL_SIZE", default=5, cast=int)
+    DATABASE_MAX_OVERFLOW: int = config("DATABASE_MAX_OVERFLOW", default=10, cast=int)
+    READ_POOL_SIZE: int = config("READ_POOL_SIZE", default=10, cast=int)
+    READ_POOL_MAX_OVERFLOW: int = config("READ_POOL_MAX_OVERFLOW", default=10, cast=int)
+    DATABASE_POOL_TIMEOUT: float = config("DATABASE_POOL_TIMEOUT", default=30.0, cast=float)  # Seconds
+    
+    # Log every SQL statement (noisy, the slow-query log below is usually what you want)
+    DATABASE_ECHO: bool = config("DATABASE_ECHO", default=False, cast=bool)
+    
+    # Compiled SQL cached per engine, keyed by statement shape (0 disables the cache).
+    # Each filter combination of the list endpoints is its own shape.
+    DATABASE_QUERY_CACHE_SIZE: int = config("DATABASE_QUERY_CACHE_SIZE", default=1000, cast=int)
+    
+    # SQLite performance profile, applied as PRAGMAs on every new connection.
+    # Set a value to an empty string to leave SQLite's default in place.
+    SQLITE_JOURNAL_MODE: str = config("SQLITE_JOURNAL_MODE", default="WAL")  # WAL lets readers run alongside the writer
+    SQLITE_SYNCHRONOUS: str = config("SQLITE_SYNCHRONOUS", default="NORMAL")  # Safe with WAL, one fsync per checkpoint
+    SQLITE_MMAP_SIZE: int = config("SQLITE_MMAP_SIZE", default=256 * 1024 * 1024, cast=int)  # Bytes
+    SQLITE_CACHE_SIZE: int = config("SQLITE_CACHE_SIZE", default=-64000, cast=int)  # Negative = KiB (64MB)
+    SQLITE_TEMP_STORE: str = config("SQLITE_TEMP_STORE", default="MEMORY")
+    SQLITE_BUSY_TIMEOUT: int = config("SQLITE_BUSY_TIMEOUT", default=5000, cast=int)  # Milliseconds
+    
+    # Single-writer commit queue (see app/core/write_queue.py)
+    WRITE_QUEUE_ENABLED: bool = config("WRITE_QUEUE_ENABLED", default=True, cast=bool)
+    WRITE_QUEUE_MAX_BATCH: int = config("WRITE_QUEUE_MAX_BATCH", default=64, cast=int)  # Units of work per commit
+    WRITE_QUEUE_MAX_WAIT_MS: float = config("WRITE_QUEUE_MAX_WAIT_MS", default=2.0, cast=float)  # Wait to fill a batch
+
+    # POST /api/v1/batch: operations run in one transaction of the write queue, which
+    # waits for the batch in between them (see app/api/v1/batch.py)
+    BATCH_MAX_OPERATIONS: int = config("BATCH_MAX_OPERATIONS", default=50, cast=int)
+
+    # Idempotency-Key header of the creation POSTs (see app/core/idempotency.py): the
+    # response to a key is replayed to its retries for IDEMPOTENCY_KEY_TTL seconds
+    IDEMPOTENCY_ENABLED: bool = config("IDEMPOTENCY_ENABLED", default=True, cast=bool)
+    IDEMPOTENCY_KEY_TTL: float = config("IDEMPOTENCY_KEY_TTL", default=24 * 3600, cast=float)  # Seconds
+    IDEMPOTENCY_CACHE_SIZE: int = config("IDEMPOTENCY_CACHE_SIZE", default=10000, cast=int)  # Responses in memory
+    IDEMPOTENCY_PURGE_INTERVAL: float = config("IDEMPOTENCY_PURGE_INTERVAL", default=3600, cast=float)  # Seconds
+
+    # Change feed of GET /api/v1/changes (see app/core/change_log.py): every committed
+    # write is logged with a sequence number. Compaction keeps the latest entry of each
+    # row, and drops entries older than CHANGE_LOG_RETENTION seconds (clients behind
+    # them must resync), every CHANGE_LOG_COMPACT_INTERVAL seconds.
+    CHANGE_LOG_ENABLED: bool = config("CHANGE_LOG_ENABLED", default=True, cast=bool)
+    CHANGE_LOG_RETENTION: float = config("CHANGE_LOG_RETENTION", default=30 * 24 * 3600, cast=float)  # Seconds
+    CHANGE_LOG_COMPACT_INTERVAL: float = config("CHANGE_LOG_COMPACT_INTERVAL", default=3600, cast=float)  # Seconds
+    CHANGE_FEED_MAX_LIMIT: int = config("CHANGE_FEED_MAX_LIMIT", default=1000, cast=int)  # Changes per page
+
+    # Per-request SQL instrumentation (Server-Timing header + log line)
+    SQL_METRICS_ENABLED: bool = config("SQL_METRICS_ENABLED", default=True, cast=bool)
+    SQL_N_PLUS_ONE_THRESHOLD: int = config("SQL_N_PLUS_ONE_THRESHOLD", default=5, cast=int)  # Same statement N times
+
+    # Slow-query log (statement, parameters and EXPLAIN QUERY PLAN as JSON lines)
+    SLOW_QUERY_THRESHOLD_MS: float = config("SLOW_QUERY_THRESHOLD_MS", default=100.0, cast=float)
+    SLOW_QUERY_LOG_FILE: str = config("SLOW_QUERY_LOG_FILE", default="logs/slow_queries.log")  # Empty = no file
+    SLOW_QUERY_LOG_MAX_BYTES: int = config("SLOW_QUERY_LOG_MAX_BYTES", default=10 * 1024 * 1024, cast=int)
+    SLOW_QUERY_LOG_BACKUP_COUNT: int = config("SLOW_QUERY_LOG_BACKUP_COUNT", default=5, cast=int)
+
+    # Hot/cold archival: closed fiscal years (older than the last ARCHIVE_KEEP_YEARS)
+    # of financial operations and the log tables are moved to an archive database
+    # attached as `archive` (<database>.archive.db next to each residence database)
+    ARCHIVE_ENABLED: bool = config("ARCHIVE_ENABLED", default=False, cast=bool)
+    ARCHIVE_KEEP_YEARS: int = config("ARCHIVE_KEEP_YEARS", default=2, cast=int)
+    ARCHIVE_BATCH_SIZE: int = config("ARCHIVE_BATCH_SIZE", default=5000, cast=int)  # Rows moved per transaction
+
+    # Online snapshots through the SQLite backup API (see app/services/backup_service.py)
+    BACKUP_DIR: str = config("BACKUP_DIR", default="backups")
+    BACKUP_RETENTION: int = config("BACKUP_RETENTION", default=7, cast=int)  # Snapshots kept per database
+    BACKUP_PAGES_PER_STEP: int = config("BACKUP_PAGES_PER_STEP", default=256, cast=int)
+    BACKUP_STEP_SLEEP_MS: float = config("BACKUP_STEP_SLEEP_MS", default=5.0, cast=float)  # Pause between steps
+    BACKUP_MAX_RESTARTS: int = config("BACKUP_MAX_RESTARTS", default=3, cast=int)  # Then copy in one step
+
+    # In-memory analytics replica of each residence database serving /dashboard/* and
+    # /finance/summary, kept current from ORM commits (see app/core/replica.py)
+    ANALYTICS_REPLICA_ENABLED: bool = config("ANALYTICS_REPLICA_ENABLED", default=False, cast=bool)
+    ANALYTICS_REPLICA_MAX_BATCH: int = config("ANALYTICS_REPLICA_MAX_BATCH", default=100, cast=int)  # Commits per apply
+
+    # Keyset pagination of the list endpoints (?limit=&cursor=, see app/utils/pagination.py).
+    # In compatibility mode a request without limit or cursor gets the whole list, as a
+    # bare array; otherwise it gets the first page of PAGINATION_DEFAULT_LIMIT rows.
+    PAGINATION_COMPAT_MODE: bool = config("PAGINATION_COMPAT_MODE", default=True, cast=bool)
+    PAGINATION_DEFAULT_LIMIT: int = config("PAGINATION_DEFAULT_LIMIT", default=100, cast=int)
+    PAGINATION_MAX_LIMIT: int = config("PAGINATION_MAX_LIMIT", default=500, cast=int)  # Larger limits are capped
+    # Rows read from the cursor (and sent) at a time by the NDJSON streams of the list
+    # endpoints (Accept: application/x-ndjson)
+    NDJSON_YIELD_PER: int = config("NDJSON_YIELD_PER", default=1000, cast=int)
+
+    # Conditional GETs: ETag from per-table change versions, 304 on If-None-Match
+    # (see app/core/table_versions.py)
+    ETAG_ENABLED: bool = config("ETAG_ENABLED", default=True, cast=bool)
+
+    # In-memory copy of the reference tables (houses, checklist categories, maintenance
+    # types), reloaded after a write to them (see app/core/reference_data.py). Their
+    # list endpoints may be cached by clients for REFERENCE_CACHE_MAX_AGE seconds.
+    REFERENCE_CACHE_ENABLED: bool = config("REFERENCE_CACHE_ENABLED", default=True, cast=bool)
+    REFERENCE_CACHE_MAX_AGE: int = config("REFERENCE_CACHE_MAX_AGE", default=3600, cast=int)
+
+    # Response compression (see app/core/compression.py): Brotli when the `brotli`
+    # package is installed and the client accepts it, gzip otherwise. Bodies under
+    # COMPRESSION_MIN_SIZE bytes are sent as they are. Levels are set per content type
+    # as "type=level;type=level" ("text/" covers every text type); types not listed
+    # aren't compressed. benchmarks/bench_compression.py compares the levels.
+    COMPRESSION_ENABLED: bool = config("COMPRESSION_ENABLED", default=True, cast=bool)
+    COMPRESSION_MIN_SIZE: int = config("COMPRESSION_MIN_SIZE", default=1024, cast=int)  # Bytes
+    COMPRESSION_GZIP_LEVELS: str = config(
+        "COMPRESSION_GZIP_LEVELS", default="application/json=4;application/x-ndjson=1;text/=6"
+    )  # 1-9
+    COMPRESSION_BROTLI_LEVELS: str = config(
+        "COMPRESSION_BROTLI_LEVELS", default="application/json=4;application/x-ndjson=1;text/=4"
+    )  # 0-11
+
+    @property
+    def GZIP_LEVELS(self) -> Dict[str, int]:
+        return compression_levels(self.COMPRESSION_GZIP_LEVELS)
+
+    @property
+    def BROTLI_LEVELS(self) -> Dict[str, int]:
+        return compression_levels(self.COMPRESSION_BROTLI_LEVELS)
+
     # Email settings (for password reset)
     MAIL_USERNAME: str = config("MAIL_USERNAME", default="")
     MAIL_PASSWORD: str = config("MAIL_PASSWORD", default="")
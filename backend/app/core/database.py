@@ -1,23 +1,412 @@
-from sqlalchemy import create_engine
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+from fastapi import HTTPException, Request
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from app.core.config import settings
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.core.config import async_database_url, read_only_database_url, settings
 
-# Create SQLite engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False},  # Required for SQLite
-    echo=True  # Set to False in production
-)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def sqlite_pragmas() -> Dict[str, object]:
+    """
+    Build the SQLite PRAGMA profile from settings.
+    
+    Empty values are skipped so SQLite keeps its own default.
+    
+    Returns:
+        Ordered mapping of PRAGMA name to value
+    """
+    pragmas = {
+        "journal_mode": settings.SQLITE_JOURNAL_MODE,
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        "cache_size": settings.SQLITE_CACHE_SIZE,
+        "temp_store": settings.SQLITE_TEMP_STORE,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT,
+    }
+    return {name: value for name, value in pragmas.items() if value not in ("", None)}
+
+
+def apply_sqlite_pragmas(target: Engine, pragmas: Dict[str, object]) -> None:
+    """
+    Run the given PRAGMAs on every new DBAPI connection of an engine.
+    
+    Args:
+        target: Sync engine (use `async_engine.sync_engine` for async engines)
+        pragmas: Mapping of PRAGMA name to value
+    """
+    @event.listens_for(target, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def archive_database_path(database_url: str) -> str:
+    """
+    Path of the archive database of a SQLite database.
+    
+    Args:
+        database_url: URL of the (hot) database, e.g. sqlite:///./residence_manager.db
+        
+    Returns:
+        Archive file next to it, e.g. ./residence_manager.archive.db
+    """
+    root, extension = os.path.splitext(database_url.split(":///", 1)[1])
+    return f"{root}.archive{extension or '.db'}"
+
+
+def attach_archive(target: Engine, path: str, read_only: bool = False, vfs: Optional[str] = None) -> None:
+    """
+    Attach the archive database as schema `archive` on every new connection.
+    
+    Args:
+        target: Sync engine (use `async_engine.sync_engine` for async engines)
+        path: Archive database file
+        read_only: Attach with mode=ro (the connection must accept URI filenames)
+        vfs: SQLite VFS of the file, when it differs from the connection's (in-memory databases)
+    """
+    options = (["mode=ro"] if read_only else []) + ([f"vfs={vfs}"] if vfs else [])
+    location = f"file:{path}?{'&'.join(options)}" if options else path
+
+    @event.listens_for(target, "connect")
+    def _attach_archive(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("ATTACH DATABASE ? AS archive", (location,))
+        cursor.close()
+
+
+class PoolMetrics:
+    """
+    Usage counters for one engine's connection pool, fed by pool events.
+    
+    Combined with the pool's own gauges (size, checked out, overflow) to
+    give a per-pool snapshot.
+    """
+
+    def __init__(self, name: str, target: Engine):
+        self.name = name
+        self.engine = target
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.peak_checked_out = 0
+        self._in_use = 0
+        self._lock = threading.Lock()
+
+        event.listen(target, "connect", self._on_connect)
+        event.listen(target, "checkout", self._on_checkout)
+        event.listen(target, "checkin", self._on_checkin)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+            self._in_use += 1
+            self.peak_checked_out = max(self.peak_checked_out, self._in_use)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checkins += 1
+            self._in_use = max(0, self._in_use - 1)
+
+    def snapshot(self) -> Dict[str, object]:
+        pool = self.engine.pool
+        return {
+            "name": self.name,
+            "poolClass": type(pool).__name__,
+            "size": pool.size() if hasattr(pool, "size") else None,
+            "checkedOut": pool.checkedout() if hasattr(pool, "checkedout") else self._in_use,
+            "checkedIn": pool.checkedin() if hasattr(pool, "checkedin") else None,
+            "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+            "peakCheckedOut": self.peak_checked_out,
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+        }
+
+
+class Shard:
+    """
+    Engines and session factories of one residence database (SQLite file).
+    
+    Every residence has its own sync, async read-write and read-only
+    engines, hence its own pools and its own SQLite writer lock.
+    """
+
+    def __init__(self, name: str, database_url: str, primary: bool = False):
+        self.name = name
+        self.database_url = database_url
+        self.database_path = database_url.split(":///", 1)[1]
+        self.primary = primary
+
+        # Create SQLite engine
+        self.engine = create_engine(
+            database_url,
+            connect_args={"check_same_thread": False},  # Required for SQLite
+            echo=settings.DATABASE_ECHO,
+            query_cache_size=settings.DATABASE_QUERY_CACHE_SIZE,
+        )
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+
+        # Async SQLite engine (aiosqlite) used by the `async def` API routes so that
+        # database round-trips don't block the event loop
+        self.async_engine = create_async_engine(
+            async_database_url(database_url),
+            echo=settings.DATABASE_ECHO,
+            query_cache_size=settings.DATABASE_QUERY_CACHE_SIZE,
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=settings.DATABASE_POOL_SIZE,
+            max_overflow=settings.DATABASE_MAX_OVERFLOW,
+            pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        )
+        # expire_on_commit=False: attributes stay loaded after commit, since lazy
+        # refreshes are not allowed outside of an awaited call
+        self.AsyncSessionLocal = async_sessionmaker(
+            bind=self.async_engine,
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+
+        # Read-only async engine for GET routes. Connections are opened with
+        # mode=ro and query_only, so in WAL mode they read alongside the writer
+        # without ever taking the write lock.
+        self.read_engine = create_async_engine(
+            read_only_database_url(database_url),
+            echo=settings.DATABASE_ECHO,
+            query_cache_size=settings.DATABASE_QUERY_CACHE_SIZE,
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=settings.READ_POOL_SIZE,
+            max_overflow=settings.READ_POOL_MAX_OVERFLOW,
+            pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        )
+        self.ReadSessionLocal = async_sessionmaker(
+            bind=self.read_engine,
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+
+        apply_sqlite_pragmas(self.engine, sqlite_pragmas())
+        apply_sqlite_pragmas(self.async_engine.sync_engine, sqlite_pragmas())
+        # journal_mode is persistent and can't be changed on a read-only connection
+        read_pragmas = {name: value for name, value in sqlite_pragmas().items() if name != "journal_mode"}
+        read_pragmas["query_only"] = "ON"
+        apply_sqlite_pragmas(self.read_engine.sync_engine, read_pragmas)
+
+        self.archive_path = archive_database_path(database_url)
+        if settings.ARCHIVE_ENABLED:
+            attach_archive(self.engine, self.archive_path)
+            attach_archive(self.async_engine.sync_engine, self.archive_path)
+            attach_archive(self.read_engine.sync_engine, self.archive_path, read_only=True)
+
+        self.pool_metrics: List[PoolMetrics] = [
+            PoolMetrics(self.pool_name("sync"), self.engine),
+            PoolMetrics(self.pool_name("async"), self.async_engine.sync_engine),
+            PoolMetrics(self.pool_name("read"), self.read_engine.sync_engine),
+        ]
+
+    def pool_name(self, kind: str) -> str:
+        # Pools of the default residence keep their plain names
+        return kind if self.primary else f"{kind}:{self.name}"
+
+
+class ShardRouter:
+    """
+    Resolves the residence database a request works on.
+    
+    In order: the `X-Residence` header, the `residence` query parameter,
+    the residence owning the house named by a `house_id` path parameter, a
+    `maison` / `houseId` query parameter or a `maison` / `houseId` field of
+    a write's JSON body, then the default residence. A write whose body
+    names a house of another residence than the one resolved (header,
+    batch) is rejected with a 400 rather than written to the wrong
+    database. Houses are located through an index of the `houses` table of
+    every shard, reloaded on a miss at most once per SHARD_HOUSE_INDEX_TTL.
+    """
+
+    HOUSE_PARAMS = ("house_id", "maison", "houseId")
+    WRITE_METHODS = ("POST", "PUT", "PATCH")
+
+    def __init__(self, shards: Dict[str, Shard], default: str, house_index_ttl: float = 5.0):
+        self.shards = shards
+        self.default = shards[default]
+        self._house_index_ttl = house_index_ttl
+        self._house_shards: Dict[str, str] = {}
+        self._indexed_at: Optional[float] = None
+
+    @property
+    def sharded(self) -> bool:
+        return len(self.shards) > 1
+
+    def get(self, name: str) -> Shard:
+        """
+        Look up a residence database by name.
+        
+        Raises:
+            HTTPException: If the residence is not configured
+        """
+        shard = self.shards.get(name)
+        if shard is None:
+            raise HTTPException(status_code=404, detail=f"Unknown residence: {name}")
+        return shard
+
+    async def refresh_house_index(self) -> None:
+        """Reload which residence each house belongs to."""
+        index: Dict[str, str] = {}
+        for shard in self.shards.values():
+            async with shard.ReadSessionLocal() as db:
+                for house_id in await db.scalars(text("SELECT id FROM houses")):
+                    index[house_id] = shard.name
+        self._house_shards = index
+        self._indexed_at = time.monotonic()
+
+    async def shard_for_house(self, house_id: str) -> Optional[Shard]:
+        """
+        Find the residence database holding a house.
+        
+        Args:
+            house_id: The house ID
+            
+        Returns:
+            The shard, or None if no residence has this house
+        """
+        name = self._house_shards.get(house_id)
+        if name is None and (
+            self._indexed_at is None or time.monotonic() - self._indexed_at >= self._house_index_ttl
+        ):
+            await self.refresh_house_index()
+            name = self._house_shards.get(house_id)
+        return self.shards[name] if name is not None else None
+
+    async def body_house(self, request: Request) -> Optional[str]:
+        """
+        House named by the JSON body of a write, if any.
+        
+        Args:
+            request: The incoming request
+            
+        Returns:
+            The `maison` / `houseId` field of the body, or None
+        """
+        if request.method not in self.WRITE_METHODS:
+            return None
+        if not request.headers.get("content-type", "").startswith("application/json"):
+            return None
+        try:
+            body = await request.json()
+        except ValueError:
+            return None  # Answered by the route's validation
+        if not isinstance(body, dict):
+            return None
+        for param in self.HOUSE_PARAMS:
+            house_id = body.get(param)
+            if isinstance(house_id, str) and house_id:
+                return house_id
+        return None
+
+    async def resolve(self, request: Request) -> Shard:
+        """
+        Resolve (once per request) the residence database of a request.
+        
+        Args:
+            request: The incoming request
+            
+        Returns:
+            The shard the request's sessions are bound to
+            
+        Raises:
+            HTTPException: If the request names an unknown residence, or
+                writes a house of another residence
+        """
+        shard = getattr(request.state, "shard", None)
+        if shard is None:
+            name = request.headers.get("x-residence") or request.query_params.get("residence")
+            if name:
+                shard = self.get(name)
+            elif self.sharded:
+                for param in self.HOUSE_PARAMS:
+                    house_id = request.path_params.get(param) or request.query_params.get(param)
+                    if house_id:
+                        shard = await self.shard_for_house(house_id)
+                        break
+                else:
+                    house_id = await self.body_house(request)
+                    if house_id:
+                        shard = await self.shard_for_house(house_id)
+            shard = request.state.shard = shard or self.default
+
+        # Checked once the body is known, also when the shard was set by the caller (batch operations)
+        if self.sharded and not getattr(request.state, "shard_checked", False):
+            house_id = await self.body_house(request)
+            owner = await self.shard_for_house(house_id) if house_id else None
+            if owner is not None and owner is not shard:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"House {house_id} belongs to residence {owner.name}, not {shard.name}",
+                )
+            request.state.shard_checked = True
+        return shard
+
+
+shards: Dict[str, Shard] = {
+    name: Shard(name, url, primary=name == settings.DEFAULT_RESIDENCE)
+    for name, url in settings.SHARD_URLS.items()
+}
+shard_router = ShardRouter(shards, settings.DEFAULT_RESIDENCE, settings.SHARD_HOUSE_INDEX_TTL)
+
+# Default residence database (DATABASE_URL)
+primary_shard = shards[settings.DEFAULT_RESIDENCE]
+engine = primary_shard.engine
+SessionLocal = primary_shard.SessionLocal
+async_engine = primary_shard.async_engine
+AsyncSessionLocal = primary_shard.AsyncSessionLocal
+read_engine = primary_shard.read_engine
+ReadSessionLocal = primary_shard.ReadSessionLocal
+
+pool_metrics: List[PoolMetrics] = [metrics for shard in shards.values() for metrics in shard.pool_metrics]
 
 Base = declarative_base()
 
-# Dependency to get database session
-def get_db():
+# Dependency to get database session (of the request's residence)
+async def get_db(request: Request):
+    shard = await shard_router.resolve(request)
+    db = shard.SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# Dependency to get a session on the default residence database, which
+# holds what is shared by all residences (user accounts)
+def get_primary_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# Dependency to get an async database session
+async def get_async_db(request: Request):
+    shard = await shard_router.resolve(request)
+    async with shard.AsyncSessionLocal() as db:
+        yield db
+
+
+# Dependency to get a read-only async database session (GET routes)
+async def get_read_db(request: Request):
+    shard = await shard_router.resolve(request)
+    async with shard.ReadSessionLocal() as db:
+        yield db
@@ -0,0 +1,356 @@
+"""
+Idempotency keys for the creation POSTs.
+
+Mobile clients retry a POST when its response is lost on the way, and each
+retry used to create the rows again (with their financial operations).
+Routes decorated with `@idempotent` accept an `Idempotency-Key` header, a
+unique string the client picks per submission (a UUID for instance): the
+first request with a key runs normally and its response is stored, and a
+retry with the same key gets that response back, flagged with
+`Idempotent-Replayed: true`, without the route running.
+
+- Responses are kept IDEMPOTENCY_KEY_TTL seconds in the `idempotency_keys`
+  table of the residence database, and the IDEMPOTENCY_CACHE_SIZE most
+  recent ones in memory (LRU): a retry is answered from memory, or from one
+  primary key lookup of that table, never from the main tables.
+- A key is bound to its request (method, path, query string and body): the
+  same key sent with another request is rejected with a 422.
+- A retry arriving while the first request is still being served gets a
+  409, and can try again shortly.
+- 5xx responses aren't stored, so their retries run the route again.
+
+The response is written through the write queue once it has been sent, in
+its own transaction: a crash between the route's commit and that write
+leaves the retry to run again. Expired keys are deleted with a write, at
+most every IDEMPOTENCY_PURGE_INTERVAL seconds. As with the table versions,
+the in-flight keys and the LRU are per process. A database without the
+`idempotency_keys` table (before `alembic upgrade head`) ignores the header:
+its POSTs run as if no key was sent.
+"""
+
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Set, Tuple, TypeVar
+
+from fastapi import HTTPException, Request
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import APIRoute
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from starlette.routing import Match
+
+from app.core.config import settings
+from app.core.database import Shard, shard_router
+from app.core.query_stats import untracked_queries
+from app.core.write_queue import WriteQueue, write_queues
+from app.models.idempotency import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable)
+
+MAX_KEY_LENGTH = 255
+
+
+def idempotent(endpoint: F) -> F:
+    """
+    Accept an Idempotency-Key header on a POST route, replaying its response to retries.
+
+    Apply it under the route decorator:
+
+        @router.post("/")
+        @idempotent
+        async def create_reservation(...):
+
+    Returns:
+        The endpoint unchanged, with `idempotent` set
+    """
+    endpoint.idempotent = True
+    return endpoint
+
+
+class StoredResponse:
+    """Response to the first request sent with a key."""
+
+    __slots__ = ("fingerprint", "status_code", "content_type", "body", "expires_at")
+
+    def __init__(self, fingerprint: bytes, status_code: int, content_type: Optional[str], body: bytes,
+                 expires_at: float):
+        self.fingerprint = fingerprint
+        self.status_code = status_code
+        self.content_type = content_type
+        self.body = body
+        self.expires_at = expires_at
+
+
+class IdempotencyStore:
+    """
+    Stored responses of one residence database: an LRU in front of its table.
+
+    Args:
+        shard: Residence database
+        writer: Write queue of the residence, storing the responses
+        cache_size: Responses kept in memory
+        ttl: Seconds a response is replayed for
+        purge_interval: Minimum seconds between two deletions of the expired keys
+    """
+
+    def __init__(self, shard: Shard, writer: WriteQueue, cache_size: int, ttl: float, purge_interval: float):
+        self.shard = shard
+        self._writer = writer
+        self._cache_size = cache_size
+        self._ttl = ttl
+        self._purge_interval = purge_interval
+        self._cache: "OrderedDict[str, StoredResponse]" = OrderedDict()
+        self._in_flight: Set[str] = set()
+        self._purged_at = time.time()
+        # False until the table is found in the database (Alembic migration)
+        self.ready = False
+
+    def start(self) -> None:
+        """Enable the replays if the database has the idempotency_keys table (blocking)."""
+        with self.shard.engine.connect() as connection:
+            self.ready = connection.exec_driver_sql(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'idempotency_keys'"
+            ).first() is not None
+        if not self.ready:
+            logger.warning(
+                "Residence %s has no idempotency_keys table, Idempotency-Key is ignored (run `alembic upgrade head`)",
+                self.shard.name,
+            )
+
+    async def get(self, key: str) -> Optional[StoredResponse]:
+        """
+        Response stored for a key.
+
+        Args:
+            key: Idempotency-Key of the request
+
+        Returns:
+            The response, or None if the key is new or expired
+        """
+        now = time.time()
+        stored = self._cache.get(key)
+        if stored is not None:
+            if stored.expires_at > now:
+                self._cache.move_to_end(key)
+                return stored
+            del self._cache[key]
+            return None
+
+        # Shared by every request: not counted against the route's budget
+        with untracked_queries():
+            async with self.shard.ReadSessionLocal() as db:
+                row = (await db.execute(
+                    select(IdempotencyKey.fingerprint, IdempotencyKey.status_code, IdempotencyKey.content_type,
+                           IdempotencyKey.body, IdempotencyKey.expires_at)
+                    .where(IdempotencyKey.key == key, IdempotencyKey.expires_at > now)
+                )).first()
+        if row is None:
+            return None
+        stored = StoredResponse(*row)
+        self._remember(key, stored)
+        return stored
+
+    def begin(self, key: str) -> bool:
+        """Mark a key as being served; False if it already is."""
+        if key in self._in_flight:
+            return False
+        self._in_flight.add(key)
+        return True
+
+    async def finish(self, key: str, fingerprint: bytes, status_code: Optional[int],
+                     content_type: Optional[str], body: bytes) -> None:
+        """
+        Store the response to a key marked by `begin`, then release the key.
+
+        Args:
+            key: Idempotency-Key of the request
+            fingerprint: Digest of the request
+            status_code: Status of its response, None if it failed without one
+            content_type: Content-Type of the response
+            body: Body of the response
+        """
+        now = time.time()
+        stored = None
+        try:
+            if status_code is not None and status_code < 500:
+                stored = StoredResponse(fingerprint, status_code, content_type, body, now + self._ttl)
+                # Retries are answered from memory from now on
+                self._remember(key, stored)
+        finally:
+            self._in_flight.discard(key)
+        if stored is None:
+            return
+
+        purge = now - self._purged_at >= self._purge_interval
+        if purge:
+            self._purged_at = now
+
+        def save(db: Session) -> None:
+            if purge:
+                db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= now))
+            # merge: an expired row of the same key may not be purged yet
+            db.merge(IdempotencyKey(
+                key=key, fingerprint=stored.fingerprint, status_code=stored.status_code,
+                content_type=stored.content_type, body=stored.body, expires_at=stored.expires_at,
+            ))
+
+        try:
+            with untracked_queries():
+                await self._writer.run(save)
+        except Exception:
+            logger.exception("Could not store the response to Idempotency-Key %r", key)
+
+    def _remember(self, key: str, stored: StoredResponse) -> None:
+        self._cache[key] = stored
+        self._cache.move_to_end(key)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+
+# One store per residence database, written through its write queue
+idempotency_stores: Dict[str, IdempotencyStore] = {
+    name: IdempotencyStore(
+        shard,
+        write_queues[name],
+        cache_size=settings.IDEMPOTENCY_CACHE_SIZE,
+        ttl=settings.IDEMPOTENCY_KEY_TTL,
+        purge_interval=settings.IDEMPOTENCY_PURGE_INTERVAL,
+    )
+    for name, shard in shard_router.shards.items()
+}
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def request_fingerprint(scope, body: bytes) -> bytes:
+    """Digest of what a key is bound to: method, path, query string and body."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""), body):
+        digest.update(part)
+        digest.update(b"\0")
+    return digest.digest()
+
+
+class IdempotencyMiddleware:
+    """
+    ASGI middleware replaying the stored response to retries of `@idempotent` routes.
+
+    Requests without an Idempotency-Key header, and requests to other
+    routes, go through untouched. Install it inside CompressionMiddleware,
+    so the stored bodies are the uncompressed ones.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def _route(self, scope) -> Optional[Tuple[APIRoute, dict]]:
+        for route in scope["app"].router.routes:
+            match, child_scope = route.matches(scope)
+            if match == Match.FULL:
+                return (route, child_scope) if isinstance(route, APIRoute) else None
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        key = _header(scope, b"idempotency-key")
+        routed = self._route(scope) if key is not None else None
+        if routed is None or not getattr(routed[0].endpoint, "idempotent", False):
+            await self.app(scope, receive, send)
+            return
+
+        if not key or len(key) > MAX_KEY_LENGTH:
+            response = ORJSONResponse(
+                {"detail": f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"}, status_code=400
+            )
+            await response(scope, receive, send)
+            return
+
+        # The body is read up front (it is part of the fingerprint), then replayed to the route
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] != "http.request":
+                return  # Client gone
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+        body_sent = False
+
+        async def replay_body():
+            nonlocal body_sent
+            if body_sent:
+                return await receive()
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def receive_body():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        # Same residence as the route will resolve (the shard is kept in the request state)
+        scope.setdefault("state", {})
+        try:
+            shard = await shard_router.resolve(Request({**scope, **routed[1]}, receive_body))
+        except HTTPException:
+            # Unknown residence, or a house of another one: the route answers it
+            await self.app(scope, replay_body, send)
+            return
+        store = idempotency_stores[shard.name]
+        if not store.ready:
+            await self.app(scope, replay_body, send)  # Not migrated: nowhere to store the response
+            return
+        fingerprint = request_fingerprint(scope, body)
+
+        stored = await store.get(key)
+        if stored is not None:
+            if stored.fingerprint != fingerprint:
+                response = ORJSONResponse(
+                    {"detail": "Idempotency-Key already used for a different request"}, status_code=422
+                )
+                await response(scope, receive, send)
+                return
+            headers = [(b"content-length", str(len(stored.body)).encode()), (b"idempotent-replayed", b"true")]
+            if stored.content_type:
+                headers.append((b"content-type", stored.content_type.encode("latin-1")))
+            await send({"type": "http.response.start", "status": stored.status_code, "headers": headers})
+            await send({"type": "http.response.body", "body": stored.body})
+            return
+
+        if not store.begin(key):
+            response = ORJSONResponse(
+                {"detail": "A request with this Idempotency-Key is in progress"}, status_code=409
+            )
+            await response(scope, receive, send)
+            return
+
+        status_code = None
+        content_type = None
+        chunks = []
+
+        async def send_and_keep(message):
+            nonlocal status_code, content_type
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                content_type = _header(message, b"content-type")
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_body, send_and_keep)
+        except BaseException:
+            status_code = None
+            raise
+        finally:
+            await store.finish(key, fingerprint, status_code, content_type, b"".join(chunks))
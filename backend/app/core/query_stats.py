@@ -0,0 +1,201 @@
+"""
+Per-request SQL instrumentation.
+
+Cursor events on every engine record each statement and its duration
+into the stats of the request being served (held in a context variable,
+which SQLAlchemy's async greenlets and the writer queue both carry over).
+The middleware reports the totals in a `Server-Timing` header and one
+structured log line per request, and flags statements repeated often
+enough to look like an N+1 loop.
+
+Routes declare how many statements they may run with `@query_budget(n)`;
+requests going over it are logged as warnings, and
+`benchmarks/check_query_budgets.py` enforces the budgets on seeded
+databases of growing size.
+"""
+
+import json
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable)
+
+
+def query_budget(max_queries: int) -> Callable[[F], F]:
+    """
+    Declare the number of SQL statements a route may run per request.
+
+    The budget must not depend on the data: a route running one statement
+    per row (N+1) has no fixed budget. Apply it under the route decorator:
+
+        @router.get("/progress/{house_id}")
+        @query_budget(3)
+        async def get_checklist_progress(...):
+
+    Args:
+        max_queries: Statements allowed per request
+
+    Returns:
+        Decorator returning the endpoint unchanged, with `query_budget` set
+    """
+    def declare(endpoint: F) -> F:
+        endpoint.query_budget = max_queries
+        return endpoint
+    return declare
+
+
+def route_query_budget(scope) -> Optional[int]:
+    """Budget declared on the endpoint a request was routed to, if any."""
+    # Set by routes whose budget depends on the request (/batch: those of its operations)
+    if scope.get("query_budget") is not None:
+        return scope["query_budget"]
+    return getattr(scope.get("endpoint"), "query_budget", None)
+
+
+class QueryStats:
+    """Statements executed while serving one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0  # Seconds
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        # Parameters are bound separately, so the SQL text is the statement's shape
+        self.statements[statement] += 1
+
+    def n_plus_one_suspects(self, threshold: int) -> List[Tuple[str, int]]:
+        """
+        Statement shapes executed at least `threshold` times.
+
+        Args:
+            threshold: Minimum number of executions to be flagged
+
+        Returns:
+            (statement, executions) pairs, most repeated first
+        """
+        return [(statement, n) for statement, n in self.statements.most_common() if n >= threshold]
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Stats of the request being served, or None outside of a request."""
+    return _current_stats.get()
+
+
+@contextmanager
+def untracked_queries() -> Iterator[None]:
+    """
+    Leave the statements run in the block out of the request's stats.
+
+    For caches shared by every request (app/core/reference_data.py): the
+    request that happens to refill one shouldn't go over its budget.
+    """
+    token = _current_stats.set(None)
+    try:
+        yield
+    finally:
+        _current_stats.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    started = conn.info.get("query_started")
+    if stats is not None and started:
+        stats.record(statement, time.perf_counter() - started.pop())
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # Failed statements never reach after_cursor_execute
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+def _shorten(statement: str, limit: int = 200) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= limit else statement[:limit] + "..."
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware collecting SQL statistics for every HTTP request.
+
+    Adds `Server-Timing: db;dur=..;desc="N queries", app;dur=..` to the
+    response and logs one JSON line per request (a warning when N+1
+    suspects were found).
+    """
+
+    def __init__(self, app, n_plus_one_threshold: int = 5):
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                timing = (
+                    f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries", '
+                    f"app;dur={elapsed_ms:.2f}"
+                )
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            self._log(scope, status_code, stats, time.perf_counter() - started)
+
+    def _log(self, scope, status_code: int, stats: QueryStats, elapsed: float) -> None:
+        suspects = stats.n_plus_one_suspects(self.n_plus_one_threshold)
+        budget = route_query_budget(scope)
+        record: Dict[str, object] = {
+            "event": "sql_stats",
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status_code,
+            "queries": stats.count,
+            "dbMs": round(stats.duration * 1000, 2),
+            "totalMs": round(elapsed * 1000, 2),
+        }
+        if budget is not None:
+            record["queryBudget"] = budget
+        if suspects:
+            record["nPlusOne"] = [{"statement": _shorten(statement), "count": n} for statement, n in suspects]
+        if suspects or (budget is not None and stats.count > budget):
+            logger.warning(json.dumps(record))
+        else:
+            logger.info(json.dumps(record))
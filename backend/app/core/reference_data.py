@@ -0,0 +1,148 @@
+"""
+In-memory reference data.
+
+Houses, checklist categories and maintenance types are written a handful of
+times a year but read by most requests (counted by the dashboard, looked up
+by the checklist routes). Each residence database gets a copy of them in
+memory, loaded at startup.
+
+A copy is tagged with the version of its table (app/core/table_versions.py)
+at the time it was loaded. A read compares it with the current version and
+reloads the table when a commit changed it since, so a write through the
+API is seen by the very next request. The version is read before the rows:
+a commit landing in between at worst gives the rows an old version, which
+the next read corrects. As with ETags, writes made outside of the API
+(migrate_data.py, raw SQL) aren't seen until a restart.
+
+Routes get the copy of their residence as a dependency:
+
+    refs: ReferenceData = Depends(get_reference_data)
+    categories = await refs.checklist_categories.rows()
+"""
+
+import logging
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+
+from fastapi import Request
+from sqlalchemy import select
+from sqlalchemy.engine import Row
+
+from app.core.config import settings
+from app.core.database import Shard, shard_router
+from app.core.query_stats import untracked_queries
+from app.core.table_versions import table_versions
+from app.models.checklist import ChecklistCategory
+from app.models.house import House
+from app.models.maintenance import MaintenanceType
+
+logger = logging.getLogger(__name__)
+
+
+class ReferenceRows:
+    """Rows of a reference table, as loaded at one version of it."""
+
+    __slots__ = ("version", "rows", "_indexes")
+
+    def __init__(self, version: int, rows: Sequence[Row]):
+        self.version = version
+        self.rows: Tuple[Row, ...] = tuple(rows)
+        self._indexes: Dict[str, Dict[Any, Row]] = {}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self) -> Iterator[Row]:
+        return iter(self.rows)
+
+    def index(self, attribute: str) -> Dict[Any, Row]:
+        """
+        Rows by the value of one of their columns, built on first use.
+
+        Args:
+            attribute: Column name, e.g. "name"
+
+        Returns:
+            Mapping of the column's value to the (first) row holding it
+        """
+        index = self._indexes.get(attribute)
+        if index is None:
+            index = {}
+            for row in self.rows:
+                index.setdefault(getattr(row, attribute), row)
+            self._indexes[attribute] = index
+        return index
+
+
+class ReferenceTable:
+    """
+    Cached columns of one reference table of one residence database.
+
+    Rows come in the order the table's own query used to return them:
+    `order_by` when given, otherwise SQLite's (rowid, i.e. insertion) order.
+    """
+
+    def __init__(self, shard: Shard, *columns, order_by=None):
+        self.shard = shard
+        self.name = columns[0].table.name
+        self._statement = select(*columns)
+        if order_by is not None:
+            self._statement = self._statement.order_by(order_by)
+        self._rows: Optional[ReferenceRows] = None
+
+    async def rows(self) -> ReferenceRows:
+        """
+        Current rows of the table, reloaded if it changed since the last load.
+
+        Returns:
+            The rows, to be read only (they are shared by every request)
+        """
+        version = table_versions((self.name,))[0]
+        cached = self._rows
+        if cached is not None and cached.version == version:
+            return cached
+        if not settings.REFERENCE_CACHE_ENABLED:
+            return await self._load(version)
+
+        # Not counted against the request that happens to refill the cache
+        with untracked_queries():
+            self._rows = await self._load(version)
+        logger.info("Loaded %s of residence %s (%d rows)", self.name, self.shard.name, len(self._rows))
+        return self._rows
+
+    async def _load(self, version: int) -> ReferenceRows:
+        async with self.shard.ReadSessionLocal() as db:
+            return ReferenceRows(version, (await db.execute(self._statement)).all())
+
+
+class ReferenceData:
+    """Reference tables of one residence database."""
+
+    def __init__(self, shard: Shard):
+        self.houses = ReferenceTable(shard, House.id, House.name)
+        self.checklist_categories = ReferenceTable(
+            shard, ChecklistCategory.id, ChecklistCategory.name, order_by=ChecklistCategory.id
+        )
+        self.maintenance_types = ReferenceTable(shard, MaintenanceType.id, MaintenanceType.label)
+
+    async def load(self) -> None:
+        """Load every table not loaded yet (or changed since)."""
+        for table in (self.houses, self.checklist_categories, self.maintenance_types):
+            await table.rows()
+
+
+reference_data: Dict[str, ReferenceData] = {
+    name: ReferenceData(shard) for name, shard in shard_router.shards.items()
+}
+
+
+async def load_reference_data() -> None:
+    """Load the reference tables of every residence (at startup)."""
+    if settings.REFERENCE_CACHE_ENABLED:
+        for residence in reference_data.values():
+            await residence.load()
+
+
+# Dependency to get the reference data of the request's residence
+async def get_reference_data(request: Request) -> ReferenceData:
+    shard = await shard_router.resolve(request)
+    return reference_data[shard.name]
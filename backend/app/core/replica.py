@@ -0,0 +1,488 @@
+"""
+In-memory analytics replica.
+
+The dashboard and finance summary endpoints aggregate whole tables; on the
+residence database they compete with transactional writes for the same
+file. With ANALYTICS_REPLICA_ENABLED, each residence database gets an
+in-memory copy: a named `memdb` SQLite database (a plain `:memory:`
+database is private to one connection, a named one is shared by every
+connection of the process, with SQLite's usual locking).
+
+The replica is loaded at startup from the residence database, then kept
+current from ORM events:
+
+- `after_flush` records the table and primary key of every row a Session
+  inserted, updated or deleted; bulk DELETE statements are recorded to be
+  replayed, other bulk statements mark their table for a reload
+- `after_commit` (outermost transaction only) publishes the changes of the
+  commit to the replica of the database the Session is bound to
+
+One applier thread per replica applies the published commits in order.
+Rows are re-read from the residence database by primary key rather than
+copied from the Session, so rolled back savepoints and later commits of
+the same row need no special care. The residence database is attached
+read-only to the applier's connection as `source`, so every change is a
+pair of DELETE / INSERT ... SELECT statements.
+
+Writes made outside of this process (migrate_data.py, raw SQL) are not
+seen: `check()` compares the replica with its source and `reload()`
+copies it again.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from datetime import datetime
+from itertools import chain
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from fastapi import Request
+from sqlalchemy import MetaData, Table, create_engine, delete, event, func, insert, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, object_mapper
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+
+import app.models  # noqa: F401 - registers every table on Base.metadata
+from app.core.config import async_database_url, settings
+from app.core.database import (
+    Base,
+    PoolMetrics,
+    Shard,
+    apply_sqlite_pragmas,
+    attach_archive,
+    pool_metrics,
+    shard_router,
+    sqlite_pragmas,
+)
+
+logger = logging.getLogger(__name__)
+
+SOURCE_SCHEMA = "source"
+
+# Databases attached to a memdb connection default to the memdb VFS too
+FILE_VFS = "win32" if os.name == "nt" else "unix"
+
+# Primary keys re-read per statement
+_KEYS_PER_STATEMENT = 500
+
+_CHANGES_KEY = "analytics_replica_changes"
+_STOP = object()
+
+
+class Changeset:
+    """Rows changed by one commit on a residence database."""
+
+    __slots__ = ("keys", "statements", "reloads", "committed_at")
+
+    def __init__(self):
+        self.keys: Dict[str, Set[Any]] = {}  # Table name -> primary keys to re-read
+        self.statements: List[Tuple[Any, Any]] = []  # Bulk DELETEs replayed as is
+        self.reloads: Set[str] = set()  # Tables copied again entirely
+        self.committed_at = 0.0  # time.monotonic()
+
+
+class AnalyticsReplica:
+    """
+    In-memory copy of one residence database, read by the analytics endpoints.
+
+    Reads go through `ReadSessionLocal` (read-only async sessions, like the
+    residence database's own). Only the applier thread writes.
+    """
+
+    def __init__(self, shard: Shard, max_batch: int = 100):
+        self.shard = shard
+        self.max_batch = max_batch
+        self.database_url = f"sqlite:///file:/analytics-{shard.name}?vfs=memdb&uri=true"
+
+        # Applier connection. StaticPool keeps it open for the life of the
+        # process, which keeps the in-memory database alive.
+        self.engine = create_engine(
+            self.database_url,
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+            query_cache_size=settings.DATABASE_QUERY_CACHE_SIZE,
+        )
+        apply_sqlite_pragmas(self.engine, {"busy_timeout": settings.SQLITE_BUSY_TIMEOUT})
+        self._attach_source()
+
+        self.read_engine = create_async_engine(
+            async_database_url(self.database_url),
+            echo=settings.DATABASE_ECHO,
+            query_cache_size=settings.DATABASE_QUERY_CACHE_SIZE,
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=settings.READ_POOL_SIZE,
+            max_overflow=settings.READ_POOL_MAX_OVERFLOW,
+            pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        )
+        self.ReadSessionLocal = async_sessionmaker(
+            bind=self.read_engine,
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+        # Readers wait (busy_timeout) while a batch of changes is applied
+        read_pragmas = {
+            name: value for name, value in sqlite_pragmas().items()
+            if name in ("cache_size", "temp_store", "busy_timeout")
+        }
+        read_pragmas["query_only"] = "ON"
+        apply_sqlite_pragmas(self.read_engine.sync_engine, read_pragmas)
+        if settings.ARCHIVE_ENABLED:
+            # Archived rows are read from the archive database itself
+            attach_archive(self.read_engine.sync_engine, shard.archive_path, read_only=True, vfs=FILE_VFS)
+        pool_metrics.append(PoolMetrics(shard.pool_name("analytics"), self.read_engine.sync_engine))
+
+        source_metadata = MetaData()
+        self._source_tables: Dict[str, Table] = {
+            table.name: table.to_metadata(source_metadata, schema=SOURCE_SCHEMA)
+            for table in Base.metadata.sorted_tables
+        }
+        self._columns: Dict[str, List[str]] = {}
+
+        self.ready = False
+        self.loaded_at: Optional[datetime] = None
+        self.load_ms: Optional[float] = None
+        self.applied_commits = 0
+        self.last_applied_at: Optional[datetime] = None
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.error: Optional[str] = None
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._pending: deque = deque()  # committed_at of the commits not applied yet
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _attach_source(self) -> None:
+        location = f"file:{self.shard.database_path}?mode=ro&vfs={FILE_VFS}"
+
+        @event.listens_for(self.engine, "connect")
+        def _attach_source_database(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute(f"ATTACH DATABASE ? AS {SOURCE_SCHEMA}", (location,))
+            cursor.close()
+
+    # Lifecycle
+
+    def start(self) -> None:
+        """Load the replica (blocking), then start the applier thread."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._load()
+            self._thread = threading.Thread(
+                target=self._run, name=self.shard.pool_name("analytics-replica"), daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 10.0) -> None:
+        """Apply the published commits, then stop the applier thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def publish(self, changes: Changeset) -> None:
+        """Queue the changes of a commit of the residence database."""
+        changes.committed_at = time.monotonic()
+        self._pending.append(changes.committed_at)
+        self._queue.put(changes)
+
+    def submit(self, job: Callable[[], Any]) -> Future:
+        """Run a function on the applier thread, after the commits published so far."""
+        future: Future = Future()
+        self._queue.put((job, future))
+        return future
+
+    @property
+    def up_to_date(self) -> bool:
+        """Whether every commit published so far has been applied."""
+        return not self._pending
+
+    @property
+    def lag(self) -> float:
+        """Seconds since the oldest commit not applied yet (0 when up to date)."""
+        try:
+            return max(0.0, time.monotonic() - self._pending[0])
+        except IndexError:
+            return 0.0
+
+    # Applier thread
+
+    def _run(self) -> None:
+        while True:
+            items = [self._queue.get()]
+            while len(items) < self.max_batch:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            changesets: List[Changeset] = []
+            for item in items:
+                if isinstance(item, Changeset):
+                    changesets.append(item)
+                    continue
+                # Jobs and STOP run after the commits queued before them
+                self._apply_safely(changesets)
+                changesets = []
+                if item is _STOP:
+                    return
+                job, future = item
+                try:
+                    future.set_result(job())
+                except Exception as exc:
+                    future.set_exception(exc)
+            self._apply_safely(changesets)
+
+    def _apply_safely(self, changesets: List[Changeset]) -> None:
+        if not changesets:
+            return
+        try:
+            self._apply(changesets)
+            self.error = None
+        except Exception as exc:
+            logger.exception("Analytics replica %s failed to apply %d commit(s)", self.shard.name, len(changesets))
+            self.error = str(exc)
+            try:
+                self._load()
+            except Exception:
+                logger.exception("Analytics replica %s failed to reload", self.shard.name)
+                self.ready = False  # Reads go back to the residence database
+        finally:
+            now = time.monotonic()
+            for changes in changesets:
+                lag = now - changes.committed_at
+                self.max_lag = max(self.max_lag, lag)
+                self._pending.popleft()
+            self.last_lag = lag
+            self.applied_commits += len(changesets)
+            self.last_applied_at = datetime.utcnow()
+
+    def _apply(self, changesets: List[Changeset]) -> None:
+        with self.engine.begin() as connection:
+            for changes in changesets:
+                for statement, parameters in changes.statements:
+                    connection.execute(statement, parameters)
+                for name in changes.reloads:
+                    self._copy(connection, name)
+                for name, keys in changes.keys.items():
+                    if name in changes.reloads:
+                        continue
+                    keys = list(keys)
+                    for start in range(0, len(keys), _KEYS_PER_STATEMENT):
+                        self._copy(connection, name, keys[start:start + _KEYS_PER_STATEMENT])
+
+    def _copy(self, connection, name: str, keys: Optional[List[Any]] = None) -> None:
+        # Replace the given rows (all rows when keys is None) with those of the source
+        table = Base.metadata.tables[name]
+        source = self._source_tables[name]
+        columns = self._columns.get(name)
+        if columns is None:
+            return  # Not in the residence database
+        pk = table.primary_key.columns.values()[0]
+
+        remove = delete(table)
+        copy = select(*[source.c[column] for column in columns])
+        if keys is not None:
+            remove = remove.where(pk.in_(keys))
+            copy = copy.where(source.c[pk.name].in_(keys))
+        connection.execute(remove)
+        connection.execute(insert(table).from_select(columns, copy))
+
+    def _load(self) -> None:
+        started = time.perf_counter()
+        self.ready = False
+        with self.engine.begin() as connection:
+            Base.metadata.create_all(bind=connection)
+            # Columns of the residence database (older schemas may lack recent columns)
+            self._columns = {}
+            for table in Base.metadata.sorted_tables:
+                if not table.info.get("replicated", True):
+                    continue  # Bookkeeping tables (idempotency keys, change log)
+                existing = {
+                    row[1] for row in connection.exec_driver_sql(
+                        f'PRAGMA {SOURCE_SCHEMA}.table_info("{table.name}")'
+                    )
+                }
+                if existing:
+                    self._columns[table.name] = [column.name for column in table.columns if column.name in existing]
+            # One transaction: every table comes from the same snapshot of the source
+            for name in self._columns:
+                self._copy(connection, name)
+        self.load_ms = round((time.perf_counter() - started) * 1000, 2)
+        self.loaded_at = datetime.utcnow()
+        self.ready = True
+        logger.info("Analytics replica %s loaded in %sms", self.shard.name, self.load_ms)
+
+    # Admin
+
+    def reload(self) -> Future:
+        """Copy the residence database again (on the applier thread)."""
+        return self.submit(self._load)
+
+    def check(self, attempts: int = 3) -> Future:
+        """
+        Compare the replica with the residence database (on the applier thread).
+
+        Tables are compared row by row (EXCEPT both ways) inside one read
+        transaction of the source. A commit landing between the queued check
+        and its snapshot shows as a difference, so differing tables are
+        checked again after the next applied commits, up to `attempts` times.
+
+        Returns:
+            Future resolved with one entry per table: table, replicaRows,
+            sourceRows, missingRows (not in the replica) and staleRows
+            (in the replica only, or outdated)
+        """
+        result: Future = Future()
+        report: Dict[str, Dict[str, Any]] = {}
+
+        def compare(names: List[str], attempt: int) -> None:
+            try:
+                with self.engine.begin() as connection:
+                    for name in names:
+                        report[name] = self._compare(connection, name)
+            except Exception as exc:
+                result.set_exception(exc)
+                return
+            differing = [name for name in names if report[name]["missingRows"] or report[name]["staleRows"]]
+            if differing and attempt < attempts:
+                self.submit(lambda: compare(differing, attempt + 1))
+            else:
+                result.set_result([report[name] for name in self._columns])
+
+        self.submit(lambda: compare(list(self._columns), 1))
+        return result
+
+    def _compare(self, connection, name: str) -> Dict[str, Any]:
+        table = Base.metadata.tables[name]
+        source = self._source_tables[name]
+        replica_rows = select(*[table.c[column] for column in self._columns[name]])
+        source_rows = select(*[source.c[column] for column in self._columns[name]])
+
+        def count(statement) -> int:
+            return connection.scalar(select(func.count()).select_from(statement.subquery()))
+
+        return {
+            "table": name,
+            "replicaRows": count(replica_rows),
+            "sourceRows": count(source_rows),
+            "missingRows": count(source_rows.except_(replica_rows)),
+            "staleRows": count(replica_rows.except_(source_rows)),
+        }
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "residence": self.shard.name,
+            "ready": self.ready,
+            "loadedAt": self.loaded_at,
+            "loadMs": self.load_ms,
+            "pendingCommits": len(self._pending),
+            "lagMs": round(self.lag * 1000, 2),
+            "lastLagMs": round(self.last_lag * 1000, 2),
+            "maxLagMs": round(self.max_lag * 1000, 2),
+            "appliedCommits": self.applied_commits,
+            "lastAppliedAt": self.last_applied_at,
+            "error": self.error,
+        }
+
+
+replicas: Dict[str, AnalyticsReplica] = {}
+_replicas_by_path: Dict[str, AnalyticsReplica] = {}
+
+
+def _replica_for(session: Session) -> Optional[AnalyticsReplica]:
+    bind = session.bind
+    if not isinstance(bind, Engine) or not bind.url.database:
+        return None
+    return _replicas_by_path.get(os.path.abspath(bind.url.database))
+
+
+def _pending_changes(session: Session) -> Changeset:
+    changes = session.info.get(_CHANGES_KEY)
+    if changes is None:
+        changes = session.info[_CHANGES_KEY] = Changeset()
+    return changes
+
+
+def _record_flush(session: Session, flush_context) -> None:
+    for instance in chain(session.new, session.dirty, session.deleted):
+        mapper = object_mapper(instance)
+        table = mapper.local_table
+        if table.schema is not None or not table.info.get("replicated", True):
+            continue  # Archive and bookkeeping tables aren't replicated
+        keys = _pending_changes(session).keys.setdefault(table.name, set())
+        keys.add(mapper.primary_key_from_instance(instance)[0])
+
+
+def _record_bulk_statement(orm_execute_state) -> None:
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = orm_execute_state.statement.table
+    if not isinstance(table, Table) or table.schema is not None or table.name not in Base.metadata.tables:
+        return
+    if not table.info.get("replicated", True):
+        return
+    changes = _pending_changes(orm_execute_state.session)
+    if orm_execute_state.is_delete:
+        changes.statements.append((orm_execute_state.statement, orm_execute_state.parameters))
+    else:
+        changes.reloads.add(table.name)
+
+
+def _publish_commit(session: Session) -> None:
+    if session.in_nested_transaction():
+        return  # SAVEPOINT released, the outer transaction may still roll back
+    changes = session.info.pop(_CHANGES_KEY, None)
+    replica = _replica_for(session) if changes is not None else None
+    if replica is not None:
+        replica.publish(changes)
+
+
+def _discard_changes(session: Session, transaction) -> None:
+    # The outermost transaction ended without a commit (rollback or close)
+    if transaction.parent is None:
+        session.info.pop(_CHANGES_KEY, None)
+
+
+if settings.ANALYTICS_REPLICA_ENABLED:
+    for residence in shard_router.shards.values():
+        replicas[residence.name] = AnalyticsReplica(residence, max_batch=settings.ANALYTICS_REPLICA_MAX_BATCH)
+        _replicas_by_path[os.path.abspath(residence.database_path)] = replicas[residence.name]
+
+    # Class-level listeners: every Session (sync, async, writer queue) is tracked
+    event.listen(Session, "after_flush", _record_flush)
+    event.listen(Session, "do_orm_execute", _record_bulk_statement)
+    event.listen(Session, "after_commit", _publish_commit)
+    event.listen(Session, "after_transaction_end", _discard_changes)
+
+
+def analytics_sessionmaker(shard: Shard) -> async_sessionmaker:
+    """
+    Session factory for the analytics reads of a residence.
+
+    Args:
+        shard: Residence database
+
+    Returns:
+        The replica's sessions when it is loaded, otherwise the residence
+        database's read-only sessions
+    """
+    replica = replicas.get(shard.name)
+    if replica is not None and replica.ready:
+        return replica.ReadSessionLocal
+    return shard.ReadSessionLocal
+
+
+# Dependency to get a read-only session for the analytics endpoints
+async def get_analytics_db(request: Request):
+    shard = await shard_router.resolve(request)
+    async with analytics_sessionmaker(shard)() as db:
+        yield db
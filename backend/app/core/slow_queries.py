@@ -0,0 +1,204 @@
+"""
+Slow-query log.
+
+Statements slower than SLOW_QUERY_THRESHOLD_MS are written, with their
+bound parameters and `EXPLAIN QUERY PLAN` output, as JSON lines to a
+rotating log file. They are also aggregated per statement shape (the SQL
+text, parameters being bound separately) for the admin endpoint.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Only statements that have a query plan
+_EXPLAINABLE = ("select", "insert", "update", "delete", "with")
+
+
+def explain_query_plan(dbapi_connection, statement: str, parameters) -> List[str]:
+    """
+    Run `EXPLAIN QUERY PLAN` for a statement on a raw DBAPI connection.
+
+    Args:
+        dbapi_connection: Connection the statement ran on
+        statement: SQL text with `?` placeholders
+        parameters: Bound parameters (first set for executemany)
+
+    Returns:
+        Plan rows as "id|parent|detail" strings, empty if the statement has no plan
+    """
+    if not statement.lstrip().lower().startswith(_EXPLAINABLE):
+        return []
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+        return [f"{row[0]}|{row[1]}|{row[-1]}" for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+class SlowQueryLog:
+    """
+    Aggregated slow statements, keyed by statement shape.
+
+    Keeps the plan and the parameters of the slowest execution of each shape.
+    """
+
+    def __init__(self, threshold_ms: float, log_file: str = "", max_bytes: int = 0, backup_count: int = 0):
+        self.threshold_ms = threshold_ms
+        self._log_file = log_file
+        self._max_bytes = max_bytes
+        self._backup_count = backup_count
+        self._file_logger: Optional[logging.Logger] = None
+        self._entries: Dict[str, Dict[str, object]] = {}
+        self._lock = threading.Lock()
+
+    def _get_file_logger(self) -> Optional[logging.Logger]:
+        # The file is only created once something is slow
+        if self._file_logger is None and self._log_file:
+            directory = os.path.dirname(self._log_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            handler = RotatingFileHandler(
+                self._log_file, maxBytes=self._max_bytes, backupCount=self._backup_count, encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            file_logger = logging.getLogger(f"{__name__}.file")
+            file_logger.setLevel(logging.INFO)
+            file_logger.propagate = False
+            file_logger.addHandler(handler)
+            self._file_logger = file_logger
+        return self._file_logger
+
+    def needs_plan(self, statement: str) -> bool:
+        return statement not in self._entries
+
+    def record(self, statement: str, parameters, duration_ms: float, plan: Optional[List[str]]) -> None:
+        """
+        Aggregate a slow execution and write it to the log file.
+
+        Args:
+            statement: SQL text
+            parameters: Bound parameters
+            duration_ms: Execution time in milliseconds
+            plan: Query plan, None to keep the one already captured for this shape
+        """
+        now = datetime.utcnow()
+        with self._lock:
+            entry = self._entries.get(statement)
+            if entry is None:
+                entry = self._entries[statement] = {
+                    "statement": statement,
+                    "count": 0,
+                    "totalMs": 0.0,
+                    "maxMs": 0.0,
+                    "parameters": None,
+                    "plan": plan or [],
+                    "lastSeen": now,
+                }
+            entry["count"] += 1
+            entry["totalMs"] += duration_ms
+            entry["lastSeen"] = now
+            if duration_ms >= entry["maxMs"]:
+                entry["maxMs"] = duration_ms
+                entry["parameters"] = _jsonable(parameters)
+            if plan:
+                entry["plan"] = plan
+            plan = entry["plan"]
+
+        file_logger = self._get_file_logger()
+        if file_logger is not None:
+            file_logger.info(json.dumps({
+                "at": now.isoformat(),
+                "durationMs": round(duration_ms, 2),
+                "statement": statement,
+                "parameters": _jsonable(parameters),
+                "plan": plan,
+            }, default=str))
+
+    def top(self, limit: int = 10) -> List[Dict[str, object]]:
+        """
+        Slowest statement shapes.
+
+        Args:
+            limit: Number of shapes to return
+
+        Returns:
+            Aggregates ordered by slowest execution first
+        """
+        with self._lock:
+            entries = sorted(self._entries.values(), key=lambda entry: entry["maxMs"], reverse=True)[:limit]
+            return [
+                dict(entry, avgMs=entry["totalMs"] / entry["count"], plan=list(entry["plan"]))
+                for entry in entries
+            ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def _jsonable(parameters):
+    # Dates, decimals etc. are logged as strings
+    if isinstance(parameters, dict):
+        return {key: _jsonable_value(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_jsonable_value(value) for value in parameters]
+    return _jsonable_value(parameters)
+
+
+def _jsonable_value(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    log_file=settings.SLOW_QUERY_LOG_FILE,
+    max_bytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+    backup_count=settings.SLOW_QUERY_LOG_BACKUP_COUNT,
+)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("slow_query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("slow_query_started")
+    if not started:
+        return
+    duration_ms = (time.perf_counter() - started.pop()) * 1000
+    if duration_ms < slow_query_log.threshold_ms:
+        return
+
+    params = parameters[0] if executemany and parameters else parameters
+    plan = None
+    if slow_query_log.needs_plan(statement):
+        try:
+            plan = explain_query_plan(conn.connection, statement, params)
+        except Exception:
+            logger.debug("EXPLAIN QUERY PLAN failed for %s", statement, exc_info=True)
+    slow_query_log.record(statement, params, duration_ms, plan)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("slow_query_started"):
+        conn.info["slow_query_started"].pop()
@@ -0,0 +1,127 @@
+"""
+Pre-built statements for the hot query shapes.
+
+Routers used to build `select(Model).where(Model.id == value)` on every
+request. SQLAlchemy then has to walk the new statement to compute its cache
+key before it can find the compiled SQL in the engine's compiled cache
+(sized by DATABASE_QUERY_CACHE_SIZE). The statements below are built once at
+import time, with `bindparam()` placeholders for the values, so their cache
+key is computed once and memoized. Values are passed at execution time:
+
+    reservation = await db.scalar(statements.RESERVATION_BY_ID, {"id": reservation_id})
+
+The statements are immutable and can be shared by every session, sync or async.
+"""
+
+from sqlalchemy import bindparam, case, func, select
+
+from app.models import (
+    CheckIn,
+    CheckOut,
+    ChecklistItem,
+    FinancialOperation,
+    House,
+    HouseCategoryStatus,
+    HouseChecklistStatus,
+    MaintenanceIssue,
+    Reservation,
+)
+
+# Single entities by primary key (params: id)
+RESERVATION_BY_ID = select(Reservation).where(Reservation.id == bindparam("id"))
+CHECKIN_BY_ID = select(CheckIn).where(CheckIn.id == bindparam("id"))
+MAINTENANCE_ISSUE_BY_ID = select(MaintenanceIssue).where(MaintenanceIssue.id == bindparam("id"))
+FINANCIAL_OPERATION_BY_ID = select(FinancialOperation).where(FinancialOperation.id == bindparam("id"))
+CHECKLIST_ITEM_BY_ID = select(ChecklistItem).where(ChecklistItem.id == bindparam("id"))
+
+# Financial operations generated by a reservation, check-in or maintenance issue
+FINANCIAL_OPERATION_BY_RESERVATION = select(FinancialOperation).where(
+    FinancialOperation.reservation_id == bindparam("reservation_id"),
+    FinancialOperation.origine == bindparam("origine"),
+)
+FINANCIAL_OPERATION_BY_CHECKIN = select(FinancialOperation).where(
+    FinancialOperation.checkin_id == bindparam("checkin_id"),
+    FinancialOperation.origine == bindparam("origine"),
+)
+FINANCIAL_OPERATIONS_OF_RESERVATION = select(FinancialOperation).where(
+    FinancialOperation.reservation_id == bindparam("reservation_id")
+)
+FINANCIAL_OPERATIONS_OF_CHECKIN = select(FinancialOperation).where(
+    FinancialOperation.checkin_id == bindparam("checkin_id")
+)
+FINANCIAL_OPERATIONS_OF_MAINTENANCE = select(FinancialOperation).where(
+    FinancialOperation.maintenance_id == bindparam("maintenance_id")
+)
+CHECKOUTS_OF_CHECKIN = select(CheckOut).where(CheckOut.checkin_id == bindparam("checkin_id"))
+
+# Reservations of the same house overlapping [checkin, checkout), other than `id`
+CONFLICTING_RESERVATIONS_COUNT = select(func.count()).select_from(Reservation).where(
+    Reservation.house_id == bindparam("house_id"),
+    Reservation.id != bindparam("id"),
+    Reservation.checkin_date < bindparam("checkout"),
+    Reservation.checkout_date > bindparam("checkin"),
+)
+
+# Checklist status of a house (params: house_id, plus item_id)
+HOUSE_CHECKLIST_STATUS = select(HouseChecklistStatus).where(
+    HouseChecklistStatus.house_id == bindparam("house_id"),
+    HouseChecklistStatus.item_id == bindparam("item_id"),
+)
+HOUSE_CHECKLIST_STATUSES = select(HouseChecklistStatus).where(
+    HouseChecklistStatus.house_id == bindparam("house_id")
+)
+HOUSE_LAST_CHECKLIST_STATUS = HOUSE_CHECKLIST_STATUSES.order_by(
+    HouseChecklistStatus.completed_at.desc()
+).limit(1)
+HOUSE_CATEGORY_STATUS = select(HouseCategoryStatus).where(
+    HouseCategoryStatus.house_id == bindparam("house_id"),
+    HouseCategoryStatus.category_id == bindparam("category_id"),
+)
+
+# Per-house counts (params: house_id)
+HOUSE_CHECKLIST_ITEMS_COUNT = select(func.count()).select_from(ChecklistItem).where(
+    ChecklistItem.house_id == bindparam("house_id")
+)
+HOUSE_COMPLETED_TASKS_COUNT = select(func.count()).select_from(HouseChecklistStatus).where(
+    HouseChecklistStatus.house_id == bindparam("house_id"),
+    HouseChecklistStatus.is_completed == True
+)
+HOUSE_READY_CATEGORIES_COUNT = select(func.count()).select_from(HouseCategoryStatus).where(
+    HouseCategoryStatus.house_id == bindparam("house_id"),
+    HouseCategoryStatus.is_ready == True
+)
+
+# Per-house aggregates of every house at once, grouped by house_id
+HOUSE_REVENUE_TOTALS = select(FinancialOperation.house_id, func.sum(FinancialOperation.montant)).where(
+    FinancialOperation.type == "entree"
+).group_by(FinancialOperation.house_id)
+HOUSE_OPEN_MAINTENANCE_COUNTS = select(MaintenanceIssue.house_id, func.count()).where(
+    MaintenanceIssue.status == "non-resolue"
+).group_by(MaintenanceIssue.house_id)
+# Check-ins, those arrived since `since`, total nights and last departure (params: since)
+HOUSE_CHECKIN_STATS = select(
+    CheckIn.house_id,
+    func.count(),
+    func.sum(case((CheckIn.arrival_date >= bindparam("since"), 1), else_=0)),
+    func.sum(func.julianday(CheckIn.departure_date) - func.julianday(CheckIn.arrival_date)),
+    func.max(CheckIn.departure_date),
+).group_by(CheckIn.house_id)
+# Houses whose ready categories number `total_categories`
+READY_HOUSES_COUNT = select(func.count()).select_from(
+    select(HouseCategoryStatus.house_id).where(
+        HouseCategoryStatus.is_ready == True,
+        HouseCategoryStatus.house_id.in_(select(House.id)),
+    ).group_by(HouseCategoryStatus.house_id).having(func.count() == bindparam("total_categories")).subquery()
+)
+
+# Checklist progress of a house, grouped by category_id (params: house_id)
+CATEGORY_ITEMS_COUNTS = select(ChecklistItem.category_id, func.count()).where(
+    ChecklistItem.house_id == bindparam("house_id")
+).group_by(ChecklistItem.category_id)
+CATEGORY_COMPLETED_TASKS_COUNTS = select(ChecklistItem.category_id, func.count()).select_from(
+    HouseChecklistStatus
+).join(ChecklistItem).where(
+    ChecklistItem.house_id == bindparam("house_id"),
+    HouseChecklistStatus.is_completed == True
+).group_by(ChecklistItem.category_id)
+HOUSE_CATEGORY_STATUSES = select(HouseCategoryStatus).where(HouseCategoryStatus.house_id == bindparam("house_id"))
@@ -0,0 +1,272 @@
+"""
+Per-table change versions and conditional GETs.
+
+Every table has a version, taken from one process-wide sequence and bumped
+whenever a commit changed the table. ORM events record the changed tables
+the same way the analytics replica does:
+
+- `after_flush` records the table of every row a Session inserted, updated
+  or deleted, `do_orm_execute` the table of bulk statements
+- `after_commit` (outermost transaction only) bumps the recorded tables;
+  bumping at flush time would let a reader tag data it can't see yet
+
+GET routes declare the tables they read with `@etag_tables(...)`. The
+middleware tags their 200 responses with an ETag computed from those
+versions, and answers `If-None-Match` with the current tag by a bodiless
+304, before the route (or any of its dependencies) runs a query. The
+in-memory reference data (app/core/reference_data.py) is reloaded from the
+same versions.
+
+The tag also covers the request (path, query string, X-Residence), the day
+(the dashboard depends on it) and the process start: versions live in
+memory, so a restart changes every tag. Writes made outside of the API
+(migrate_data.py, raw SQL) aren't seen until then. Versions are shared by
+every residence database: a write in one residence changes the tags of the
+others too, which only costs a full response.
+"""
+
+import hashlib
+import threading
+import uuid
+from datetime import date
+from itertools import chain, count
+from typing import Callable, Dict, Iterable, Optional, Tuple, TypeVar
+
+from fastapi.routing import APIRoute
+from sqlalchemy import Table, event
+from sqlalchemy.orm import Session, object_mapper
+from starlette.routing import Match
+
+from app.core.config import settings
+from app.core.projections import NDJSON_MEDIA_TYPE, accepts_ndjson
+# Imported first so its listeners run before ours: a commit is queued for the
+# replica before its tables get a new version (see ConditionalGetMiddleware)
+from app.core.replica import get_analytics_db, replicas
+
+F = TypeVar("F", bound=Callable)
+
+_CHANGED_TABLES_KEY = "changed_tables"
+
+# Part of every tag, so tags issued before a restart never match
+_PROCESS_TAG = uuid.uuid4().hex
+
+_sequence = count(1)
+_versions: Dict[str, int] = {}
+_lock = threading.Lock()
+
+
+def etag_tables(*models, max_age: Optional[int] = None) -> Callable[[F], F]:
+    """
+    Declare the tables a GET route reads, enabling conditional requests.
+
+    Every table the response depends on must be listed, otherwise a write to
+    a missing one leaves the tag unchanged and clients keep a stale body
+    (`benchmarks/check_etag_tables.py` compares them with the statements the
+    routes run). Apply it under the route decorator:
+
+        @router.get("/")
+        @etag_tables(Reservation)
+        async def get_reservations(...):
+
+    Args:
+        *models: Mapped classes (or tables) read by the route
+        max_age: Seconds clients may reuse a response without revalidating it
+            (reference data only: a change is seen once it expires). By
+            default they revalidate every time.
+
+    Returns:
+        Decorator returning the endpoint unchanged, with `etag_tables` (and
+        `etag_max_age`) set
+    """
+    names = tuple(sorted({getattr(model, "__tablename__", None) or model.name for model in models}))
+
+    def declare(endpoint: F) -> F:
+        endpoint.etag_tables = names
+        endpoint.etag_max_age = max_age
+        return endpoint
+    return declare
+
+
+def table_versions(names: Iterable[str]) -> Tuple[int, ...]:
+    """Current version of each table (0 when unchanged since startup)."""
+    return tuple(_versions.get(name, 0) for name in names)
+
+
+def bump_tables(names: Iterable[str]) -> None:
+    """Give the tables a new version, as after a commit changing them."""
+    with _lock:
+        version = next(_sequence)
+        for name in names:
+            _versions[name] = version
+
+
+def _changed_tables(session: Session) -> set:
+    changed = session.info.get(_CHANGED_TABLES_KEY)
+    if changed is None:
+        changed = session.info[_CHANGED_TABLES_KEY] = set()
+    return changed
+
+
+def _record_flush(session: Session, flush_context) -> None:
+    changed = _changed_tables(session)
+    for instance in chain(session.new, session.dirty, session.deleted):
+        changed.add(object_mapper(instance).local_table.name)
+
+
+def _record_bulk_statement(orm_execute_state) -> None:
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = orm_execute_state.statement.table
+    if isinstance(table, Table):
+        # Archive tables share the name of the hot table they are read with
+        _changed_tables(orm_execute_state.session).add(table.name)
+
+
+def _bump_committed(session: Session) -> None:
+    if session.in_nested_transaction():
+        return  # SAVEPOINT released, the outer transaction may still roll back
+    changed = session.info.pop(_CHANGED_TABLES_KEY, None)
+    if changed:
+        bump_tables(changed)
+
+
+def _discard_changes(session: Session, transaction) -> None:
+    # The outermost transaction ended without a commit (rollback or close)
+    if transaction.parent is None:
+        session.info.pop(_CHANGED_TABLES_KEY, None)
+
+
+if settings.ETAG_ENABLED or settings.REFERENCE_CACHE_ENABLED:
+    # Class-level listeners: every Session (sync, async, writer queue) is tracked
+    event.listen(Session, "after_flush", _record_flush)
+    event.listen(Session, "do_orm_execute", _record_bulk_statement)
+    event.listen(Session, "after_commit", _bump_committed)
+    event.listen(Session, "after_transaction_end", _discard_changes)
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def request_etag(scope, tables: Tuple[str, ...]) -> str:
+    """
+    Weak ETag of a GET request on routes reading `tables`.
+
+    Weak, since the body may be compressed differently for the same data.
+
+    Args:
+        scope: ASGI scope of the request
+        tables: Tables read by the route
+
+    Returns:
+        Quoted tag, e.g. W/"5f0c..."
+    """
+    digest = hashlib.blake2b(digest_size=12)
+    for part in (
+        _PROCESS_TAG,
+        date.today().isoformat(),
+        scope["path"],
+        scope.get("query_string", b"").decode("latin-1"),
+        _header(scope, b"x-residence") or "",
+        ",".join(f"{name}={version}" for name, version in zip(tables, table_versions(tables))),
+    ):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    if accepts_ndjson(_header(scope, b"accept")):
+        # Same rows as the JSON list, another representation
+        digest.update(NDJSON_MEDIA_TYPE.encode())
+    return f'W/"{digest.hexdigest()}"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    # Weak comparison: W/ prefixes are ignored
+    opaque = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque:
+            return True
+    return False
+
+
+def _reads_analytics_replica(route: APIRoute) -> bool:
+    dependants = [route.dependant]
+    while dependants:
+        dependant = dependants.pop()
+        if dependant.call is get_analytics_db:
+            return True
+        dependants.extend(dependant.dependencies)
+    return False
+
+
+class ConditionalGetMiddleware:
+    """
+    ASGI middleware answering conditional GETs of the `@etag_tables` routes.
+
+    Adds `ETag` and `Cache-Control: no-cache` (always revalidate), or the
+    route's `max-age`, to their 200 responses, and answers a matching
+    `If-None-Match` with a 304 without calling the route. Routes reading
+    the analytics replica get no tag while it has commits to apply: their
+    versions are already bumped, their data not yet. Install it inside
+    CORSMiddleware, so 304s carry CORS headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._analytics_endpoints: Dict[Callable, bool] = {}
+
+    def _route(self, scope) -> Optional[APIRoute]:
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route if isinstance(route, APIRoute) else None
+        return None
+
+    def _etag(self, scope) -> Optional[Tuple[str, Optional[int]]]:
+        route = self._route(scope)
+        tables = getattr(route.endpoint, "etag_tables", None) if route is not None else None
+        if tables is None:
+            return None
+        # Computed before the route reads anything: a commit landing in between
+        # at worst gives fresh data an old tag, which the next request corrects
+        etag = request_etag(scope, tables)
+
+        if route.endpoint not in self._analytics_endpoints:
+            self._analytics_endpoints[route.endpoint] = _reads_analytics_replica(route)
+        # Checked after the tag: a commit is queued for the replica before its
+        # versions are bumped, so a tag including it sees it pending
+        if self._analytics_endpoints[route.endpoint] and not all(replica.up_to_date for replica in replicas.values()):
+            return None
+        return etag, route.endpoint.etag_max_age
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        tagged = self._etag(scope)
+        if tagged is None:
+            await self.app(scope, receive, send)
+            return
+
+        etag, max_age = tagged
+        if max_age is None:
+            headers = [(b"etag", etag.encode()), (b"cache-control", b"no-cache")]
+        else:
+            # Reused as is until it expires, so caches must keep one per residence
+            headers = [(b"etag", etag.encode()), (b"cache-control", f"max-age={max_age}".encode()),
+                       (b"vary", b"X-Residence")]
+        if_none_match = _header(scope, b"if-none-match")
+        if if_none_match is not None and _matches(if_none_match, etag):
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_etag(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                message["headers"] = list(message.get("headers", [])) + headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
@@ -0,0 +1,324 @@
+"""
+Single-writer commit queue.
+
+SQLite allows one writer at a time. Instead of letting every request
+thread race for the write lock, routes hand a unit of work (a function
+taking a sync Session) to one dedicated writer thread. The writer drains
+the queue in batches, runs each unit inside its own SAVEPOINT and commits
+the whole batch at once (group commit), then hands every caller its own
+result or exception.
+"""
+
+import asyncio
+import contextvars
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from fastapi import Depends, Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.core.database import (
+    PoolMetrics,
+    apply_sqlite_pragmas,
+    get_async_db,
+    pool_metrics,
+    shard_router,
+    shards,
+    sqlite_pragmas,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+UnitOfWork = Callable[[Session], T]
+Job = Tuple[UnitOfWork, Future, contextvars.Context]
+
+_STOP = object()
+
+
+def create_writer_engine(database_url: str):
+    """
+    Create the engine used by the writer thread.
+    
+    pysqlite normally defers BEGIN until the first DML statement, which
+    breaks SAVEPOINTs nested in a batch. The driver's own transaction
+    handling is disabled and SQLAlchemy emits BEGIN IMMEDIATE itself, so
+    the batch holds the write lock from its first statement.
+    """
+    writer_engine = create_engine(
+        database_url,
+        connect_args={"check_same_thread": False},
+        echo=settings.DATABASE_ECHO,
+        query_cache_size=settings.DATABASE_QUERY_CACHE_SIZE,
+        pool_size=1,
+        max_overflow=0,
+    )
+    apply_sqlite_pragmas(writer_engine, sqlite_pragmas())
+
+    @event.listens_for(writer_engine, "connect")
+    def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(writer_engine, "begin")
+    def _begin_immediate(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return writer_engine
+
+
+class WriteQueue:
+    """
+    Serializes database writes through one dedicated writer thread.
+    
+    Units of work are plain functions taking a sync Session. They must not
+    commit; the writer commits once per batch.
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        max_batch: int = 64,
+        max_wait: float = 0.002,
+        name: str = "sqlite-writer",
+    ):
+        self._session_factory = session_factory
+        self._name = name
+        self._max_batch = max_batch
+        self._max_wait = max_wait
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start the writer thread (no-op if already running)."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 10.0) -> None:
+        """Finish the queued work, then stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def submit(self, work: UnitOfWork) -> Future:
+        """
+        Queue a unit of work.
+        
+        Args:
+            work: Function receiving the writer's Session
+            
+        Returns:
+            Future resolved with the function's return value once committed
+        """
+        self.start()
+        future: Future = Future()
+        # The unit runs in the caller's context so per-request state (e.g. SQL stats) follows it
+        self._queue.put((work, future, contextvars.copy_context()))
+        return future
+
+    async def run(self, work: UnitOfWork) -> T:
+        """Queue a unit of work and await its committed result."""
+        return await asyncio.wrap_future(self.submit(work))
+
+    def _next_batch(self, first) -> Tuple[List[Job], bool]:
+        batch, stop = [first], False
+        deadline = time.monotonic() + self._max_wait
+        while len(batch) < self._max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                job = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is _STOP:
+                stop = True
+                break
+            batch.append(job)
+        return batch, stop
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch, stop = self._next_batch(first)
+            self._commit_batch(batch)
+            if stop:
+                return
+
+    def _commit_batch(self, batch: List[Job]) -> None:
+        jobs = [job for job in batch if job[1].set_running_or_notify_cancel()]
+        outcomes: List[Tuple[Future, Any, Optional[BaseException]]] = []
+        session = self._session_factory()
+        try:
+            for work, future, context in jobs:
+                savepoint = session.begin_nested()
+                try:
+                    result = context.run(work, session)
+                    context.run(session.flush)
+                    savepoint.commit()
+                    outcomes.append((future, result, None))
+                except Exception as exc:
+                    savepoint.rollback()
+                    outcomes.append((future, None, exc))
+            session.commit()
+        except Exception as exc:
+            logger.exception("Write batch of %d unit(s) failed to commit", len(jobs))
+            session.rollback()
+            # Units that failed on their own keep their error, the rest get the batch error
+            failed = {future: error for future, _, error in outcomes if error is not None}
+            outcomes = [(future, None, failed.get(future, exc)) for _, future, _ in jobs]
+        finally:
+            session.close()
+
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+class SessionWriter:
+    """
+    Runs units of work directly on a request's AsyncSession.
+    
+    Same interface as WriteQueue, used when the queue is disabled.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def run(self, work: UnitOfWork) -> T:
+        try:
+            result = await self.db.run_sync(work)
+            await self.db.commit()
+            return result
+        except Exception:
+            await self.db.rollback()
+            raise
+
+
+class BatchAborted(Exception):
+    """Raised in the writer thread to roll a batch transaction back."""
+
+
+class BatchTransaction:
+    """
+    Runs the units of work of several requests in one transaction (/batch).
+    
+    Same interface as WriteQueue for the routes. The whole batch is one unit
+    of work of the residence's write queue: while it is open, the writer
+    thread runs the calls sent to it one at a time on the batch's Session,
+    then commits them once on close (or rolls them all back). Each operation
+    of the batch gets its own SAVEPOINT, so a failed one can be undone alone.
+    
+    The writer thread (hence every other write of the residence) waits for
+    the batch in between its operations: batches must stay short.
+    """
+
+    # Longest wait for the next call before the writer gives the batch up
+    IDLE_TIMEOUT = 30.0
+
+    def __init__(self, writer: WriteQueue):
+        self._writer = writer
+        self._calls: "queue.Queue" = queue.Queue()
+        self._done: Optional[Future] = None
+        self._savepoint = None
+
+    def open(self) -> None:
+        """Take the writer thread for the batch."""
+        self._done = self._writer.submit(self._serve)
+
+    async def close(self, commit: bool) -> bool:
+        """
+        End the batch.
+        
+        Args:
+            commit: Commit what the kept operations wrote, otherwise roll everything back
+            
+        Returns:
+            Whether the batch was committed
+        """
+        self._calls.put(commit)
+        try:
+            await asyncio.wrap_future(self._done)
+        except BatchAborted:
+            return False
+        return commit
+
+    async def begin_operation(self) -> None:
+        """Open the SAVEPOINT of the next operation."""
+        self._savepoint = await self._call(lambda session: session.begin_nested())
+
+    async def end_operation(self, keep: bool) -> None:
+        """Release the operation's SAVEPOINT, or roll it back if `keep` is false."""
+        savepoint, self._savepoint = self._savepoint, None
+        await self._call(lambda session: savepoint.commit() if keep else savepoint.rollback())
+
+    async def run(self, work: UnitOfWork) -> T:
+        """Run a unit of work in the batch's transaction (committed on close)."""
+        def unit(session: Session) -> T:
+            result = work(session)
+            session.flush()
+            return result
+        return await self._call(unit)
+
+    async def _call(self, function: Callable[[Session], T]) -> T:
+        future: Future = Future()
+        self._calls.put((function, future, contextvars.copy_context()))
+        return await asyncio.wrap_future(future)
+
+    def _serve(self, session: Session) -> None:
+        # Unit of work of the write queue, run by the writer thread
+        while True:
+            try:
+                call = self._calls.get(timeout=self.IDLE_TIMEOUT)
+            except queue.Empty:
+                raise BatchAborted("Batch left open for too long")
+            if isinstance(call, bool):
+                if not call:
+                    raise BatchAborted("Batch rolled back")
+                return
+            function, future, context = call
+            try:
+                future.set_result(context.run(function, session))
+            except Exception as exc:
+                future.set_exception(exc)
+
+
+# One writer thread per residence database: residences don't share a write lock
+write_queues: Dict[str, WriteQueue] = {}
+for shard in shards.values():
+    shard_writer_engine = create_writer_engine(shard.database_url)
+    pool_metrics.append(PoolMetrics(shard.pool_name("writer"), shard_writer_engine))
+    write_queues[shard.name] = WriteQueue(
+        sessionmaker(bind=shard_writer_engine, autoflush=False, expire_on_commit=False),
+        max_batch=settings.WRITE_QUEUE_MAX_BATCH,
+        max_wait=settings.WRITE_QUEUE_MAX_WAIT_MS / 1000,
+        name=shard.pool_name("sqlite-writer"),
+    )
+
+# Writer of the default residence database
+write_queue = write_queues[settings.DEFAULT_RESIDENCE]
+
+
+# Dependency for routes that opt in to serialized writes
+async def get_writer(request: Request, db: AsyncSession = Depends(get_async_db)):
+    # Operation of a /batch request: written in the batch's transaction
+    batch = request.scope.get("batch")
+    if batch is not None:
+        return batch
+    if settings.WRITE_QUEUE_ENABLED:
+        shard = await shard_router.resolve(request)
+        return write_queues[shard.name]
+    return SessionWriter(db)
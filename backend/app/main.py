@@ -1,14 +1,38 @@
+import asyncio
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api.v1.router import api_router
+from app.core.query_stats import QueryStatsMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core.table_versions import ConditionalGetMiddleware
+from app.core.idempotency import IdempotencyMiddleware, idempotency_stores
+from app.core.reference_data import load_reference_data
+from app.core.database import Base, shard_router
+from app.services.archive_service import ArchiveService
+from app.core.write_queue import write_queues
+from app.core.replica import replicas
+from app.core.change_log import change_logs, compact_change_logs_periodically
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
     description="ResidenceManager API - Système de gestion de résidences",
+    # orjson encodes the validated response (dates included) in a single C call
+    default_response_class=ORJSONResponse,
 )
 
+# ETag / 304 on the GET routes declaring their tables; added first, so it runs
+# inside CORSMiddleware and 304s get the CORS headers too
+if settings.ETAG_ENABLED:
+    app.add_middleware(ConditionalGetMiddleware)
+
+# Responses replayed to the retries of POSTs sent with an Idempotency-Key; inside
+# CompressionMiddleware, so the stored bodies are uncompressed
+if settings.IDEMPOTENCY_ENABLED:
+    app.add_middleware(IdempotencyMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -18,9 +42,94 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip / Brotli for the clients accepting it (bodies of COMPRESSION_MIN_SIZE+ bytes)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        gzip_levels=settings.GZIP_LEVELS,
+        brotli_levels=settings.BROTLI_LEVELS,
+    )
+
+# SQL statement count / DB time per request (Server-Timing header + log line)
+if settings.SQL_METRICS_ENABLED:
+    app.add_middleware(QueryStatsMiddleware, n_plus_one_threshold=settings.SQL_N_PLUS_ONE_THRESHOLD)
+
 # Include API routes
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+@app.on_event("startup")
+async def open_archive_databases():
+    # The read-only connections attach the archive with mode=ro, so it must exist first
+    if settings.ARCHIVE_ENABLED:
+        for shard in shard_router.shards.values():
+            db = shard.SessionLocal()
+            try:
+                ArchiveService(db).ensure_schema()
+            finally:
+                db.close()
+
+@app.on_event("startup")
+async def open_residence_databases():
+    if shard_router.sharded:
+        # New residence files get the schema (the default database is set up by
+        # migrate_data.py and Alembic), then houses are mapped to their residence
+        for shard in shard_router.shards.values():
+            if not shard.primary:
+                Base.metadata.create_all(bind=shard.engine)
+        await shard_router.refresh_house_index()
+
+@app.on_event("startup")
+async def load_reference_tables():
+    # Houses, checklist categories and maintenance types, served from memory
+    await load_reference_data()
+
+@app.on_event("startup")
+async def load_analytics_replicas():
+    # Copies every residence database to memory before the first request
+    for replica in replicas.values():
+        await asyncio.to_thread(replica.start)
+
+@app.on_event("startup")
+async def start_change_logs():
+    # Writes are logged once the change log tables are found in the database
+    for change_log in change_logs.values():
+        await asyncio.to_thread(change_log.start)
+    if change_logs:
+        app.state.change_log_compactor = asyncio.create_task(
+            compact_change_logs_periodically(settings.CHANGE_LOG_COMPACT_INTERVAL)
+        )
+
+@app.on_event("startup")
+async def start_idempotency_stores():
+    # Idempotency-Key is honoured once the idempotency_keys table is found in the database
+    for store in idempotency_stores.values():
+        await asyncio.to_thread(store.start)
+
+@app.on_event("startup")
+async def start_write_queue():
+    if settings.WRITE_QUEUE_ENABLED:
+        for queue in write_queues.values():
+            queue.start()
+
+@app.on_event("shutdown")
+async def stop_change_log_compactor():
+    # Before the write queues stop: a compaction may be waiting on one
+    compactor = getattr(app.state, "change_log_compactor", None)
+    if compactor is not None:
+        compactor.cancel()
+
+@app.on_event("shutdown")
+async def stop_write_queue():
+    # Commit whatever is still queued before the process exits
+    for queue in write_queues.values():
+        queue.stop()
+
+@app.on_event("shutdown")
+async def stop_analytics_replicas():
+    for replica in replicas.values():
+        replica.stop()
+
 @app.get("/")
 async def root():
     return {"message": "ResidenceManager API", "version": settings.VERSION}
@@ -6,6 +6,8 @@ from .checkin import CheckIn, CheckOut, InventoryItem
 from .checklist import ChecklistCategory, ChecklistItem, HouseChecklistStatus, HouseCategoryStatus, TaskCompletionLog
 from .maintenance import MaintenanceIssue, MaintenanceType, MaintenanceStatusLog
 from .finance import FinancialOperation, FileAttachment
+from .idempotency import IdempotencyKey
+from .change_log import ChangeLogEntry, ChangeLogCompaction
 
 __all__ = [
     "User",
@@ -30,4 +32,7 @@ __all__ = [
     "MaintenanceStatusLog",
     "FinancialOperation",
     "FileAttachment",
+    "IdempotencyKey",
+    "ChangeLogEntry",
+    "ChangeLogCompaction",
 ]
\ No newline at end of file
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Float, Index, Integer, String
+from app.core.database import Base
+
+
+class ChangeLogEntry(Base):
+    """A row written by a commit, for the change feed (see app/core/change_log.py)."""
+    __tablename__ = "change_log"
+    __table_args__ = (
+        # Latest entry of each row, kept by compaction
+        Index("ix_change_log_table_name_row_id_seq", "table_name", "row_id", "seq"),
+        Index("ix_change_log_created_at", "created_at"),
+        # AUTOINCREMENT: sequence numbers are never reused, even once compacted away.
+        # Bookkeeping of this database, not replicated (app/core/replica.py)
+        {"sqlite_autoincrement": True, "info": {"replicated": False}},
+    )
+
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    table_name = Column(String, nullable=False)
+    row_id = Column(String)  # Null for 'reload': the whole table changed
+    op = Column(String, nullable=False)  # 'upsert', 'delete', 'reload'
+    created_at = Column(Float, nullable=False)  # Unix time
+
+
+class ChangeLogCompaction(Base):
+    """A compaction of the change log: entries up to `compacted_through` are gone."""
+    __tablename__ = "change_log_compactions"
+    __table_args__ = {"info": {"replicated": False}}
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    compacted_through = Column(Integer, nullable=False)  # Highest sequence number removed
+    removed_entries = Column(Integer, nullable=False)
+    compacted_at = Column(Float, nullable=False)  # Unix time
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Date, Float, DateTime, ForeignKey, JSON, Integer
+from sqlalchemy import Column, String, Date, Float, DateTime, ForeignKey, JSON, Integer, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -13,6 +13,15 @@ class CheckIn(Base):
     and the inventory status at the time of check-in.
     """
     __tablename__ = "checkins"
+    __table_args__ = (
+        # Listing pages (newest first, see app/utils/pagination.py)
+        Index("ix_checkins_house_id_arrival_date_id", "house_id", "arrival_date", "id"),
+        Index("ix_checkins_house_id_departure_date", "house_id", "departure_date"),
+        # Arrivals on a date / stays spanning a date (dashboard, occupancy)
+        Index("ix_checkins_arrival_date_departure_date", "arrival_date", "departure_date"),
+        Index("ix_checkins_departure_date", "departure_date"),
+        Index("ix_checkins_reservation_id", "reservation_id"),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     reservation_id = Column(String, ForeignKey("reservations.id"), nullable=False)
@@ -43,6 +52,12 @@ class CheckOut(Base):
     This model tracks when guests leave and triggers the house readiness process.
     """
     __tablename__ = "checkouts"
+    __table_args__ = (
+        Index("ix_checkouts_checkin_id", "checkin_id"),
+        # Listing pages (newest first, see app/utils/pagination.py)
+        Index("ix_checkouts_house_id_checkout_date_id", "house_id", "checkout_date", "id"),
+        Index("ix_checkouts_checkout_date_id", "checkout_date", "id"),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     checkin_id = Column(String, ForeignKey("checkins.id"), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -18,6 +18,12 @@ class ChecklistCategory(Base):
 
 class ChecklistItem(Base):
     __tablename__ = "checklist_items"
+    __table_args__ = (
+        # Listing pages, in (step, rowid) order: SQLite ends every index with the rowid
+        Index("ix_checklist_items_house_id_step_number", "house_id", "step_number"),
+        Index("ix_checklist_items_step_number", "step_number"),
+        Index("ix_checklist_items_category_id", "category_id"),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     house_id = Column(String, ForeignKey("houses.id"), nullable=False)
@@ -36,6 +42,10 @@ class ChecklistItem(Base):
 
 class HouseChecklistStatus(Base):
     __tablename__ = "house_checklist_status"
+    __table_args__ = (
+        Index("ix_house_checklist_status_house_id_item_id", "house_id", "item_id"),
+        Index("ix_house_checklist_status_item_id", "item_id"),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     house_id = Column(String, ForeignKey("houses.id"), nullable=False)
@@ -52,6 +62,9 @@ class HouseChecklistStatus(Base):
 
 class HouseCategoryStatus(Base):
     __tablename__ = "house_category_status"
+    __table_args__ = (
+        Index("ix_house_category_status_house_id_category_id", "house_id", "category_id"),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     house_id = Column(String, ForeignKey("houses.id"), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Date, Float, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, String, Date, Float, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -13,6 +13,19 @@ class FinancialOperation(Base):
     to enable automatic synchronization when related records are updated/deleted.
     """
     __tablename__ = "financial_operations"
+    __table_args__ = (
+        # Per-house totals and listings, optionally by type and period
+        Index("ix_financial_operations_house_id_type_date", "house_id", "type", "date"),
+        # Revenue / expenses over a period (dashboard)
+        Index("ix_financial_operations_type_date", "type", "date"),
+        # Listing pages (newest first, see app/utils/pagination.py)
+        Index("ix_financial_operations_house_id_date_id", "house_id", "date", "id"),
+        Index("ix_financial_operations_date_id", "date", "id"),
+        # Lookups when the source reservation / check-in / issue changes
+        Index("ix_financial_operations_reservation_id", "reservation_id"),
+        Index("ix_financial_operations_checkin_id", "checkin_id"),
+        Index("ix_financial_operations_maintenance_id", "maintenance_id"),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     date = Column(Date, nullable=False)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Float, Integer, LargeBinary, String
+from app.core.database import Base
+
+
+class IdempotencyKey(Base):
+    """Response to a POST sent with an Idempotency-Key header, replayed to its retries."""
+    __tablename__ = "idempotency_keys"
+    # Bookkeeping of this database, not replicated (app/core/replica.py)
+    __table_args__ = {"info": {"replicated": False}}
+
+    key = Column(String, primary_key=True)  # Idempotency-Key header, chosen by the client
+    fingerprint = Column(LargeBinary, nullable=False)  # Digest of method, path and body (16 bytes)
+    status_code = Column(Integer, nullable=False)
+    content_type = Column(String, nullable=True)
+    body = Column(LargeBinary, nullable=False)
+    expires_at = Column(Float, nullable=False, index=True)  # Unix time
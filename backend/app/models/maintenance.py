@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Date, Float, DateTime, ForeignKey
+from sqlalchemy import Column, String, Date, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -17,6 +17,14 @@ class MaintenanceType(Base):
 
 class MaintenanceIssue(Base):
     __tablename__ = "maintenance_issues"
+    __table_args__ = (
+        # Open issues (newest first) and per-house open issue counts
+        Index("ix_maintenance_issues_status_reported_at", "status", "reported_at"),
+        Index("ix_maintenance_issues_house_id_status", "house_id", "status"),
+        # Listing pages (newest first, see app/utils/pagination.py)
+        Index("ix_maintenance_issues_house_id_reported_at_id", "house_id", "reported_at", "id"),
+        Index("ix_maintenance_issues_reported_at_id", "reported_at", "id"),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     house_id = Column(String, ForeignKey("houses.id"), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Date, Float, DateTime, ForeignKey
+from sqlalchemy import Column, String, Date, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -7,6 +7,13 @@ import uuid
 
 class Reservation(Base):
     __tablename__ = "reservations"
+    __table_args__ = (
+        # Listing pages (newest first, see app/utils/pagination.py) and availability checks
+        Index("ix_reservations_house_id_checkin_date_id", "house_id", "checkin_date", "id"),
+        Index("ix_reservations_checkin_date_id", "checkin_date", "id"),
+        # Dashboard count of reservations with an advance payment
+        Index("ix_reservations_advance_paid", "advance_paid"),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     house_id = Column(String, ForeignKey("houses.id"), nullable=False)
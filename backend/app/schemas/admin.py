@@ -0,0 +1,127 @@
+from pydantic import BaseModel
+from datetime import date, datetime
+from typing import Any, List, Optional
+
+
+class PoolStats(BaseModel):
+    """
+    Connection pool metrics for one database engine.
+    
+    Gauges come from the pool itself, counters from pool events.
+    """
+    name: str  # 'sync', 'async', 'read', 'writer' (suffixed ':<residence>' for other residences)
+    poolClass: str
+    size: Optional[int] = None  # Configured pool size
+    checkedOut: int  # Connections currently in use
+    checkedIn: Optional[int] = None  # Idle connections kept in the pool
+    overflow: Optional[int] = None  # Connections opened beyond the pool size
+    peakCheckedOut: int  # Highest number of connections in use at once
+    connects: int  # New DBAPI connections opened
+    checkouts: int
+    checkins: int
+
+
+class SlowQueryStats(BaseModel):
+    """
+    Aggregated slow executions of one statement shape.
+    
+    `parameters` are those of the slowest execution, `plan` is the
+    EXPLAIN QUERY PLAN output ("id|parent|detail" rows).
+    """
+    statement: str
+    count: int  # Executions above the threshold
+    totalMs: float
+    avgMs: float
+    maxMs: float
+    parameters: Optional[Any] = None
+    plan: List[str] = []
+    lastSeen: datetime
+
+
+class ArchiveStatus(BaseModel):
+    """
+    Archival state of one table of one residence database.
+    
+    Rows dated before `archivedBefore` may live in the archive database;
+    `moved` is only set in the response of an archival run.
+    """
+    residence: str
+    table: str
+    archivedBefore: Optional[date] = None
+    rowsArchived: int = 0
+    updatedAt: Optional[datetime] = None
+    moved: Optional[int] = None  # Rows moved by this run
+
+
+class BackupSnapshot(BaseModel):
+    """
+    One verified snapshot file.
+    
+    `durationMs` and `restarts` (backup copies restarted because the source
+    was written to) are only known for snapshots of the last run.
+    """
+    database: str  # Residence name, '<residence>.archive' for its archive database
+    file: str
+    sizeBytes: int
+    createdAt: datetime
+    durationMs: Optional[float] = None
+    restarts: Optional[int] = None
+
+
+class BackupStatus(BaseModel):
+    """State of the snapshot runs of this process and the snapshots on disk."""
+    running: bool
+    startedAt: Optional[datetime] = None
+    finishedAt: Optional[datetime] = None
+    error: Optional[str] = None
+    lastRun: List[BackupSnapshot] = []
+    snapshots: List[BackupSnapshot] = []
+
+
+class ReplicaStatus(BaseModel):
+    """
+    State of the in-memory analytics replica of one residence database.
+    
+    `lagMs` is the age of the oldest commit not applied yet (0 when up to
+    date); `lastLagMs` / `maxLagMs` are commit-to-applied delays.
+    """
+    residence: str
+    ready: bool  # False: analytics reads go to the residence database
+    loadedAt: Optional[datetime] = None
+    loadMs: Optional[float] = None
+    pendingCommits: int
+    lagMs: float
+    lastLagMs: float
+    maxLagMs: float
+    appliedCommits: int
+    lastAppliedAt: Optional[datetime] = None
+    error: Optional[str] = None
+
+
+class ReplicaCheck(BaseModel):
+    """Comparison of one table of an analytics replica with its residence database."""
+    residence: str
+    table: str
+    consistent: bool
+    replicaRows: int
+    sourceRows: int
+    missingRows: int  # Rows of the residence database missing or outdated in the replica
+    staleRows: int  # Rows of the replica not in the residence database
+
+
+class ChangeLogCompactionResult(BaseModel):
+    """Entries removed by a compaction of a change log."""
+    superseded: int  # Entries followed by a later one of the same row
+    expired: int  # Latest entries older than CHANGE_LOG_RETENTION
+    compactedThrough: int  # Clients behind this sequence number must resync
+    compactedAt: datetime
+
+
+class ChangeLogStatus(BaseModel):
+    """Size and sequence numbers of the change log of one residence database."""
+    residence: str
+    ready: bool  # False: the database has no change log tables (run Alembic)
+    entries: int = 0
+    lastSeq: int = 0
+    compactedThrough: int = 0
+    lastCompaction: Optional[ChangeLogCompactionResult] = None  # Since startup
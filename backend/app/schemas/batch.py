@@ -0,0 +1,46 @@
+from pydantic import BaseModel, Field
+from typing import Any, List, Literal, Optional
+
+
+class BatchOperation(BaseModel):
+    """
+    One operation of a batch: a write request to the API, as sent on its own.
+
+    A string value of the payload written "$<index>.<field>" is replaced by
+    that field of an earlier operation's response, e.g. "$0.id" for the id
+    of the reservation created first.
+    """
+    method: Literal["POST", "PUT", "PATCH", "DELETE"]
+    resource: str  # Path under /api/v1, e.g. '/checklist/status/maison-1/complete'
+    payload: Optional[Any] = None  # JSON body
+
+
+class BatchRequest(BaseModel):
+    """
+    Schema for batch requests.
+
+    `all-or-nothing` commits every operation or none of them (the first
+    failure rolls the batch back and skips the rest); `best-effort` rolls
+    back the failed operations only and commits the others.
+    """
+    mode: Literal["all-or-nothing", "best-effort"] = "all-or-nothing"
+    operations: List[BatchOperation] = Field(min_length=1)
+
+
+class BatchOperationResult(BaseModel):
+    """
+    Outcome of one operation of a batch.
+
+    `status` and `body` are those the operation would have got on its own;
+    an operation skipped after a failure gets 424 (Failed Dependency).
+    """
+    status: int
+    body: Optional[Any] = None
+    committed: bool  # Whether its changes were committed
+
+
+class BatchResponse(BaseModel):
+    """Schema for batch responses, with one result per operation, in order."""
+    mode: str
+    committed: bool  # Whether the batch transaction was committed
+    results: List[BatchOperationResult]
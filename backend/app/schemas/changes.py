@@ -0,0 +1,33 @@
+from pydantic import BaseModel
+from typing import Any, Dict, List, Literal, Optional
+
+
+class Change(BaseModel):
+    """
+    One changed row of the change feed.
+
+    `upsert` carries the current row, as its list endpoint returns it;
+    `delete` is a tombstone: the row no longer exists. `reload` has no id:
+    the whole table changed (archival) and must be fetched again from its
+    list endpoint.
+    """
+    seq: int
+    table: str
+    id: Optional[str] = None
+    op: Literal["upsert", "delete", "reload"]
+    row: Optional[Dict[str, Any]] = None
+
+
+class ChangeFeed(BaseModel):
+    """
+    Schema for change feed responses (see app/core/change_log.py).
+
+    Pass `lastSeq` back as `?since=` for the next call. When
+    `resyncRequired` is true the changes since that sequence number are no
+    longer known: fetch the lists again, then follow the feed from the
+    `lastSeq` returned here.
+    """
+    lastSeq: int
+    resyncRequired: bool = False
+    hasMore: bool = False  # More changes after lastSeq: call again right away
+    changes: List[Change] = []
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, Field, validator
 from typing import Optional, Dict, Any
 from datetime import date
 
@@ -103,13 +103,32 @@ class CheckInResponse(CheckInBase):
     """
     Schema for check-in API responses.
     
-    Includes the ID and maintains frontend field naming.
+    Includes the ID and maintains frontend field naming. Validation aliases
+    are the CheckIn column names, so a row or entity maps straight onto the
+    schema (see app.core.projections).
     """
     id: str
-    reservationId: Optional[str] = None
+    maison: str = Field(validation_alias="house_id")
+    nom: str = Field(validation_alias="guest_name")
+    telephone: str = Field("", validation_alias="phone")
+    dateArrivee: date = Field(validation_alias="arrival_date")  # Serialized as YYYY-MM-DD
+    dateDepart: date = Field(validation_alias="departure_date")
+    avancePaye: float = Field(0.0, validation_alias="advance_paid")
+    paiementCheckin: float = Field(0.0, validation_alias="checkin_payment")
+    montantTotal: float = Field(validation_alias="total_amount")
+    inventaire: InventaireType = Field(validation_alias="inventory")
+    responsable: str = Field(validation_alias="manager")
+    remarques: str = Field("", validation_alias="remarks")
+    reservationId: Optional[str] = Field(None, validation_alias="reservation_id")
+
+    @validator('inventaire', pre=True)
+    def ensure_inventory(cls, v):
+        # Check-ins saved without an inventory get an empty one
+        return v or {}
 
     class Config:
         from_attributes = True
+        populate_by_name = True
 
 
 class CheckOutBase(BaseModel):
@@ -143,13 +162,27 @@ class CheckOutUpdate(BaseModel):
 class CheckOutResponse(CheckOutBase):
     """
     Schema for check-out API responses.
+
+    Validation aliases are the CheckOut column names, so a row or entity
+    maps straight onto the schema (see app.core.projections).
     """
     id: str
-    checkinId: str
-    maison: str
+    nom: str = Field(validation_alias="guest_name")
+    dateDepart: date = Field(validation_alias="checkout_date")  # Serialized as YYYY-MM-DD
+    inventaireSortie: Optional[InventaireType] = Field(None, validation_alias="checkout_inventory")
+    notesDommages: Optional[str] = Field(None, validation_alias="damages_notes")
+    responsable: str = Field(validation_alias="manager")
+    checkinId: str = Field(validation_alias="checkin_id")
+    maison: str = Field(validation_alias="house_id")
+
+    @validator('inventaireSortie', pre=True)
+    def ensure_inventory(cls, v):
+        # Check-outs saved without an inventory have none
+        return v or None
 
     class Config:
         from_attributes = True
+        populate_by_name = True
 
 
 # Internal schemas for database operations
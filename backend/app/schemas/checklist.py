@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, validator
 from typing import Optional, List
 from datetime import datetime
 
@@ -57,12 +57,25 @@ class ChecklistItemResponse(ChecklistItemBase):
     """
     Schema for checklist item API responses.
     
-    Includes the ID and maintains all frontend field names.
+    Includes the ID and maintains all frontend field names. Validation
+    aliases are the ChecklistItem column names (`category_name` being the
+    joined category's name), so a row maps straight onto the schema (see
+    app.core.projections).
     """
     id: str
+    maison: str = Field(validation_alias="house_id")
+    etape: int = Field(validation_alias="step_number")
+    categorie: str = Field(validation_alias="category_name")
+    produitAUtiliser: str = Field(validation_alias="product_required")
+
+    @validator('categorie', 'produitAUtiliser', pre=True)
+    def ensure_string_fields(cls, v):
+        # Items without a category or product get an empty string
+        return v or ""
 
     class Config:
         from_attributes = True
+        populate_by_name = True
 
 
 class HouseChecklistStatusBase(BaseModel):
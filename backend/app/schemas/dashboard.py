@@ -34,7 +34,7 @@ class RevenueDataPoint(BaseModel):
     
     Matches the exact format expected by the frontend charts.
     """
-    jour: str  # YYYY-MM-DD format
+    jour: date  # Serialized as YYYY-MM-DD
     revenus: float  # Revenue amount for the day
 
 
@@ -72,7 +72,7 @@ class HouseStats(BaseModel):
     occupancyRate: float  # Percentage
     maintenanceIssues: int
     averageStayDuration: float  # Days
-    lastCheckout: Optional[str] = None  # YYYY-MM-DD format
+    lastCheckout: Optional[date] = None  # Serialized as YYYY-MM-DD
 
 
 class PeriodStats(BaseModel):
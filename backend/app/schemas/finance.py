@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import date, datetime
 
@@ -53,16 +53,22 @@ class FinancialOperationResponse(FinancialOperationBase):
     """
     Schema for financial operation API responses.
     
-    Includes the ID and foreign key references.
+    Includes the ID and foreign key references. Validation aliases are the
+    FinancialOperation column names, so a row or entity maps straight onto
+    the schema (see app.core.projections).
     """
     id: str
+    date: date  # Serialized as YYYY-MM-DD
+    maison: str = Field(validation_alias="house_id")
+    pieceJointe: Optional[str] = Field(None, validation_alias="piece_jointe")
     # Foreign key references exposed for frontend synchronization
-    reservationId: Optional[str] = None
-    checkinId: Optional[str] = None
-    maintenanceId: Optional[str] = None
+    reservationId: Optional[str] = Field(None, validation_alias="reservation_id")
+    checkinId: Optional[str] = Field(None, validation_alias="checkin_id")
+    maintenanceId: Optional[str] = Field(None, validation_alias="maintenance_id")
 
     class Config:
         from_attributes = True
+        populate_by_name = True
 
 
 class FinancialSummary(BaseModel):
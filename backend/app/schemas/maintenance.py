@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, validator
 from typing import Optional, List
 from datetime import date, datetime
 
@@ -63,12 +63,29 @@ class MaintenanceIssueResponse(MaintenanceIssueBase):
     """
     Schema for maintenance issue API responses.
     
-    Includes the ID and maintains all frontend field names.
+    Includes the ID and maintains all frontend field names. Validation
+    aliases are the MaintenanceIssue column names, so a row or entity maps
+    straight onto the schema (see app.core.projections).
     """
     id: str
+    maison: str = Field(validation_alias="house_id")
+    typePanne: str = Field(validation_alias="issue_type")
+    dateDeclaration: date = Field(validation_alias="reported_at")  # Serialized as YYYY-MM-DD
+    assigne: str = Field(validation_alias="assigned_to")
+    commentaire: Optional[str] = Field(None, validation_alias="comment")
+    statut: str = Field("non-resolue", validation_alias="status")
+    photoPanne: Optional[str] = Field(None, validation_alias="photo_issue_url")
+    photoFacture: Optional[str] = Field(None, validation_alias="photo_invoice_url")
+    prixMainOeuvre: Optional[float] = Field(None, validation_alias="labor_cost")
+
+    @validator('commentaire', pre=True)
+    def ensure_comment(cls, v):
+        # The frontend expects an empty comment rather than null
+        return v or ""
 
     class Config:
         from_attributes = True
+        populate_by_name = True
 
 
 class MaintenanceFilters(BaseModel):
@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    """
+    One page of a list endpoint (see app/utils/pagination.py).
+
+    Pass `nextCursor` back as `?cursor=` for the next page; it is null on
+    the last one.
+    """
+    items: List[T]
+    nextCursor: Optional[str] = None
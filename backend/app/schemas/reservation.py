@@ -1,4 +1,4 @@
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, Field, validator
 from typing import Optional
 from datetime import date, datetime
 
@@ -41,10 +41,19 @@ class ReservationUpdate(BaseModel):
 
 
 class ReservationResponse(ReservationBase):
+    # Validation aliases are the Reservation column names, so a row or
+    # entity maps straight onto the schema (see app.core.projections)
     id: str
+    maison: str = Field(validation_alias="house_id")
+    nom: str = Field(validation_alias="guest_name")
+    telephone: str = Field("", validation_alias="phone")
+    checkin: date = Field(validation_alias="checkin_date")  # Serialized as YYYY-MM-DD
+    checkout: date = Field(validation_alias="checkout_date")
+    montantAvance: float = Field(validation_alias="advance_paid")
 
     class Config:
         from_attributes = True
+        populate_by_name = True
 
 
 # Internal schema for database operations (matches SQLAlchemy model)
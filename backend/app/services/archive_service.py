@@ -0,0 +1,134 @@
+from sqlalchemy import DateTime, delete, func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from app.core.archive import ARCHIVED_TABLES, archive_metadata, archive_progress, archive_tables
+from app.core.database import Base
+from typing import Dict, List, Optional
+from datetime import date, datetime
+import threading
+
+# One archival run at a time per process
+_run_lock = threading.Lock()
+
+
+class ArchiveService:
+    """
+    Moves rows of closed fiscal years from the hot tables to the archive database.
+
+    Rows are moved in batches, each one its own transaction: copied with
+    INSERT OR IGNORE, then deleted from the hot table. With WAL the two
+    files don't commit atomically, so a crash can leave a batch in both;
+    the next run copies nothing for those rows and deletes them, which
+    makes the job restartable. Later runs only move the newly closed years.
+    """
+
+    def __init__(self, db: Session, batch_size: int = 5000):
+        self.db = db
+        self.batch_size = batch_size
+
+    @staticmethod
+    def cutoff_for(keep_years: int, today: Optional[date] = None) -> date:
+        """First day kept hot: January 1st, `keep_years` years before the current year."""
+        today = today or date.today()
+        return date(today.year - keep_years, 1, 1)
+
+    def ensure_schema(self) -> None:
+        """Create the archive tables (the archive database must be attached)."""
+        connection = self.db.connection()
+        archive_metadata.create_all(bind=connection)
+        connection.exec_driver_sql("PRAGMA archive.journal_mode=WAL")
+        self.db.commit()
+
+    def _mark_archived_before(self, name: str, cutoff: date) -> None:
+        # Recorded before any row moves, so readers union the archive for the whole range
+        statement = sqlite_insert(archive_progress).values(
+            table_name=name, archived_before=cutoff, rows_archived=0, updated_at=datetime.utcnow()
+        )
+        self.db.execute(statement.on_conflict_do_update(
+            index_elements=[archive_progress.c.table_name],
+            set_={
+                "archived_before": func.max(archive_progress.c.archived_before, statement.excluded.archived_before),
+                "updated_at": statement.excluded.updated_at,
+            },
+        ))
+        self.db.commit()
+
+    def archive_table(self, name: str, cutoff: date) -> int:
+        """
+        Move the rows of a table dated before the cutoff.
+
+        Args:
+            name: Table name (one of ARCHIVED_TABLES)
+            cutoff: Rows strictly before this date are archived
+
+        Returns:
+            Number of rows moved
+        """
+        hot = Base.metadata.tables[name]
+        cold = archive_tables[name]
+        column = hot.c[ARCHIVED_TABLES[name]]
+        bound = datetime.combine(cutoff, datetime.min.time()) if isinstance(column.type, DateTime) else cutoff
+
+        self._mark_archived_before(name, cutoff)
+
+        moved = 0
+        while True:
+            ids = self.db.scalars(
+                select(hot.c.id).where(column < bound).order_by(column, hot.c.id).limit(self.batch_size)
+            ).all()
+            if not ids:
+                return moved
+
+            # Rows already copied by an interrupted run are ignored, then deleted
+            copied = self.db.execute(
+                insert(cold).prefix_with("OR IGNORE").from_select(
+                    [c.name for c in hot.columns], select(hot).where(hot.c.id.in_(ids))
+                )
+            ).rowcount
+            self.db.execute(delete(hot).where(hot.c.id.in_(ids)))
+            self.db.execute(
+                archive_progress.update()
+                .where(archive_progress.c.table_name == name)
+                .values(rows_archived=archive_progress.c.rows_archived + copied, updated_at=datetime.utcnow())
+            )
+            self.db.commit()
+            moved += len(ids)
+
+    def run(self, cutoff: date) -> Dict[str, int]:
+        """
+        Archive every table up to the cutoff.
+
+        Args:
+            cutoff: First day kept in the hot tables
+
+        Returns:
+            Rows moved per table
+
+        Raises:
+            RuntimeError: If an archival run is already in progress
+        """
+        if not _run_lock.acquire(blocking=False):
+            raise RuntimeError("An archival run is already in progress")
+        try:
+            self.ensure_schema()
+            return {name: self.archive_table(name, cutoff) for name in ARCHIVED_TABLES}
+        finally:
+            _run_lock.release()
+
+    def status(self) -> List[Dict[str, object]]:
+        """
+        Archival progress of every table.
+
+        Returns:
+            Per table: archivedBefore, rowsArchived and updatedAt (None if never archived)
+        """
+        progress = {row.table_name: row for row in self.db.execute(select(archive_progress))}
+        return [
+            {
+                "table": name,
+                "archivedBefore": progress[name].archived_before if name in progress else None,
+                "rowsArchived": progress[name].rows_archived if name in progress else 0,
+                "updatedAt": progress[name].updated_at if name in progress else None,
+            }
+            for name in ARCHIVED_TABLES
+        ]
@@ -0,0 +1,237 @@
+from app.core.config import settings
+from app.core.database import shard_router
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+import glob
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_TIMESTAMP_FORMAT = "%Y%m%dT%H%M%S_%fZ"
+
+
+class _TooManyRestarts(Exception):
+    """Raised from the progress callback to abort a throttled copy."""
+
+
+class BackupService:
+    """
+    Online snapshots of the SQLite databases through the backup API.
+
+    Pages are copied a few at a time (`pages_per_step`) with a pause between
+    steps, so the copy never holds a read transaction for long and leaves
+    I/O to request writes. When another connection writes to the source,
+    SQLite restarts the copy; after `max_restarts` restarts the remaining
+    copy is done in one step, which in WAL mode still doesn't block writers.
+
+    Each snapshot is written to a `.partial` file, switched out of WAL mode,
+    verified with `PRAGMA integrity_check` and only then renamed to
+    `<database>-<timestamp>.db`. Only the newest `retention` snapshots of
+    each database are kept.
+    """
+
+    def __init__(
+        self,
+        backup_dir: str = "backups",
+        retention: int = 7,
+        pages_per_step: int = 256,
+        step_sleep: float = 0.005,
+        max_restarts: int = 3,
+    ):
+        self.backup_dir = backup_dir
+        self.retention = retention
+        self.pages_per_step = pages_per_step
+        self.step_sleep = step_sleep
+        self.max_restarts = max_restarts
+
+    @staticmethod
+    def targets() -> List[Tuple[str, str]]:
+        """
+        Databases to snapshot: every residence database and its archive.
+
+        Returns:
+            (snapshot name, database file) pairs
+        """
+        targets = []
+        for shard in shard_router.shards.values():
+            targets.append((shard.name, shard.database_path))
+            if settings.ARCHIVE_ENABLED and os.path.exists(shard.archive_path):
+                targets.append((f"{shard.name}.archive", shard.archive_path))
+        return targets
+
+    def snapshot(self, name: str, database_path: str) -> Dict[str, object]:
+        """
+        Take a verified snapshot of one database.
+
+        Args:
+            name: Snapshot name (residence name, `.archive` for its archive)
+            database_path: SQLite file to copy
+
+        Returns:
+            Description of the snapshot file
+
+        Raises:
+            RuntimeError: If the snapshot fails its integrity check
+        """
+        os.makedirs(self.backup_dir, exist_ok=True)
+        created_at = datetime.utcnow()
+        path = os.path.join(self.backup_dir, f"{name}-{created_at.strftime(_TIMESTAMP_FORMAT)}.db")
+        partial = f"{path}.partial"
+
+        started = time.perf_counter()
+        restarts = 0
+        last_remaining: Optional[int] = None
+
+        def throttle(status, remaining, total):
+            nonlocal restarts, last_remaining
+            if last_remaining is not None and remaining > last_remaining:
+                restarts += 1
+                if restarts >= self.max_restarts:
+                    raise _TooManyRestarts()
+            last_remaining = remaining
+            time.sleep(self.step_sleep)
+
+        source = sqlite3.connect(f"file:{database_path}?mode=ro", uri=True)
+        target = sqlite3.connect(partial)
+        try:
+            try:
+                source.backup(target, pages=self.pages_per_step, progress=throttle)
+            except _TooManyRestarts:
+                # The source keeps changing under the copy: copy it in one step instead
+                source.backup(target)
+            target.execute("PRAGMA journal_mode=DELETE")
+            integrity = [row[0] for row in target.execute("PRAGMA integrity_check")]
+        except Exception:
+            target.close()
+            os.remove(partial)
+            raise
+        finally:
+            source.close()
+            target.close()
+
+        if integrity != ["ok"]:
+            os.remove(partial)
+            raise RuntimeError(f"Snapshot of {name} failed its integrity check: {'; '.join(integrity[:5])}")
+        os.replace(partial, path)
+
+        return {
+            "database": name,
+            "file": path,
+            "sizeBytes": os.path.getsize(path),
+            "createdAt": created_at,
+            "durationMs": round((time.perf_counter() - started) * 1000, 2),
+            "restarts": restarts,
+        }
+
+    def list_snapshots(self, name: Optional[str] = None) -> List[Dict[str, object]]:
+        """
+        List the snapshot files, newest first.
+
+        Args:
+            name: Only the snapshots of this database
+
+        Returns:
+            One entry per snapshot
+        """
+        snapshots = []
+        for path in glob.glob(os.path.join(self.backup_dir, f"{name or '*'}-*.db")):
+            database, stamp = os.path.basename(path)[:-3].rsplit("-", 1)
+            try:
+                created_at = datetime.strptime(stamp, _TIMESTAMP_FORMAT)
+            except ValueError:
+                continue  # Not one of ours
+            snapshots.append({
+                "database": database,
+                "file": path,
+                "sizeBytes": os.path.getsize(path),
+                "createdAt": created_at,
+            })
+        return sorted(snapshots, key=lambda snapshot: snapshot["createdAt"], reverse=True)
+
+    def prune(self, name: str) -> List[str]:
+        """
+        Delete the snapshots of a database beyond the retention count.
+
+        Args:
+            name: Snapshot name
+
+        Returns:
+            Deleted files
+        """
+        expired = [snapshot["file"] for snapshot in self.list_snapshots(name)[self.retention:]]
+        for path in expired:
+            os.remove(path)
+        return expired
+
+    def run(self, claimed: bool = False) -> List[Dict[str, object]]:
+        """
+        Snapshot every database, then apply the retention policy.
+
+        Args:
+            claimed: The caller already started the run with backup_state.begin()
+
+        Returns:
+            The snapshots taken
+
+        Raises:
+            RuntimeError: If a snapshot run is already in progress or a snapshot is corrupt
+        """
+        if not claimed and not backup_state.begin():
+            raise RuntimeError("A snapshot run is already in progress")
+        snapshots = []
+        try:
+            for name, database_path in self.targets():
+                snapshot = self.snapshot(name, database_path)
+                logger.info("Snapshot %s written in %sms", snapshot["file"], snapshot["durationMs"])
+                snapshots.append(snapshot)
+                self.prune(name)
+            backup_state.finish(snapshots)
+            return snapshots
+        except Exception as exc:
+            logger.exception("Snapshot run failed")
+            backup_state.finish(snapshots, error=str(exc))
+            raise
+
+
+class BackupState:
+    """Progress of the current / last snapshot run of this process."""
+
+    def __init__(self):
+        self.running = False
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+        self.last_snapshots: List[Dict[str, object]] = []
+        self._lock = threading.Lock()
+
+    def begin(self) -> bool:
+        with self._lock:
+            if self.running:
+                return False
+            self.running = True
+            self.started_at, self.finished_at, self.error = datetime.utcnow(), None, None
+            return True
+
+    def finish(self, snapshots: List[Dict[str, object]], error: Optional[str] = None) -> None:
+        with self._lock:
+            self.running = False
+            self.finished_at = datetime.utcnow()
+            self.error = error
+            self.last_snapshots = snapshots
+
+
+backup_state = BackupState()
+
+
+def get_backup_service() -> BackupService:
+    return BackupService(
+        backup_dir=settings.BACKUP_DIR,
+        retention=settings.BACKUP_RETENTION,
+        pages_per_step=settings.BACKUP_PAGES_PER_STEP,
+        step_sleep=settings.BACKUP_STEP_SLEEP_MS / 1000,
+        max_restarts=settings.BACKUP_MAX_RESTARTS,
+    )
@@ -1,7 +1,7 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.database import get_primary_db
 from app.core.security import verify_token
 from app.models.user import User
 from typing import Optional
@@ -10,7 +10,7 @@ security = HTTPBearer()
 
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_primary_db)
 ) -> User:
     token = credentials.credentials
     user_id = verify_token(token)
@@ -46,7 +46,7 @@ def get_current_admin_user(current_user: User = Depends(get_current_user)) -> Us
 # Optional user dependency (for routes that work with or without authentication)
 def get_current_user_optional(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_primary_db)
 ) -> Optional[User]:
     if not credentials:
         return None
@@ -0,0 +1,50 @@
+from typing import Optional, Tuple, Type
+
+from fastapi import HTTPException, Query
+from pydantic import BaseModel
+
+
+class SparseFields:
+    """
+    `?fields=` parameter of a list endpoint, used as a dependency.
+
+    A comma-separated list of fields of the endpoint's response schema, e.g.
+    `/reservations/?fields=maison,checkin,checkout` for the calendar. Only
+    those columns are selected and returned (see app/core/projections.py);
+    without the parameter every field is. Unknown fields are rejected.
+
+        fields: Optional[Tuple[str, ...]] = Depends(SparseFields(ReservationResponse))
+    """
+
+    def __init__(self, schema: Type[BaseModel]):
+        self.schema = schema
+
+    def __call__(
+        self,
+        fields: Optional[str] = Query(None, description="Comma-separated fields to return (all of them by default)"),
+    ) -> Optional[Tuple[str, ...]]:
+        """
+        Parse the requested fields.
+
+        Args:
+            fields: Raw ?fields= value
+
+        Returns:
+            Requested fields in schema order, or None for all of them
+
+        Raises:
+            HTTPException: If a field isn't in the response schema, or none is given
+        """
+        if fields is None:
+            return None
+
+        requested = {name.strip() for name in fields.split(",")} - {""}
+        unknown = sorted(requested - set(self.schema.model_fields))
+        if unknown or not requested:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown field(s): {', '.join(unknown) or '(none given)'}. "
+                       f"Available: {', '.join(self.schema.model_fields)}"
+            )
+        # Schema order, so each combination is one cached statement and schema
+        return tuple(name for name in self.schema.model_fields if name in requested)
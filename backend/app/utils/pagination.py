@@ -0,0 +1,182 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from fastapi import Header, HTTPException, Query
+from sqlalchemy import and_, or_, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.core.config import settings
+from app.core.projections import RowStream, accepts_ndjson
+
+
+class Keyset:
+    """
+    Sort key of a list endpoint: its sort column, then the primary key (or
+    the rowid, to keep the insertion order of rows sharing a sort value).
+
+    Pages are read with `WHERE (sort, id) < (:sort, :id) ORDER BY sort DESC,
+    id DESC LIMIT n`, which an index on (sort, id) answers with one seek and
+    `n` rows however deep the page is; an OFFSET would read and drop every
+    row before it. The id makes the key unique, so rows sharing a sort value
+    are neither repeated nor skipped between pages.
+    """
+
+    def __init__(self, column, id_column, descending: bool = True, nullable: bool = False):
+        self.column = column
+        self.id_column = id_column
+        self.descending = descending
+        # SQLite sorts NULLs first, i.e. at the end of a descending listing
+        self.nullable = nullable
+
+    def order_by(self) -> List[ColumnElement]:
+        if self.descending:
+            return [self.column.desc(), self.id_column.desc()]
+        return [self.column.asc(), self.id_column.asc()]
+
+    def after(self, value: Any, row_id: Any) -> ColumnElement:
+        """
+        Filter keeping the rows that come after a key.
+
+        Args:
+            value: Sort value of the last row of the previous page
+            row_id: Id of that row
+
+        Returns:
+            WHERE clause
+        """
+        if value is None:
+            # Only reachable on nullable columns: the NULL rows are being paged through
+            if self.descending:
+                return and_(self.column.is_(None), self.id_column < row_id)
+            return or_(and_(self.column.is_(None), self.id_column > row_id), self.column.is_not(None))
+
+        key = tuple_(self.column, self.id_column)
+        if self.descending:
+            condition = key < (value, row_id)
+            return or_(condition, self.column.is_(None)) if self.nullable else condition
+        return key > (value, row_id)
+
+    def cursor(self, row) -> str:
+        """
+        Opaque cursor pointing after a row.
+
+        Args:
+            row: Row (or entity) with the sort and id columns as attributes
+
+        Returns:
+            URL-safe cursor
+        """
+        value = getattr(row, self.column.key)
+        if isinstance(value, (date, datetime)):
+            value = value.isoformat()
+        payload = json.dumps([value, getattr(row, self.id_column.key)], separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode(self, cursor: str) -> Tuple[Any, Any]:
+        """
+        Key encoded by `cursor()`.
+
+        Args:
+            cursor: Cursor sent back by the client
+
+        Returns:
+            (sort value, id)
+
+        Raises:
+            ValueError: If the cursor wasn't issued for this sort key
+        """
+        try:
+            value, row_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+        if type(row_id) is not self.id_column.type.python_type:
+            raise ValueError("Invalid cursor")
+        if value is not None:
+            python_type = self.column.type.python_type
+            if python_type in (date, datetime):
+                if not isinstance(value, str):
+                    raise ValueError("Invalid cursor")
+                value = python_type.fromisoformat(value)
+            elif not isinstance(value, python_type):
+                raise ValueError("Invalid cursor")
+        return value, row_id
+
+
+class Pagination:
+    """
+    `?limit=&cursor=` parameters of a list endpoint, used as a dependency.
+
+    In compatibility mode (PAGINATION_COMPAT_MODE) a request with neither
+    parameter is answered with the whole list as a bare array, which is what
+    the frontend expects. Otherwise the response is a page,
+    `{"items": [...], "nextCursor": ...}`, with `nextCursor` null on the last
+    page. `limit` defaults to PAGINATION_DEFAULT_LIMIT and is capped to
+    PAGINATION_MAX_LIMIT.
+
+    A request with `Accept: application/x-ndjson` gets every row instead,
+    streamed one per line (see app/core/projections.py): from `cursor` on if
+    given, and at most `limit` rows (uncapped) if given.
+    """
+
+    def __init__(
+        self,
+        limit: Optional[int] = Query(None, ge=1, description="Page size (returns a page instead of the whole list)"),
+        cursor: Optional[str] = Query(None, description="nextCursor of the previous page"),
+        accept: Optional[str] = Header(None, description="application/x-ndjson streams the rows, one per line"),
+    ):
+        self.cursor = cursor
+        self.stream = accepts_ndjson(accept)
+        if self.stream:
+            self.limit = limit
+        elif limit is None and cursor is None and settings.PAGINATION_COMPAT_MODE:
+            self.limit = None
+        else:
+            self.limit = min(limit or settings.PAGINATION_DEFAULT_LIMIT, settings.PAGINATION_MAX_LIMIT)
+
+    async def fetch(
+        self, db: AsyncSession, query: Select, keyset: Keyset
+    ) -> Union[List[Any], Dict[str, Any], RowStream]:
+        """
+        Run a list query in keyset order, one page at a time.
+
+        Args:
+            db: Database session
+            query: Filtered list query (without ORDER BY)
+            keyset: Sort key of the endpoint
+
+        Returns:
+            Every row in compatibility mode, the rows to stream for NDJSON,
+            otherwise a page of rows
+
+        Raises:
+            HTTPException: If the cursor is invalid
+        """
+        query = query.order_by(*keyset.order_by())
+        if self.cursor is not None:
+            try:
+                query = query.where(keyset.after(*keyset.decode(self.cursor)))
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+        if self.stream:
+            if self.limit is not None:
+                query = query.limit(self.limit)
+            return RowStream(db, query, settings.NDJSON_YIELD_PER)
+        if self.limit is None:
+            return (await db.execute(query)).all()
+
+        # The cursor is read from the last row: select its key if ?fields= left it out
+        selected = {column.key for column in query.selected_columns}
+        missing = [column for column in (keyset.column, keyset.id_column) if column.key not in selected]
+        if missing:
+            query = query.add_columns(*missing)
+        # One extra row tells whether there is a next page
+        rows = (await db.execute(query.limit(self.limit + 1))).all()
+        if len(rows) > self.limit:
+            return {"items": rows[:self.limit], "nextCursor": keyset.cursor(rows[self.limit - 1])}
+        return {"items": rows, "nextCursor": None}
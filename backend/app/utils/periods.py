@@ -0,0 +1,101 @@
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import extract
+from sqlalchemy.sql.elements import ColumnElement
+
+
+def period_bounds(
+    year: Optional[int] = None,
+    month: Optional[int] = None,
+    quarter: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> Tuple[Optional[date], Optional[date]]:
+    """
+    Turn a period into half-open date bounds `[start, end)`.
+
+    A year can be narrowed by a month or a quarter; a custom range is given
+    by inclusive `date_from` / `date_to` dates and further restricts the period.
+
+    Args:
+        year: Calendar year
+        month: Month (1-12) within the year
+        quarter: Quarter (1-4) within the year
+        date_from: First day included
+        date_to: Last day included
+
+    Returns:
+        (start, end) where either bound is None when unrestricted
+
+    Raises:
+        ValueError: If month/quarter are out of range or combined without a year
+    """
+    start: Optional[date] = None
+    end: Optional[date] = None
+
+    if month is not None and quarter is not None:
+        raise ValueError("month and quarter can't be combined")
+    if year is not None:
+        if month is not None:
+            if not 1 <= month <= 12:
+                raise ValueError(f"Invalid month: {month}")
+            start = date(year, month, 1)
+            end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+        elif quarter is not None:
+            if not 1 <= quarter <= 4:
+                raise ValueError(f"Invalid quarter: {quarter}")
+            start = date(year, 3 * quarter - 2, 1)
+            end = date(year + 1, 1, 1) if quarter == 4 else date(year, 3 * quarter + 1, 1)
+        else:
+            start, end = date(year, 1, 1), date(year + 1, 1, 1)
+    elif quarter is not None:
+        raise ValueError("quarter requires a year")
+
+    if date_from is not None:
+        start = max(start, date_from) if start else date_from
+    if date_to is not None:
+        day_after = date_to + timedelta(days=1)
+        end = min(end, day_after) if end else day_after
+    return start, end
+
+
+def period_filter(
+    column,
+    year: Optional[int] = None,
+    month: Optional[int] = None,
+    quarter: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> List[ColumnElement]:
+    """
+    Build index-friendly WHERE conditions restricting a date column to a period.
+
+    The column is compared to plain bounds (`column >= start AND column < end`)
+    instead of being wrapped in `extract()`, so an index on it can be used.
+    A month without a year ("every June") can't be expressed as one range and
+    still compares the extracted month.
+
+    Args:
+        column: Date column to filter
+        year, month, quarter, date_from, date_to: See `period_bounds`
+
+    Returns:
+        Conditions to pass to `.where(*conditions)` (empty when unrestricted)
+
+    Raises:
+        ValueError: If the period is invalid
+    """
+    conditions: List[ColumnElement] = []
+    if year is None and month is not None:
+        if not 1 <= month <= 12:
+            raise ValueError(f"Invalid month: {month}")
+        conditions.append(extract('month', column) == month)
+        month = None
+
+    start, end = period_bounds(year, month, quarter, date_from, date_to)
+    if start is not None:
+        conditions.append(column >= start)
+    if end is not None:
+        conditions.append(column < end)
+    return conditions
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Archive Script - Move closed fiscal years to the archive databases
+
+Financial operations and the log tables (login attempts, reservation audit,
+task completion and maintenance status logs) dated before January 1st of
+(current year - keep years) are moved to the archive database attached
+next to each residence database (<database>.archive.db).
+
+Rows are moved in committed batches: if the script is interrupted, run it
+again and it carries on where it stopped. The API reads the archive only
+for periods that reach into it.
+
+Usage:
+    python archive_data.py [--keep-years N] [--batch-size N] [--residence NAME] [--status]
+
+Requirements:
+    - ARCHIVE_ENABLED=True (the archive is attached on every connection)
+"""
+
+import argparse
+import os
+import sys
+
+# Add the app directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.config import settings
+from app.core.database import shard_router
+from app.services.archive_service import ArchiveService
+
+
+def print_status(service: ArchiveService) -> None:
+    for entry in service.status():
+        archived_before = entry["archivedBefore"] or "-"
+        print(f"   {entry['table']:<24} before {archived_before}  {entry['rowsArchived']} row(s) archived")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move closed fiscal years to the archive databases")
+    parser.add_argument("--keep-years", type=int, default=settings.ARCHIVE_KEEP_YEARS,
+                        help=f"Closed fiscal years kept hot (default: {settings.ARCHIVE_KEEP_YEARS})")
+    parser.add_argument("--batch-size", type=int, default=settings.ARCHIVE_BATCH_SIZE,
+                        help=f"Rows moved per transaction (default: {settings.ARCHIVE_BATCH_SIZE})")
+    parser.add_argument("--residence", help="Only archive this residence database")
+    parser.add_argument("--status", action="store_true", help="Show the archival progress and exit")
+    args = parser.parse_args()
+
+    if not settings.ARCHIVE_ENABLED:
+        print("❌ Archival is disabled, set ARCHIVE_ENABLED=True")
+        sys.exit(1)
+
+    shards = [shard_router.get(args.residence)] if args.residence else list(shard_router.shards.values())
+    cutoff = ArchiveService.cutoff_for(args.keep_years)
+    if not args.status:
+        print(f"🚀 Archiving rows dated before {cutoff}...")
+    print("=" * 60)
+
+    for shard in shards:
+        db = shard.SessionLocal()
+        try:
+            service = ArchiveService(db, batch_size=args.batch_size)
+            print(f"📦 {shard.name} → {shard.archive_path}")
+            if args.status:
+                service.ensure_schema()
+            else:
+                for table, moved in service.run(cutoff).items():
+                    print(f"   ✅ {table}: {moved} row(s) moved")
+            print_status(service)
+        except Exception as e:
+            db.rollback()
+            print(f"❌ Archival of {shard.name} failed: {e}")
+            print("   Run the script again to resume")
+            sys.exit(1)
+        finally:
+            db.close()
+
+    print("=" * 60)
+    print("✅ Done")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Backup Script - Snapshot the residence databases
+
+Every residence database (and its archive database when archival is
+enabled) is copied through the SQLite backup API into BACKUP_DIR as
+<residence>-<UTC timestamp>.db. The copy is throttled, so it can run while
+the server is serving writes. Each snapshot is checked with
+PRAGMA integrity_check before it is kept; older snapshots beyond the
+retention count are deleted.
+
+Usage:
+    python backup_data.py [--residence NAME] [--retention N] [--backup-dir DIR] [--list]
+
+To restore, stop the server and copy a snapshot over the database file.
+"""
+
+import argparse
+import os
+import sys
+
+# Add the app directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.config import settings
+from app.services.backup_service import BackupService
+
+
+def print_snapshots(service: BackupService) -> None:
+    snapshots = service.list_snapshots()
+    if not snapshots:
+        print("   No snapshots")
+    for snapshot in snapshots:
+        size_mb = snapshot["sizeBytes"] / (1024 * 1024)
+        print(f"   {snapshot['database']:<24} {snapshot['createdAt']:%Y-%m-%d %H:%M:%S}  {size_mb:8.1f} MB  {snapshot['file']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot the residence databases")
+    parser.add_argument("--residence", help="Only snapshot this residence database (and its archive)")
+    parser.add_argument("--retention", type=int, default=settings.BACKUP_RETENTION,
+                        help=f"Snapshots kept per database (default: {settings.BACKUP_RETENTION})")
+    parser.add_argument("--backup-dir", default=settings.BACKUP_DIR,
+                        help=f"Snapshot directory (default: {settings.BACKUP_DIR})")
+    parser.add_argument("--list", action="store_true", help="List the snapshots and exit")
+    args = parser.parse_args()
+
+    service = BackupService(
+        backup_dir=args.backup_dir,
+        retention=args.retention,
+        pages_per_step=settings.BACKUP_PAGES_PER_STEP,
+        step_sleep=settings.BACKUP_STEP_SLEEP_MS / 1000,
+        max_restarts=settings.BACKUP_MAX_RESTARTS,
+    )
+
+    if args.list:
+        print(f"📦 Snapshots in {args.backup_dir}")
+        print("=" * 60)
+        print_snapshots(service)
+        return
+
+    targets = service.targets()
+    if args.residence:
+        targets = [(name, path) for name, path in targets if name.split(".")[0] == args.residence]
+        if not targets:
+            print(f"❌ Unknown residence: {args.residence}")
+            sys.exit(1)
+
+    print(f"🚀 Snapshotting {len(targets)} database(s) into {args.backup_dir}...")
+    print("=" * 60)
+
+    for name, path in targets:
+        try:
+            snapshot = service.snapshot(name, path)
+        except Exception as e:
+            print(f"❌ Snapshot of {name} failed: {e}")
+            sys.exit(1)
+        print(f"✅ {name}: {snapshot['file']} ({snapshot['durationMs']} ms, integrity ok)")
+        for expired in service.prune(name):
+            print(f"   🗑️  {expired}")
+
+    print("=" * 60)
+    print("✅ Done")
+
+
+if __name__ == "__main__":
+    main()
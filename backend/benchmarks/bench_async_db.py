@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Benchmark - async (aiosqlite) vs blocking database sessions under mixed traffic
+
+Serves the app with uvicorn on a local port, fires concurrent mixed traffic
+(cheap reads plus the heavy /dashboard/house-stats endpoint) at it and
+reports latency percentiles per route for two modes:
+
+    blocking  The routers receive a facade over the sync Session, so every
+              query runs on the event loop (the behaviour before the async port)
+    async     The routers use the AsyncSession from get_async_db
+
+Usage:
+    python -m benchmarks.bench_async_db [--houses N] [--clients N] [--requests N]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections import defaultdict
+
+from benchmarks.common import prepare_database, print_table, serve, summarize
+
+
+class BlockingSession:
+    """
+    Awaitable facade over a sync Session.
+    
+    Every call runs synchronously on the event loop, reproducing how the
+    routers behaved when they used the sync Session from get_db.
+    """
+
+    def __init__(self, session):
+        self._session = session
+
+    def add(self, instance):
+        self._session.add(instance)
+
+    async def execute(self, *args, **kwargs):
+        return self._session.execute(*args, **kwargs)
+
+    async def scalar(self, *args, **kwargs):
+        return self._session.scalar(*args, **kwargs)
+
+    async def scalars(self, *args, **kwargs):
+        return self._session.scalars(*args, **kwargs)
+
+    async def delete(self, instance):
+        self._session.delete(instance)
+
+    async def refresh(self, instance):
+        self._session.refresh(instance)
+
+    async def flush(self):
+        self._session.flush()
+
+    async def commit(self):
+        self._session.commit()
+
+    async def rollback(self):
+        self._session.rollback()
+
+
+MODES = ("blocking", "async")
+
+ROUTES = [
+    ("/health", 30),
+    ("/api/v1/reservations/?maison=maison-1", 25),
+    ("/api/v1/dashboard/metrics?date=2024-06-01", 25),
+    ("/api/v1/maintenance/types", 15),
+    ("/api/v1/dashboard/house-stats", 5),
+]
+
+
+async def run_traffic(base_url: str, clients: int, requests_per_client: int):
+    import httpx
+
+    paths = [path for path, _ in ROUTES]
+    weights = [weight for _, weight in ROUTES]
+    latencies = defaultdict(list)
+
+    limits = httpx.Limits(max_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        async def worker(worker_id: int):
+            rng = random.Random(worker_id)
+            for _ in range(requests_per_client):
+                path = rng.choices(paths, weights)[0]
+                started = time.perf_counter()
+                response = await client.get(path)
+                latencies[path].append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    raise RuntimeError(f"{path}: {response.status_code} {response.text[:300]}")
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    return latencies, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Async vs blocking DB session benchmark")
+    parser.add_argument("--houses", type=int, default=40, help="Houses to seed (default: 40)")
+    parser.add_argument("--clients", type=int, default=20, help="Concurrent clients (default: 20)")
+    parser.add_argument("--requests", type=int, default=25, help="Requests per client (default: 25)")
+    args = parser.parse_args()
+
+    import httpx
+
+    prepare_database(houses=args.houses, checkins_per_house=200, operations_per_house=300)
+
+    from app.core import database
+    from app.core.database import SessionLocal, get_async_db, get_read_db
+    from app.main import app
+
+    database.engine.echo = False
+    database.async_engine.sync_engine.echo = False
+    database.read_engine.sync_engine.echo = False
+
+    async def get_blocking_db():
+        db = SessionLocal()
+        try:
+            yield BlockingSession(db)
+        finally:
+            db.close()
+
+    rows = []
+    for mode in MODES:
+        if mode == "blocking":
+            app.dependency_overrides[get_async_db] = get_blocking_db
+            app.dependency_overrides[get_read_db] = get_blocking_db
+        else:
+            app.dependency_overrides.clear()
+        # Each mode gets its own server and event loop; async pools are bound to
+        # the loop, so start from fresh ones and open the first connection alone
+        database.async_engine.sync_engine.dispose(close=False)
+        database.read_engine.sync_engine.dispose(close=False)
+
+        with serve(app) as base_url:
+            httpx.get(f"{base_url}/api/v1/maintenance/types").raise_for_status()
+            latencies, elapsed = asyncio.run(run_traffic(base_url, args.clients, args.requests))
+        total = sum(len(samples) for samples in latencies.values())
+        for path, _ in ROUTES:
+            stats = summarize(latencies[path])
+            rows.append([mode, path, stats["count"], stats["p50"], stats["p95"], stats["p99"]])
+        overall = summarize([s for samples in latencies.values() for s in samples])
+        rows.append([mode, "ALL", total, overall["p50"], overall["p95"], overall["p99"]])
+        rows.append([mode, "throughput (req/s)", "", total / elapsed, "", ""])
+
+    print(f"houses={args.houses} clients={args.clients} requests/client={args.requests}")
+    print_table(["mode", "route", "n", "p50 ms", "p95 ms", "p99 ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark - response compression: CPU cost vs bytes saved
+
+Fetches real payloads from a seeded database, uncompressed (a single
+reservation, a dashboard, a page of 100 check-ins, the whole reservation,
+check-in and financial operation lists), then compresses each one with every
+gzip level and Brotli quality listed. For each it reports the compressed
+size, the CPU time spent compressing it and the transfer time saved on a
+link of --bandwidth Mbit/s: a level is worth it while it saves more transfer
+time than it costs CPU. Levels are set per content type with
+COMPRESSION_GZIP_LEVELS / COMPRESSION_BROTLI_LEVELS, and bodies smaller than
+COMPRESSION_MIN_SIZE are never compressed.
+
+The whole requests are then timed through the middleware with the default
+settings, with and without Accept-Encoding.
+
+Usage:
+    python -m benchmarks.bench_compression [--scale N] [--bandwidth MBIT] [--repeat N]
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Dict, List, Tuple
+
+from benchmarks.common import prepare_database, print_table
+
+HOUSES = 10
+
+# Rows per house at --scale 1: 10k reservations and check-ins, 50k financial operations in all
+VOLUMES = {"reservations": 1000, "checkins": 1000, "operations": 5000}
+
+PAYLOADS = {
+    "one reservation": "/api/v1/reservations/{reservation_id}",
+    "dashboard": "/api/v1/dashboard/",
+    "100 check-ins": "/api/v1/checkins/?limit=100",
+    "reservations": "/api/v1/reservations/",
+    "check-ins": "/api/v1/checkins/",
+    "financial operations": "/api/v1/finance/",
+}
+
+GZIP_LEVELS = (1, 4, 6, 9)
+BROTLI_QUALITIES = (1, 4, 5, 7, 11)
+
+
+async def fetch_payloads() -> Dict[str, bytes]:
+    import httpx
+    from app.main import app
+
+    payloads = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        reservation_id = (await client.get("/api/v1/reservations/", params={"limit": 1})).json()["items"][0]["id"]
+        for name, path in PAYLOADS.items():
+            response = await client.get(path.format(reservation_id=reservation_id),
+                                        headers={"Accept-Encoding": "identity"})
+            response.raise_for_status()
+            payloads[name] = response.content
+    return payloads
+
+
+def compressors() -> List[Tuple[str, object]]:
+    from app.core.compression import Encoder, brotli
+
+    encoders = [(f"gzip {level}", Encoder("gzip", level)) for level in GZIP_LEVELS]
+    if brotli is not None:
+        encoders += [(f"br {quality}", Encoder("br", quality)) for quality in BROTLI_QUALITIES]
+    return encoders
+
+
+def compare_levels(payloads: Dict[str, bytes], bandwidth: float, repeat: int) -> List[List[object]]:
+    bytes_per_ms = bandwidth * 1_000_000 / 8 / 1000
+    rows = []
+    for name, body in payloads.items():
+        rows.append([name, "none", len(body) / 1024, "", "", "", f"{len(body) / bytes_per_ms:.1f}"])
+        for label, encoder in compressors():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                compressed = encoder.compress(body)
+                timings.append((time.perf_counter() - started) * 1000)
+            cpu_ms = min(timings)
+            saved_ms = (len(body) - len(compressed)) / bytes_per_ms
+            rows.append([
+                "", label, len(compressed) / 1024, f"{len(body) / len(compressed):.1f}x", cpu_ms,
+                f"{saved_ms - cpu_ms:+.1f}", f"{len(compressed) / bytes_per_ms + cpu_ms:.1f}",
+            ])
+    return rows
+
+
+async def measure_requests(repeat: int) -> List[List[object]]:
+    import httpx
+    from app.core.compression import brotli
+    from app.main import app
+
+    encodings = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+    rows = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for name in ("dashboard", "check-ins", "financial operations"):
+            for encoding in encodings:
+                timings = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    response = await client.get(PAYLOADS[name], headers={"Accept-Encoding": encoding})
+                    timings.append((time.perf_counter() - started) * 1000)
+                # httpx decodes the body: the size on the wire is the raw stream's
+                wire = int(response.headers.get("content-length", len(response.content)))
+                rows.append([name, encoding, response.headers.get("content-encoding", "-"), wire / 1024, min(timings)])
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response compression benchmark")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier of the default volumes (default: 1)")
+    parser.add_argument("--bandwidth", type=float, default=50.0, help="Client link in Mbit/s (default: 50)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs, the best one is kept (default: 3)")
+    args = parser.parse_args()
+
+    prepare_database(
+        houses=HOUSES,
+        reservations_per_house=int(VOLUMES["reservations"] * args.scale),
+        checkins_per_house=int(VOLUMES["checkins"] * args.scale),
+        operations_per_house=int(VOLUMES["operations"] * args.scale),
+    )
+
+    payloads = asyncio.run(fetch_payloads())
+    print(f"Compression of each payload, best of {args.repeat} runs, {args.bandwidth:g} Mbit/s link")
+    print("(net ms = transfer time saved - CPU time; positive means the level pays off)")
+    print_table(
+        ["payload", "encoding", "KiB", "ratio", "cpu ms", "net ms", "cpu + transfer ms"],
+        compare_levels(payloads, args.bandwidth, args.repeat),
+    )
+
+    print()
+    print(f"Whole requests through the middleware (default settings), best of {args.repeat} runs")
+    print_table(["endpoint", "Accept-Encoding", "Content-Encoding", "wire KiB", "ms"],
+                asyncio.run(measure_requests(args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark - polling with If-None-Match (ETag / 304) vs full responses
+
+Polls the dashboard and the large list endpoints the way the frontend does
+when nothing changed in between: once without a validator (200, full body)
+and once sending back the ETag of the previous response (304, no body and
+no query). A financial operation is then created: polls of the endpoints
+reading financial operations get a 200 again, the others still a 304.
+
+Usage:
+    python -m benchmarks.bench_conditional_get [--scale N] [--requests N]
+"""
+
+import argparse
+import asyncio
+import re
+import time
+from typing import List
+
+from benchmarks.common import prepare_database, print_table, summarize
+
+HOUSES = 10
+
+# Rows per house at --scale 1: 10k reservations and check-ins, 50k financial operations in all
+VOLUMES = {"reservations": 1000, "checkins": 1000, "operations": 5000}
+
+ENDPOINTS = ["/api/v1/dashboard/", "/api/v1/reservations/", "/api/v1/checkins/", "/api/v1/finance/"]
+
+_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+async def measure(requests: int) -> List[List[object]]:
+    import httpx
+    from app.main import app
+
+    rows, etags = [], {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for path in ENDPOINTS:
+            etag = etags[path] = (await client.get(path)).headers["etag"]
+            for label, headers in (("no validator", {}), ("If-None-Match", {"If-None-Match": etag})):
+                samples, size = [], 0
+                for _ in range(requests):
+                    started = time.perf_counter()
+                    response = await client.get(path, headers=headers)
+                    samples.append(time.perf_counter() - started)
+                    size = len(response.content)
+                queries = _QUERIES.search(response.headers["server-timing"]).group(1)
+                summary = summarize(samples)
+                rows.append([path, label, response.status_code, queries, size, summary["p50"], summary["p95"]])
+
+        # After a write, only the endpoints reading the written table answer in full
+        await client.post("/api/v1/finance/", json={
+            "date": "2025-01-10", "maison": "maison-1", "type": "sortie", "motif": "Bench",
+            "montant": 5, "origine": "manuel",
+        })
+        for path in ENDPOINTS:
+            response = await client.get(path, headers={"If-None-Match": etags[path]})
+            rows.append([path, "same tag, after a finance write", response.status_code, "-", len(response.content), "-", "-"])
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Conditional GET (ETag / 304) benchmark")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier of the default volumes (default: 1)")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per endpoint and mode (default: 50)")
+    args = parser.parse_args()
+
+    prepare_database(
+        houses=HOUSES,
+        reservations_per_house=int(VOLUMES["reservations"] * args.scale),
+        checkins_per_house=int(VOLUMES["checkins"] * args.scale),
+        operations_per_house=int(VOLUMES["operations"] * args.scale),
+    )
+
+    rows = asyncio.run(measure(args.requests))
+    print(f"{args.requests} sequential requests per endpoint and mode")
+    print_table(["endpoint", "request", "status", "queries", "body bytes", "p50 ms", "p95 ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
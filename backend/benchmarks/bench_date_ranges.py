@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark - extract() vs date-range period filters
+
+Seeds a large financial_operations table (1M rows by default, with the
+model indexes) and runs the period queries of the finance and dashboard
+routers twice: once filtering with `extract('year'/'month', date) == n`
+as before, once with the `date >= start AND date < end` conditions built
+by `app.utils.periods.period_filter`. For each query it reports the
+EXPLAIN QUERY PLAN of both forms and their latency, and checks that both
+return the same result.
+
+Usage:
+    python -m benchmarks.bench_date_ranges [--rows N] [--houses N] [--repeat N]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+import uuid
+from datetime import date, timedelta
+
+from benchmarks.common import print_table, summarize
+
+
+def seed_operations(path: str, rows: int, houses: int, seed: int = 42) -> None:
+    """Create the schema and bulk insert `rows` financial operations over 2019-2025."""
+    from sqlalchemy import create_engine, insert
+    from app.core.database import Base
+    from app.models import House, FinancialOperation
+
+    rng = random.Random(seed)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    house_ids = [f"maison-{i + 1}" for i in range(houses)]
+    start = date(2019, 1, 1)
+
+    with engine.begin() as conn:
+        conn.execute(insert(House), [{"id": h, "name": f"Mv{i + 1}"} for i, h in enumerate(house_ids)])
+        batch = []
+        for _ in range(rows):
+            batch.append({
+                "id": str(uuid.UUID(int=rng.getrandbits(128))), "date": start + timedelta(days=rng.randrange(2557)),
+                "house_id": rng.choice(house_ids), "type": rng.choice(["entree", "entree", "sortie"]),
+                "motif": "Opération", "montant": float(rng.randint(10, 1000)), "origine": "manuel", "editable": True,
+            })
+            if len(batch) == 50000:
+                conn.execute(insert(FinancialOperation), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(FinancialOperation), batch)
+        conn.exec_driver_sql("ANALYZE")
+    engine.dispose()
+
+
+def build_queries(house: str, year: int, month: int):
+    """(name, legacy statement, date-range statement) for each router query."""
+    from sqlalchemy import extract, func, select
+    from app.models import FinancialOperation as Op
+    from app.utils.periods import period_filter
+
+    def legacy(year=None, month=None):
+        conditions = []
+        if month:
+            conditions.append(extract('month', Op.date) == month)
+        if year:
+            conditions.append(extract('year', Op.date) == year)
+        return conditions
+
+    return [
+        (
+            "GET /finance/?year&month",
+            select(Op.id, Op.montant).where(*legacy(year, month)).order_by(Op.date.desc()),
+            select(Op.id, Op.montant).where(*period_filter(Op.date, year, month)).order_by(Op.date.desc()),
+        ),
+        (
+            "GET /finance/summary/{house}?year&month",
+            select(Op.type, Op.montant).where(Op.house_id == house, *legacy(year, month)),
+            select(Op.type, Op.montant).where(Op.house_id == house, *period_filter(Op.date, year, month)),
+        ),
+        (
+            "GET /finance/revenue/monthly?year",
+            select(extract('month', Op.date), func.sum(Op.montant))
+            .where(*legacy(year), Op.type == "entree").group_by(extract('month', Op.date)),
+            select(extract('month', Op.date), func.sum(Op.montant))
+            .where(*period_filter(Op.date, year), Op.type == "entree").group_by(extract('month', Op.date)),
+        ),
+        (
+            "GET /dashboard/period-stats?year&month",
+            select(func.sum(Op.montant)).where(*legacy(year, month), Op.type == "entree"),
+            select(func.sum(Op.montant)).where(*period_filter(Op.date, year, month), Op.type == "entree"),
+        ),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="extract() vs date-range filter benchmark")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Financial operations to seed (default: 1M)")
+    parser.add_argument("--houses", type=int, default=12, help="Houses (default: 12)")
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per query and form (default: 10)")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="rm-bench-"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.setdefault("DATABASE_ECHO", "False")
+
+    started = time.perf_counter()
+    seed_operations(path, args.rows, args.houses)
+    print(f"seeded {args.rows} financial operations in {time.perf_counter() - started:.1f}s")
+
+    from sqlalchemy import create_engine
+    engine = create_engine(f"sqlite:///{path}")
+
+    rows = []
+    with engine.connect() as conn:
+        for name, legacy, ranged in build_queries("maison-1", 2024, 6):
+            timings, results, plans = {}, {}, {}
+            for form, statement in (("extract", legacy), ("range", ranged)):
+                compiled = statement.compile(conn)
+                plan = conn.exec_driver_sql(
+                    f"EXPLAIN QUERY PLAN {compiled}", tuple(compiled.construct_params()[k] for k in compiled.positiontup)
+                ).all()
+                plans[form] = "; ".join(row[-1] for row in plan)
+                samples = []
+                for _ in range(args.repeat):
+                    t0 = time.perf_counter()
+                    results[form] = sorted(map(tuple, conn.execute(statement).all()))
+                    samples.append(time.perf_counter() - t0)
+                timings[form] = summarize(samples)["p50"]
+            assert results["extract"] == results["range"], f"{name}: results differ"
+            rows.append([name, "extract", plans["extract"], timings["extract"], ""])
+            rows.append(["", "range", plans["range"], timings["range"], f"{timings['extract'] / timings['range']:.1f}x"])
+
+    print(f"rows={args.rows} houses={args.houses} repeat={args.repeat} (p50 latency)")
+    print_table(["query", "filter", "plan", "p50 ms", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    main()
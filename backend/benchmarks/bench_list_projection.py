@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Benchmark - ORM entities vs column projections on the large list endpoints
+
+Runs what GET /reservations/, /checkins/, /finance/ and /maintenance/ do,
+from the query to the encoded body, with two pipelines:
+
+- entities: the previous handlers, which loaded full ORM entities (tracked
+  in the session's identity map) and copied their fields one by one into a
+  new *Response object per row
+- projection: the current handlers, which select only the response columns
+  (app.core.projections) and return the rows for response_model to map
+
+Latency is the best of --repeat runs; memory is the tracemalloc peak of one
+more run, traced separately so tracing doesn't skew the timings. Each
+pipeline runs in its own subprocess on the same seeded database, and the
+payloads are decoded and compared.
+
+Usage:
+    python -m benchmarks.bench_list_projection [--scale N] [--repeat N]
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Dict, List
+
+from benchmarks.common import BACKEND_DIR, prepare_database, print_table
+
+HOUSES = 10
+
+# Rows per house at --scale 1: 50k reservations and 200k financial operations in all
+VOLUMES = {"reservations": 5000, "checkins": 5000, "operations": 20000, "issues": 2000}
+
+
+def build_pipelines():
+    from sqlalchemy import select
+    from app.core.projections import response_columns
+    from app.models import CheckIn, FinancialOperation, MaintenanceIssue, Reservation
+    from app.schemas.checkin import CheckInResponse, InventaireType
+    from app.schemas.finance import FinancialOperationResponse
+    from app.schemas.maintenance import MaintenanceIssueResponse
+    from app.schemas.reservation import ReservationResponse
+
+    async def reservation_entities(db):
+        reservations = (await db.scalars(select(Reservation).order_by(Reservation.checkin_date.desc()))).all()
+        return [ReservationResponse(
+            id=reservation.id,
+            maison=reservation.house_id,
+            nom=reservation.guest_name,
+            telephone=reservation.phone or "",
+            email=reservation.email or "",
+            checkin=reservation.checkin_date,
+            checkout=reservation.checkout_date,
+            montantAvance=reservation.advance_paid
+        ) for reservation in reservations]
+
+    async def checkin_entities(db):
+        checkins = (await db.scalars(select(CheckIn).order_by(CheckIn.arrival_date.desc()))).all()
+        return [CheckInResponse(
+            id=checkin.id,
+            maison=checkin.house_id,
+            nom=checkin.guest_name,
+            telephone=checkin.phone or "",
+            email=checkin.email or "",
+            dateArrivee=checkin.arrival_date,
+            dateDepart=checkin.departure_date,
+            avancePaye=checkin.advance_paid,
+            paiementCheckin=checkin.checkin_payment,
+            montantTotal=checkin.total_amount,
+            inventaire=InventaireType(**checkin.inventory) if checkin.inventory else InventaireType(),
+            responsable=checkin.manager,
+            remarques=checkin.remarks or "",
+            reservationId=checkin.reservation_id
+        ) for checkin in checkins]
+
+    async def operation_entities(db):
+        operations = (await db.scalars(select(FinancialOperation).order_by(FinancialOperation.date.desc()))).all()
+        return [FinancialOperationResponse(
+            id=op.id,
+            date=op.date,
+            maison=op.house_id,
+            type=op.type,
+            motif=op.motif,
+            montant=op.montant,
+            origine=op.origine,
+            pieceJointe=op.piece_jointe,
+            editable=op.editable,
+            reservationId=op.reservation_id,
+            checkinId=op.checkin_id,
+            maintenanceId=op.maintenance_id
+        ) for op in operations]
+
+    async def issue_entities(db):
+        issues = (await db.scalars(select(MaintenanceIssue).order_by(MaintenanceIssue.reported_at.desc()))).all()
+        return [MaintenanceIssueResponse(
+            id=issue.id,
+            maison=issue.house_id,
+            typePanne=issue.issue_type,
+            dateDeclaration=issue.reported_at,
+            assigne=issue.assigned_to,
+            commentaire=issue.comment or "",
+            statut=issue.status,
+            photoPanne=issue.photo_issue_url,
+            photoFacture=issue.photo_invoice_url,
+            prixMainOeuvre=issue.labor_cost
+        ) for issue in issues]
+
+    def projection(schema, model, order):
+        async def run(db):
+            query = select(*response_columns(schema, model)).order_by(order.desc())
+            return (await db.execute(query)).all()
+        return run
+
+    return {
+        "reservations": ("/api/v1/reservations/", {
+            "entities": reservation_entities,
+            "projection": projection(ReservationResponse, Reservation, Reservation.checkin_date),
+        }),
+        "checkins": ("/api/v1/checkins/", {
+            "entities": checkin_entities,
+            "projection": projection(CheckInResponse, CheckIn, CheckIn.arrival_date),
+        }),
+        "financial operations": ("/api/v1/finance/", {
+            "entities": operation_entities,
+            "projection": projection(FinancialOperationResponse, FinancialOperation, FinancialOperation.date),
+        }),
+        "maintenance issues": ("/api/v1/maintenance/", {
+            "entities": issue_entities,
+            "projection": projection(MaintenanceIssueResponse, MaintenanceIssue, MaintenanceIssue.reported_at),
+        }),
+    }
+
+
+def payload_path(database_path: str, pipeline: str, resource: str) -> str:
+    return f"{database_path}.{pipeline}.{resource.replace(' ', '_')}.json"
+
+
+async def measure(pipeline: str, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Latency and peak memory of one pipeline; its payloads are written next to the database."""
+    from fastapi.datastructures import DefaultPlaceholder
+    from fastapi.routing import APIRoute, serialize_response
+    from app.core.database import ReadSessionLocal, primary_shard
+    from app.main import app
+
+    routes = {route.path: route for route in app.routes if isinstance(route, APIRoute) and "GET" in route.methods}
+
+    async def respond(path, handler):
+        route = routes[path]
+        encoder = route.response_class
+        if isinstance(encoder, DefaultPlaceholder):
+            encoder = encoder.value
+        async with ReadSessionLocal() as db:
+            content = await handler(db)
+            body = encoder(await serialize_response(field=route.response_field, response_content=content)).body
+        return len(content), body
+
+    results = {}
+    for resource, (path, handlers) in build_pipelines().items():
+        handler = handlers[pipeline]
+        timings = []
+        for _ in range(repeat):
+            gc.collect()
+            started = time.perf_counter()
+            rows, body = await respond(path, handler)
+            timings.append((time.perf_counter() - started) * 1000)
+        with open(payload_path(primary_shard.database_path, pipeline, resource), "wb") as output:
+            output.write(body)
+        del body
+
+        gc.collect()
+        tracemalloc.start()
+        await respond(path, handler)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results[resource] = {"rows": rows, "ms": min(timings), "peak_mib": peak / 1024 / 1024}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ORM entities vs column projections benchmark")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier of the default volumes (default: 1)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per endpoint, the best one is kept (default: 3)")
+    parser.add_argument("--pipeline", help=argparse.SUPPRESS)  # Used by the per-pipeline subprocess
+    args = parser.parse_args()
+
+    if args.pipeline:
+        print(json.dumps(asyncio.run(measure(args.pipeline, args.repeat))))
+        return
+
+    database_path = prepare_database(
+        houses=HOUSES,
+        reservations_per_house=int(VOLUMES["reservations"] * args.scale),
+        checkins_per_house=int(VOLUMES["checkins"] * args.scale),
+        operations_per_house=int(VOLUMES["operations"] * args.scale),
+        issues_per_house=int(VOLUMES["issues"] * args.scale),
+        items_per_house=0,
+    )
+
+    results = {}
+    for pipeline in ("entities", "projection"):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_list_projection", "--pipeline", pipeline, "--repeat", str(args.repeat)],
+            cwd=BACKEND_DIR, env=dict(os.environ, DATABASE_ECHO="False"), check=True, capture_output=True, text=True,
+        ).stdout
+        results[pipeline] = json.loads(output.strip().splitlines()[-1])
+
+    rows: List[List[object]] = []
+    for resource in results["entities"]:
+        payloads = []
+        for pipeline, result in results.items():
+            measured = result[resource]
+            rows.append([resource, measured["rows"], pipeline, measured["ms"], measured["peak_mib"]])
+            with open(payload_path(database_path, pipeline, resource), "rb") as payload:
+                payloads.append(json.loads(payload.read()))
+        if payloads[0] != payloads[1]:
+            raise AssertionError(f"The {resource} payloads differ")
+
+    print(f"query + mapping + encoding, best of {args.repeat} runs, one process per pipeline, payloads compared equal")
+    print_table(["resource", "rows", "pipeline", "ms", "peak MiB"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark - whole-list exports as one JSON array vs an NDJSON stream
+
+Fetches every financial operation and every check-in, the way the
+reconciliation jobs do, once as the JSON array of the list endpoints and
+once with `Accept: application/x-ndjson`. For each it reports the time to
+the first body byte, the total time and the peak memory allocated while
+serving the request (tracemalloc, in a separate run since tracing slows
+everything down). The array is built in full before its first byte is
+sent; the stream sends NDJSON_YIELD_PER rows at a time, so its first byte
+and its peak memory don't depend on the length of the list.
+
+The app is called directly as an ASGI application, so the timings exclude
+any network transfer.
+
+Usage:
+    python -m benchmarks.bench_ndjson_export [--scale N] [--repeat N]
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+from typing import List, Tuple
+
+from benchmarks.common import prepare_database, print_table
+
+HOUSES = 10
+
+# Rows per house at --scale 1: 200k financial operations and 20k check-ins in all
+VOLUMES = {"reservations": 2000, "checkins": 2000, "operations": 20000}
+
+EXPORTS = {
+    "financial operations": "/api/v1/finance/",
+    "check-ins": "/api/v1/checkins/",
+}
+
+FORMATS = {
+    "JSON array": "application/json",
+    "NDJSON stream": "application/x-ndjson",
+}
+
+
+async def serve(app, path: str, accept: str) -> Tuple[float, float, int]:
+    """Serve one GET, returning (ms to first byte, total ms, body bytes)."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"bench"), (b"accept", accept.encode())],
+        "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    request_sent = asyncio.Event()
+
+    async def receive():
+        if request_sent.is_set():
+            # The client stays connected: wait until the response is over
+            await asyncio.Event().wait()
+        request_sent.set()
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    first_byte = None
+    size = 0
+
+    async def send(message):
+        nonlocal first_byte, size
+        if message["type"] == "http.response.body":
+            if first_byte is None and message.get("body"):
+                first_byte = time.perf_counter()
+            size += len(message.get("body", b""))
+
+    started = time.perf_counter()
+    await app(scope, receive, send)
+    finished = time.perf_counter()
+    return (first_byte - started) * 1000, (finished - started) * 1000, size
+
+
+async def measure(repeat: int) -> List[List[object]]:
+    from app.main import app
+
+    rows = []
+    for name, path in EXPORTS.items():
+        for label, accept in FORMATS.items():
+            timings = [await serve(app, path, accept) for _ in range(repeat)]
+            first_byte = min(timing[0] for timing in timings)
+            total = min(timing[1] for timing in timings)
+            size = timings[0][2]
+
+            tracemalloc.start()
+            await serve(app, path, accept)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            rows.append([name, label, size / 1024 / 1024, first_byte, total, peak / 1024 / 1024])
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON array vs NDJSON stream export benchmark")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier of the default volumes (default: 1)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs, the best one is kept (default: 3)")
+    args = parser.parse_args()
+
+    prepare_database(
+        houses=HOUSES,
+        reservations_per_house=int(VOLUMES["reservations"] * args.scale),
+        checkins_per_house=int(VOLUMES["checkins"] * args.scale),
+        operations_per_house=int(VOLUMES["operations"] * args.scale),
+    )
+
+    async def run():
+        from app.main import app
+
+        # Startup handlers (reference data, write queues) as under a server
+        await app.router.startup()
+        try:
+            return await measure(args.repeat)
+        finally:
+            await app.router.shutdown()
+
+    print(f"Whole-list exports, best of {args.repeat} runs (peak memory from one traced run)")
+    print_table(["list", "format", "MiB", "first byte ms", "total ms", "peak MiB"], asyncio.run(run()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark - keyset pages vs OFFSET pages vs the whole list
+
+Walks GET /reservations/ and /finance/ page by page (?limit=&cursor=), then
+times the first, middle and last pages: the query of the endpoint with the
+keyset filter, the same query with LIMIT/OFFSET instead, and the whole
+request. With keyset pagination a deep page costs what the first one does;
+OFFSET reads and drops every row before the page. The whole list, as the
+frontend fetches it in compatibility mode, is timed for reference.
+
+Usage:
+    python -m benchmarks.bench_pagination [--scale N] [--limit N] [--repeat N]
+"""
+
+import argparse
+import asyncio
+import time
+from typing import List
+
+from benchmarks.common import prepare_database, print_table
+
+HOUSES = 10
+
+# Rows per house at --scale 1: 50k reservations and 200k financial operations in all
+VOLUMES = {"reservations": 5000, "operations": 20000}
+
+
+def list_queries():
+    from sqlalchemy import select
+    from app.api.v1.reservations import RESERVATION_KEYSET
+    from app.core.projections import response_columns
+    from app.models import FinancialOperation, Reservation
+    from app.schemas.finance import FinancialOperationResponse
+    from app.schemas.reservation import ReservationResponse
+    from app.utils.pagination import Keyset
+
+    # What the endpoints run without filters: (query, keyset)
+    return {
+        "/api/v1/reservations/": (select(*response_columns(ReservationResponse, Reservation)), RESERVATION_KEYSET),
+        "/api/v1/finance/": (
+            select(*response_columns(FinancialOperationResponse, FinancialOperation)),
+            Keyset(FinancialOperation.date, FinancialOperation.id),
+        ),
+    }
+
+
+async def best_of(repeat: int, run) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await run()
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings)
+
+
+async def measure(limit: int, repeat: int) -> List[List[object]]:
+    import httpx
+    from app.core.database import ReadSessionLocal
+    from app.main import app
+
+    rows = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for path, (query, keyset) in list_queries().items():
+            # Follow nextCursor to the last page, keeping the cursor of each page
+            cursors, cursor = [None], None
+            while True:
+                response = await client.get(path, params={"limit": limit, **({"cursor": cursor} if cursor else {})})
+                response.raise_for_status()
+                cursor = response.json()["nextCursor"]
+                if cursor is None:
+                    break
+                cursors.append(cursor)
+            pages = len(cursors)
+
+            ordered = query.order_by(*keyset.order_by())
+            for page, label in ((0, "first"), (pages // 2, "middle"), (pages - 1, "last")):
+                params = {"limit": limit, **({"cursor": cursors[page]} if cursors[page] else {})}
+                keyset_query = ordered
+                if cursors[page]:
+                    keyset_query = ordered.where(keyset.after(*keyset.decode(cursors[page])))
+                async with ReadSessionLocal() as db:
+                    keyset_ms = await best_of(repeat, lambda: db.execute(keyset_query.limit(limit)))
+                    offset_ms = await best_of(repeat, lambda: db.execute(ordered.limit(limit).offset(page * limit)))
+                request_ms = await best_of(repeat, lambda: client.get(path, params=params))
+                rows.append([path, f"{label} ({page + 1}/{pages})", keyset_ms, offset_ms, request_ms])
+
+            whole_ms = await best_of(1, lambda: client.get(path))
+            rows.append([path, "whole list (compatibility mode)", "-", "-", whole_ms])
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keyset vs OFFSET pagination benchmark")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier of the default volumes (default: 1)")
+    parser.add_argument("--limit", type=int, default=100, help="Page size (default: 100)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per page, the best one is kept (default: 5)")
+    args = parser.parse_args()
+
+    prepare_database(
+        houses=HOUSES,
+        reservations_per_house=int(VOLUMES["reservations"] * args.scale),
+        checkins_per_house=0,
+        operations_per_house=int(VOLUMES["operations"] * args.scale),
+        issues_per_house=0,
+        items_per_house=0,
+    )
+
+    rows = asyncio.run(measure(args.limit, args.repeat))
+    print(f"pages of {args.limit} rows, best of {args.repeat} runs; the request column is the keyset page over HTTP")
+    print_table(["endpoint", "page", "keyset ms", "OFFSET ms", "request ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
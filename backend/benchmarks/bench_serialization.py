@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Benchmark - response serialization of the large list endpoints
+
+Times what GET /reservations/ and GET /finance/ do once their rows are
+loaded, on 50k reservations and 200k financial operations:
+
+- build: one response model per row
+- validate: FastAPI's serialize_response against the route's response_model
+- render: encoding to bytes with the response class
+
+"before" is the previous pipeline: dates formatted per row with
+strftime("%Y-%m-%d") into `str` fields, encoded by Starlette's JSONResponse
+(json.dumps). "after" is the current one: `date` fields serialized by
+Pydantic, encoded by the app's default ORJSONResponse. Each pipeline runs
+in its own subprocess on the same seeded database, since large allocations
+left by one slow down the next; the payloads are then decoded and compared.
+
+Usage:
+    python -m benchmarks.bench_serialization [--reservations N] [--operations N] [--repeat N]
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.common import BACKEND_DIR, prepare_database, print_table
+
+HOUSES = 10
+
+
+def timed(func: Callable[[], object]):
+    """Wall time (ms) of one call, with its result."""
+    gc.collect()
+    started = time.perf_counter()
+    result = func()
+    return (time.perf_counter() - started) * 1000, result
+
+
+def measure(pipeline: str, repeat: int) -> Dict[str, Dict[str, object]]:
+    """Stage timings of one pipeline; its payloads are written next to the database."""
+    from fastapi.datastructures import DefaultPlaceholder
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import APIRoute, serialize_response
+    from fastapi.utils import create_response_field
+    from sqlalchemy import select
+    from app.core.database import SessionLocal, primary_shard
+    from app.main import app
+    from app.models import FinancialOperation, Reservation
+    from app.schemas.finance import FinancialOperationResponse
+    from app.schemas.reservation import ReservationResponse
+
+    # The response schemas as they were, with the dates as preformatted strings
+    class LegacyReservationResponse(ReservationResponse):
+        checkin: str
+        checkout: str
+
+    class LegacyFinancialOperationResponse(FinancialOperationResponse):
+        date: str
+
+    def reservation_builder(schema, date_format):
+        def build(rows):
+            return [schema(
+                id=reservation.id,
+                maison=reservation.house_id,
+                nom=reservation.guest_name,
+                telephone=reservation.phone or "",
+                email=reservation.email or "",
+                checkin=date_format(reservation.checkin_date),
+                checkout=date_format(reservation.checkout_date),
+                montantAvance=reservation.advance_paid
+            ) for reservation in rows]
+        return build
+
+    def operation_builder(schema, date_format):
+        def build(rows):
+            return [schema(
+                id=op.id,
+                date=date_format(op.date),
+                maison=op.house_id,
+                type=op.type,
+                motif=op.motif,
+                montant=op.montant,
+                origine=op.origine,
+                pieceJointe=op.piece_jointe,
+                editable=op.editable,
+                reservationId=op.reservation_id,
+                checkinId=op.checkin_id,
+                maintenanceId=op.maintenance_id
+            ) for op in rows]
+        return build
+
+    def strftime(value):
+        return value.strftime("%Y-%m-%d")
+
+    def unchanged(value):
+        return value
+
+    def route(path: str) -> APIRoute:
+        for candidate in app.routes:
+            if isinstance(candidate, APIRoute) and candidate.path == path and "GET" in candidate.methods:
+                return candidate
+        raise LookupError(path)
+
+    def response_class(path: str):
+        value = route(path).response_class
+        return value.value if isinstance(value, DefaultPlaceholder) else value
+
+    def legacy_field(schema):
+        return create_response_field(name=f"Response_{schema.__name__}", type_=List[schema], mode="serialization")
+
+    resources = {
+        "reservations": (
+            Reservation,
+            {
+                "before": (reservation_builder(LegacyReservationResponse, strftime),
+                           legacy_field(LegacyReservationResponse), JSONResponse),
+                "after": (reservation_builder(ReservationResponse, unchanged),
+                          route("/api/v1/reservations/").response_field, response_class("/api/v1/reservations/")),
+            },
+        ),
+        "financial operations": (
+            FinancialOperation,
+            {
+                "before": (operation_builder(LegacyFinancialOperationResponse, strftime),
+                           legacy_field(LegacyFinancialOperationResponse), JSONResponse),
+                "after": (operation_builder(FinancialOperationResponse, unchanged),
+                          route("/api/v1/finance/").response_field, response_class("/api/v1/finance/")),
+            },
+        ),
+    }
+
+    results = {}
+    with SessionLocal() as db:
+        for resource, (model, pipelines) in resources.items():
+            build, field, encoder = pipelines[pipeline]
+            records = db.scalars(select(model)).all()
+            best = None
+            for _ in range(repeat):
+                build_ms, models = timed(lambda: build(records))
+                validate_ms, content = timed(lambda: asyncio.run(
+                    serialize_response(field=field, response_content=models)
+                ))
+                render_ms, payload = timed(lambda: encoder(content).body)
+                stages = [build_ms, validate_ms, render_ms]
+                best = stages if best is None else [min(pair) for pair in zip(best, stages)]
+            with open(payload_path(primary_shard.database_path, pipeline, resource), "wb") as output:
+                output.write(payload)
+            results[resource] = {"rows": len(records), "encoder": encoder.__name__, "stages": best, "bytes": len(payload)}
+    return results
+
+
+def payload_path(database_path: str, pipeline: str, resource: str) -> str:
+    return f"{database_path}.{pipeline}.{resource.replace(' ', '_')}.json"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response serialization benchmark")
+    parser.add_argument("--reservations", type=int, default=50_000, help="Reservations to serialize (default: 50000)")
+    parser.add_argument("--operations", type=int, default=200_000, help="Financial operations to serialize (default: 200000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage, the best one is kept (default: 3)")
+    parser.add_argument("--pipeline", help=argparse.SUPPRESS)  # Used by the per-pipeline subprocess
+    args = parser.parse_args()
+
+    if args.pipeline:
+        print(json.dumps(measure(args.pipeline, args.repeat)))
+        return
+
+    database_path = prepare_database(
+        houses=HOUSES,
+        reservations_per_house=args.reservations // HOUSES,
+        operations_per_house=args.operations // HOUSES,
+        checkins_per_house=0, issues_per_house=0, items_per_house=0,
+    )
+
+    results = {}
+    for pipeline in ("before", "after"):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_serialization", "--pipeline", pipeline, "--repeat", str(args.repeat)],
+            cwd=BACKEND_DIR, env=dict(os.environ, DATABASE_ECHO="False"), check=True, capture_output=True, text=True,
+        ).stdout
+        results[pipeline] = json.loads(output.strip().splitlines()[-1])
+
+    rows: List[List[object]] = []
+    for resource in results["before"]:
+        payloads = []
+        for pipeline, result in results.items():
+            timings = result[resource]
+            rows.append([
+                resource, timings["rows"], pipeline, timings["encoder"], *timings["stages"],
+                sum(timings["stages"]), timings["bytes"] / 1024 / 1024,
+            ])
+            with open(payload_path(database_path, pipeline, resource), "rb") as payload:
+                payloads.append(json.loads(payload.read()))
+        if payloads[0] != payloads[1]:
+            raise AssertionError(f"The {resource} payloads differ")
+
+    print(f"best of {args.repeat} runs per stage, one process per pipeline, payloads compared equal")
+    print_table(
+        ["resource", "rows", "pipeline", "encoder", "build ms", "validate ms", "render ms", "total ms", "MiB"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
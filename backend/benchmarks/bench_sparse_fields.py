@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark - sparse fieldsets (?fields=) on the large list endpoints
+
+Fetches the whole list of GET /reservations/, /checkins/ and /finance/ with
+every field and with the few fields a frontend view needs (the calendar
+needs maison, checkin and checkout), and reports the payload size and the
+request latency of each. The requested fields are also the only columns
+selected, so the check-in inventory JSON isn't even read without it.
+
+Usage:
+    python -m benchmarks.bench_sparse_fields [--scale N] [--repeat N]
+"""
+
+import argparse
+import asyncio
+import time
+from typing import List
+
+from benchmarks.common import prepare_database, print_table
+
+HOUSES = 10
+
+# Rows per house at --scale 1: 50k reservations and check-ins, 200k financial operations in all
+VOLUMES = {"reservations": 5000, "checkins": 5000, "operations": 20000}
+
+# View -> (endpoint, ?fields=)
+VIEWS = {
+    "calendar": ("/api/v1/reservations/", "maison,checkin,checkout"),
+    "check-in list": ("/api/v1/checkins/", "id,maison,nom,dateArrivee,dateDepart,montantTotal"),
+    "finance chart": ("/api/v1/finance/", "date,maison,type,montant"),
+}
+
+
+async def measure(repeat: int) -> List[List[object]]:
+    import httpx
+    from app.main import app
+
+    rows = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for view, (path, fields) in VIEWS.items():
+            sizes = {}
+            for label, params in (("all fields", {}), (f"fields={fields}", {"fields": fields})):
+                timings = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    response = await client.get(path, params=params)
+                    timings.append((time.perf_counter() - started) * 1000)
+                    response.raise_for_status()
+                sizes[label] = len(response.content)
+                rows.append([
+                    view, path, label, len(response.json()),
+                    sizes[label] / 1024 / 1024, min(timings),
+                ])
+            full, sparse = sizes.values()
+            rows[-1].append(f"-{(1 - sparse / full) * 100:.0f}% bytes")
+            rows[-2].append("")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sparse fieldsets benchmark")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier of the default volumes (default: 1)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per request, the best one is kept (default: 3)")
+    args = parser.parse_args()
+
+    prepare_database(
+        houses=HOUSES,
+        reservations_per_house=int(VOLUMES["reservations"] * args.scale),
+        checkins_per_house=int(VOLUMES["checkins"] * args.scale),
+        operations_per_house=int(VOLUMES["operations"] * args.scale),
+        issues_per_house=0,
+        items_per_house=0,
+    )
+
+    rows = asyncio.run(measure(args.repeat))
+    print(f"whole list, uncompressed body, best of {args.repeat} runs")
+    print_table(["view", "endpoint", "request", "rows", "body MiB", "ms", "saving"], rows)
+
+
+if __name__ == "__main__":
+    main()
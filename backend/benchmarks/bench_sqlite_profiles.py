@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark - SQLite PRAGMA profiles
+
+Measures, for each profile:
+    - write throughput of POST /reservations/ and POST /checkins/ from
+      concurrent clients
+    - latency of GET /dashboard/metrics issued while those writes run
+
+Settings are read at import time, so each profile runs in its own
+subprocess with the SQLITE_* environment variables set.
+
+Usage:
+    python -m benchmarks.bench_sqlite_profiles [--writers N] [--writes N] [--reads N]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import BACKEND_DIR, prepare_database, print_table, summarize
+
+PROFILES = {
+    # SQLite defaults: rollback journal, fsync on every commit
+    "legacy": {
+        "SQLITE_JOURNAL_MODE": "DELETE",
+        "SQLITE_SYNCHRONOUS": "FULL",
+        "SQLITE_MMAP_SIZE": "0",
+        "SQLITE_CACHE_SIZE": "-2000",
+        "SQLITE_TEMP_STORE": "DEFAULT",
+        "SQLITE_BUSY_TIMEOUT": "5000",
+    },
+    "wal": {
+        "SQLITE_JOURNAL_MODE": "WAL",
+        "SQLITE_SYNCHRONOUS": "NORMAL",
+        "SQLITE_MMAP_SIZE": "0",
+        "SQLITE_CACHE_SIZE": "-2000",
+        "SQLITE_TEMP_STORE": "DEFAULT",
+        "SQLITE_BUSY_TIMEOUT": "5000",
+    },
+    # The defaults shipped in Settings
+    "wal+mmap+cache": {
+        "SQLITE_JOURNAL_MODE": "WAL",
+        "SQLITE_SYNCHRONOUS": "NORMAL",
+        "SQLITE_MMAP_SIZE": str(256 * 1024 * 1024),
+        "SQLITE_CACHE_SIZE": "-64000",
+        "SQLITE_TEMP_STORE": "MEMORY",
+        "SQLITE_BUSY_TIMEOUT": "5000",
+    },
+}
+
+
+async def run_profile(writers: int, writes_per_writer: int, reads: int) -> dict:
+    import httpx
+    from app.main import app
+
+    write_latencies, read_latencies, failures = [], [], 0
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        async def writer(worker_id: int):
+            nonlocal failures
+            house = f"maison-{worker_id % 12 + 1}"
+            reservation_id = None
+            for i in range(writes_per_writer):
+                started = time.perf_counter()
+                if i % 2 == 0:
+                    response = await client.post("/api/v1/reservations/", json={
+                        "maison": house, "nom": "Bench", "checkin": "2030-01-10",
+                        "checkout": "2030-01-12", "montantAvance": 100,
+                    })
+                    reservation_id = response.json().get("id") if response.status_code == 200 else None
+                else:
+                    response = await client.post("/api/v1/checkins/", json={
+                        "maison": house, "nom": "Bench", "dateArrivee": "2030-01-10",
+                        "dateDepart": "2030-01-12", "avancePaye": 100, "paiementCheckin": 400,
+                        "montantTotal": 500, "inventaire": {}, "responsable": "Bench",
+                        "reservationId": reservation_id,
+                    })
+                write_latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    failures += 1
+
+        async def reader():
+            for _ in range(reads):
+                started = time.perf_counter()
+                response = await client.get("/api/v1/dashboard/metrics?date=2024-06-01")
+                read_latencies.append(time.perf_counter() - started)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(reader(), *(writer(i) for i in range(writers)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "writes_per_sec": len(write_latencies) / elapsed,
+        "write": summarize(write_latencies),
+        "read": summarize(read_latencies),
+        "failures": failures,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite PRAGMA profile benchmark")
+    parser.add_argument("--writers", type=int, default=8, help="Concurrent writing clients (default: 8)")
+    parser.add_argument("--writes", type=int, default=50, help="Writes per client (default: 50)")
+    parser.add_argument("--reads", type=int, default=100, help="Dashboard reads during the writes (default: 100)")
+    parser.add_argument("--profile", help=argparse.SUPPRESS)  # Used by the per-profile subprocess
+    args = parser.parse_args()
+
+    if args.profile:
+        prepare_database(houses=12)
+        from app.core import database
+        database.engine.echo = False
+        database.async_engine.sync_engine.echo = False
+        result = asyncio.run(run_profile(args.writers, args.writes, args.reads))
+        print(json.dumps(result))
+        return
+
+    rows = []
+    for name, pragmas in PROFILES.items():
+        env = dict(os.environ, DATABASE_ECHO="False", **pragmas)
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_sqlite_profiles", "--profile", name,
+             "--writers", str(args.writers), "--writes", str(args.writes), "--reads", str(args.reads)],
+            cwd=BACKEND_DIR, env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        rows.append([
+            name, result["writes_per_sec"], result["write"]["p50"], result["write"]["p99"],
+            result["read"]["p50"], result["read"]["p99"], result["failures"],
+        ])
+
+    print(f"writers={args.writers} writes/writer={args.writes} dashboard reads={args.reads}")
+    print_table(["profile", "writes/s", "write p50 ms", "write p99 ms", "read p50 ms", "read p99 ms", "failed"], rows)
+
+
+if __name__ == "__main__":
+    main()
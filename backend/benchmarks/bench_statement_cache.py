@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark - compiled statement cache on the single-entity GET endpoints
+
+Measures the Python-side overhead per request of GET /reservations/{id},
+/checkins/{id}, /maintenance/{id}, /finance/{id} and /checklist/items/{id}:
+the request latency minus the time spent in SQLite, as reported by the
+`db` entry of the Server-Timing header. Requests are issued one at a time
+so nothing but the request itself is measured.
+
+Each cache profile (DATABASE_QUERY_CACHE_SIZE) runs in its own subprocess,
+since settings are read at import time. Each subprocess also times a bare
+`session.scalar()` by id with the statement built inline on every call
+(as the routers used to) and with the pre-built one from app.core.statements.
+
+Usage:
+    python -m benchmarks.bench_statement_cache [--requests N]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+from benchmarks.common import BACKEND_DIR, prepare_database, print_table, summarize
+
+PROFILES = {
+    "no cache": {"DATABASE_QUERY_CACHE_SIZE": "0"},
+    # The default shipped in Settings
+    "cache": {"DATABASE_QUERY_CACHE_SIZE": "1000"},
+}
+
+ENDPOINTS = [
+    ("/api/v1/reservations/{id}", "/api/v1/reservations/"),
+    ("/api/v1/checkins/{id}", "/api/v1/checkins/"),
+    ("/api/v1/maintenance/{id}", "/api/v1/maintenance/"),
+    ("/api/v1/finance/{id}", "/api/v1/finance/"),
+    ("/api/v1/checklist/items/{id}", "/api/v1/checklist/items"),
+]
+
+_DB_TIMING = re.compile(r"db;dur=([\d.]+)")
+
+
+async def measure_endpoints(requests: int) -> dict:
+    import httpx
+    from app.main import app
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path, listing in ENDPOINTS:
+            ids = [row["id"] for row in (await client.get(listing)).json()[:50]]
+            totals, overheads = [], []
+            for i in range(requests):
+                started = time.perf_counter()
+                response = await client.get(path.format(id=ids[i % len(ids)]))
+                elapsed = time.perf_counter() - started
+                response.raise_for_status()
+                db_ms = float(_DB_TIMING.search(response.headers["server-timing"]).group(1))
+                totals.append(elapsed)
+                overheads.append(elapsed - db_ms / 1000)
+            results[path] = {"total": summarize(totals), "python": summarize(overheads)}
+    return results
+
+
+async def measure_statements(requests: int) -> dict:
+    from sqlalchemy import select
+    from app.core import statements
+    from app.core.database import ReadSessionLocal
+    from app.models import Reservation
+
+    results = {}
+    async with ReadSessionLocal() as session:
+        ids = list((await session.scalars(select(Reservation.id).limit(50))).all())
+        for form in ("inline", "prebuilt"):
+            samples = []
+            for i in range(requests):
+                reservation_id = ids[i % len(ids)]
+                started = time.perf_counter()
+                if form == "inline":
+                    await session.scalar(select(Reservation).where(Reservation.id == reservation_id))
+                else:
+                    await session.scalar(statements.RESERVATION_BY_ID, {"id": reservation_id})
+                samples.append(time.perf_counter() - started)
+                session.expunge_all()
+            results[form] = summarize(samples)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compiled statement cache benchmark")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per endpoint (default: 500)")
+    parser.add_argument("--profile", help=argparse.SUPPRESS)  # Used by the per-profile subprocess
+    args = parser.parse_args()
+
+    if args.profile:
+        prepare_database(houses=12)
+        endpoints = asyncio.run(measure_endpoints(args.requests))
+        statements = asyncio.run(measure_statements(args.requests))
+        print(json.dumps({"endpoints": endpoints, "statements": statements}))
+        return
+
+    endpoint_rows, statement_rows = [], []
+    for name, variables in PROFILES.items():
+        env = dict(os.environ, DATABASE_ECHO="False", SQL_METRICS_ENABLED="True", **variables)
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_statement_cache", "--profile", name,
+             "--requests", str(args.requests)],
+            cwd=BACKEND_DIR, env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        for path, timings in result["endpoints"].items():
+            endpoint_rows.append([
+                name, path, timings["total"]["p50"], timings["python"]["p50"], timings["python"]["p99"],
+            ])
+        for form, timings in result["statements"].items():
+            statement_rows.append([name, form, timings["p50"], timings["p99"]])
+
+    print(f"requests/endpoint={args.requests} (sequential, in-process ASGI)")
+    print_table(["profile", "endpoint", "p50 ms", "python p50 ms", "python p99 ms"], endpoint_rows)
+    print()
+    print("session.scalar(<reservation by id>)")
+    print_table(["profile", "statement", "p50 ms", "p99 ms"], statement_rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark - single-writer commit queue under concurrent writes
+
+Serves the app with uvicorn and has many concurrent clients hammer the
+three hottest write endpoints (POST /reservations/, POST /checkins/ and
+POST /checklist/status/{house}/complete). Each mode runs in its own
+subprocess:
+
+    direct  WRITE_QUEUE_ENABLED=False, every request commits on its own session
+    queued  WRITE_QUEUE_ENABLED=True, writes go through the writer thread
+
+Reports sustained write TPS, latency percentiles, failed requests and how
+many of them were "database is locked" errors.
+
+Usage:
+    python -m benchmarks.bench_write_queue [--clients N] [--writes N]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import BACKEND_DIR, prepare_database, print_table, serve, summarize
+
+MODES = {
+    "direct": {"WRITE_QUEUE_ENABLED": "False"},
+    "queued": {"WRITE_QUEUE_ENABLED": "True"},
+}
+
+
+async def run_clients(base_url: str, clients: int, writes_per_client: int, task_ids: list) -> dict:
+    import httpx
+
+    latencies, failures, locked = [], 0, 0
+
+    limits = httpx.Limits(max_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=300) as client:
+        async def worker(worker_id: int):
+            nonlocal failures, locked
+            house = f"maison-{worker_id % 12 + 1}"
+            reservation_id = None
+            for i in range(writes_per_client):
+                started = time.perf_counter()
+                step = i % 3
+                if step == 0:
+                    response = await client.post("/api/v1/reservations/", json={
+                        "maison": house, "nom": "Stress", "checkin": "2030-01-10",
+                        "checkout": "2030-01-12", "montantAvance": 100,
+                    })
+                    if response.status_code == 200:
+                        reservation_id = response.json()["id"]
+                elif step == 1:
+                    response = await client.post("/api/v1/checkins/", json={
+                        "maison": house, "nom": "Stress", "dateArrivee": "2030-01-10",
+                        "dateDepart": "2030-01-12", "avancePaye": 100, "paiementCheckin": 400,
+                        "montantTotal": 500, "inventaire": {}, "responsable": "Stress",
+                        "reservationId": reservation_id,
+                    })
+                else:
+                    response = await client.post(f"/api/v1/checklist/status/{house}/complete", json={
+                        "taskId": task_ids[(worker_id + i) % len(task_ids)], "completed": i % 2 == 0,
+                    })
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    failures += 1
+                    if "database is locked" in response.text:
+                        locked += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    return {"tps": len(latencies) / elapsed, "latency": summarize(latencies), "failures": failures, "locked": locked}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single-writer commit queue stress benchmark")
+    parser.add_argument("--clients", type=int, default=200, help="Concurrent clients (default: 200)")
+    parser.add_argument("--writes", type=int, default=15, help="Writes per client (default: 15)")
+    parser.add_argument("--mode", help=argparse.SUPPRESS)  # Used by the per-mode subprocess
+    args = parser.parse_args()
+
+    if args.mode:
+        path = prepare_database(houses=12, items_per_house=10)
+        import sqlite3
+        with sqlite3.connect(path) as conn:
+            task_ids = [row[0] for row in conn.execute("SELECT id FROM checklist_items")]
+        from app.main import app
+        with serve(app) as base_url:
+            result = asyncio.run(run_clients(base_url, args.clients, args.writes, task_ids))
+        print(json.dumps(result))
+        return
+
+    rows = []
+    for name, env_vars in MODES.items():
+        env = dict(os.environ, DATABASE_ECHO="False", **env_vars)
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_write_queue", "--mode", name,
+             "--clients", str(args.clients), "--writes", str(args.writes)],
+            cwd=BACKEND_DIR, env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        rows.append([
+            name, result["tps"], result["latency"]["p50"], result["latency"]["p99"],
+            result["failures"], result["locked"],
+        ])
+
+    print(f"clients={args.clients} writes/client={args.writes}")
+    print_table(["mode", "writes/s", "p50 ms", "p99 ms", "failed", "db locked"], rows)
+
+
+if __name__ == "__main__":
+    main()
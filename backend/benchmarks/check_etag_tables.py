@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Check - tables declared with @etag_tables vs tables the routes read
+
+A GET route tagged with `@etag_tables(...)` is answered with 304 as long as
+the declared tables haven't changed, so a table it reads but doesn't
+declare makes it serve stale bodies. This calls every route on a seeded
+database (as check_query_plans does), collects the tables named in the
+statements each GET request ran, and exits 1 when a tagged route read an
+undeclared table. GET routes of the data routers without a tag are listed
+as well.
+
+Usage:
+    python -m benchmarks.check_etag_tables [--verbose]
+"""
+
+import argparse
+import re
+import sys
+from typing import Dict, List, Set
+
+from benchmarks.common import prepare_database, print_table
+
+_ID = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+_TABLE = re.compile(r'\b(?:FROM|JOIN)\s+"?(?:\w+"?\.)?"?(\w+)', re.I)
+
+# Routers whose GET routes are expected to be tagged
+DATA_PREFIXES = ("/api/v1/reservations", "/api/v1/checkins", "/api/v1/finance", "/api/v1/maintenance",
+                 "/api/v1/checklist", "/api/v1/dashboard")
+
+
+class TableRecorder:
+    """ASGI wrapper collecting the tables read by every GET request."""
+
+    def __init__(self, app):
+        self.app = app
+        self.current: Set[str] = set()
+        self.reads: Dict[str, Dict[str, object]] = {}
+
+    def statement(self, conn, cursor, statement, parameters, context, executemany):
+        self.current.update(_TABLE.findall(statement))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        # Requests are sent one at a time by the test client
+        self.current = set()
+        await self.app(scope, receive, send)
+        route = scope.get("route")
+        if route is None:
+            return
+        key = f"GET {route.path}"
+        entry = self.reads.setdefault(key, {"tables": set(), "declared": getattr(scope["endpoint"], "etag_tables", None)})
+        entry["tables"] |= self.current
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the tables declared with @etag_tables")
+    parser.add_argument("--verbose", action="store_true", help="List every route, not only the problems")
+    args = parser.parse_args()
+
+    prepare_database(houses=6)
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    from app.main import app
+    from benchmarks.check_query_plans import StatementCapture, exercise_routes
+
+    recorder = TableRecorder(app)
+    event.listen(Engine, "before_cursor_execute", recorder.statement)
+    with TestClient(recorder) as client:
+        exercise_routes(client, StatementCapture(), "maison-1")
+    event.remove(Engine, "before_cursor_execute", recorder.statement)
+
+    rows: List[List[object]] = []
+    failures = 0
+    for route, entry in sorted(recorder.reads.items()):
+        declared, tables = entry["declared"], entry["tables"]
+        if declared is None:
+            if not route.split(" ", 1)[1].startswith(DATA_PREFIXES):
+                continue
+            status = "untagged"
+        elif tables - set(declared):
+            failures += 1
+            status = "UNDECLARED " + ", ".join(sorted(tables - set(declared)))
+        elif args.verbose:
+            status = "ok"
+        else:
+            continue
+        rows.append([status, route, ", ".join(sorted(tables)), ", ".join(declared or ())])
+
+    if rows:
+        print_table(["status", "route", "tables read", "declared"], rows)
+    print(f"{len(recorder.reads)} GET routes checked, {failures} reading undeclared tables")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Query-count budgets: fail when a route's SQL statement count depends on the data.
+
+Every API route is called (with its filters, plus a create/update/delete
+round trip per resource, as in check_query_plans) against seeded databases
+of 10, 100 and 1000 houses, with more checklist categories, items and
+operations per house in the larger ones. The statements run by each
+request are counted. A route fails when:
+
+- its count differs between datasets (a query per row: N+1), or
+- its count exceeds the budget declared on the endpoint with
+  `@query_budget(n)` (app.core.query_stats), or it declares none
+
+Each dataset runs in its own subprocess, since settings are read at
+import time. The exit status is 1 on failure, so the script can gate a
+CI job.
+
+    python -m benchmarks.check_query_budgets
+    python -m benchmarks.check_query_budgets --datasets 10,100
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List
+
+from benchmarks.common import BACKEND_DIR, prepare_database, print_table
+
+# Seed profile per dataset: per-house volumes grow along with the houses, so
+# loops over a house's categories, items or operations show up too
+DATASETS = {
+    10: {"categories": 3, "items_per_house": 10, "operations_per_house": 50},
+    100: {"categories": 6, "items_per_house": 30, "operations_per_house": 100},
+    1000: {"categories": 12, "items_per_house": 60, "operations_per_house": 200},
+}
+
+_ID = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+_CURSOR = re.compile(r"cursor=[^&]+")
+_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+class BudgetRecorder:
+    """
+    ASGI wrapper recording the statement count and budget of every request.
+
+    The router fills `scope["endpoint"]` / `scope["route"]` in place, so
+    they are known once the request has been handled.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.calls: Dict[str, Dict[str, object]] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        count = None
+
+        async def send_with_count(message):
+            nonlocal count
+            if message["type"] == "http.response.start":
+                for name, value in message.get("headers", []):
+                    if name == b"server-timing":
+                        count = int(_QUERIES.search(value.decode()).group(1))
+            await send(message)
+
+        await self.app(scope, receive, send_with_count)
+
+        from app.core.query_stats import route_query_budget
+
+        route = scope.get("route")
+        # Page cursors differ between datasets, like ids
+        query = _CURSOR.sub("cursor={cursor}", scope.get("query_string", b"").decode())
+        key = f"{scope['method']} {_ID.sub('{id}', scope['path'])}" + (f"?{query}" if query else "")
+        # The same call made again (with another body): numbered, in call order
+        repeats = sum(1 for call in self.calls if call == key or call.startswith(f"{key} #"))
+        if repeats:
+            key = f"{key} #{repeats + 1}"
+        self.calls[key] = {
+            "route": f"{scope['method']} {route.path}" if route is not None else None,
+            "endpoint": getattr(scope.get("endpoint"), "__name__", None),
+            "queries": count,
+            "budget": route_query_budget(scope),
+        }
+
+
+def measure(houses: int) -> Dict[str, Dict[str, object]]:
+    prepare_database(houses=houses, **DATASETS[houses])
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from benchmarks.check_query_plans import StatementCapture, exercise_routes
+
+    recorder = BudgetRecorder(app)
+    with TestClient(recorder) as client:
+        exercise_routes(client, StatementCapture(), "maison-1")
+    return recorder.calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--datasets", default=",".join(str(houses) for houses in DATASETS),
+                        help="Dataset sizes (houses) to compare (default: 10,100,1000)")
+    parser.add_argument("--verbose", action="store_true", help="Print every call, not only failures")
+    parser.add_argument("--houses", type=int, help=argparse.SUPPRESS)  # Used by the per-dataset subprocess
+    args = parser.parse_args()
+
+    if args.houses:
+        print(json.dumps(measure(args.houses)))
+        return
+
+    sizes = [int(size) for size in args.datasets.split(",")]
+    results: Dict[int, Dict[str, Dict[str, object]]] = {}
+    for houses in sizes:
+        env = dict(os.environ, DATABASE_ECHO="False", SQL_METRICS_ENABLED="True")
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.check_query_budgets", "--houses", str(houses)],
+            cwd=BACKEND_DIR, env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        results[houses] = json.loads(output.strip().splitlines()[-1])
+
+    rows: List[List[object]] = []
+    failures = 0
+    for key, call in results[sizes[0]].items():
+        counts = [results[houses].get(key, {}).get("queries") for houses in sizes]
+        budget = call["budget"]
+        problems = []
+        if len(set(counts)) > 1:
+            problems.append("grows with data")
+        if budget is None:
+            problems.append("no budget")
+        elif any(count is not None and count > budget for count in counts):
+            problems.append("over budget")
+        failures += bool(problems)
+        if problems or args.verbose:
+            rows.append([", ".join(problems) or "ok", key, call["endpoint"], *counts, budget if budget is not None else "-"])
+
+    if rows:
+        print_table(["status", "call", "endpoint", *[f"{houses} houses" for houses in sizes], "budget"], rows)
+    print(f"{len(results[sizes[0]])} calls checked on {len(sizes)} datasets, {failures} failure(s)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+Index coverage report: run the router queries through EXPLAIN QUERY PLAN.
+
+Every API route is called (with its filters) against a seeded database
+while the executed statements are captured. Each statement is then run
+through `EXPLAIN QUERY PLAN` and any filtered statement that still scans
+one of the large tables in full is reported. The paginated listings are
+read two pages deep, and a page query (with a LIMIT) is reported when it
+sorts its rows or scans a large table without an index: its cost would
+grow with the depth of the page. The exit status is 1 when such a plan is
+found, so the script can gate a CI job.
+
+    python -m benchmarks.check_query_plans
+    python -m benchmarks.check_query_plans --database ./residence_manager.db
+"""
+
+import argparse
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import List, Tuple
+
+from benchmarks.common import prepare_database, print_table
+
+# Tables that grow with activity; reference tables (houses, categories,
+# maintenance types) are small enough to scan
+HOT_TABLES = {
+    "reservations", "checkins", "checkouts", "financial_operations", "maintenance_issues",
+    "checklist_items", "house_checklist_status", "house_category_status",
+}
+
+GET_ROUTES = [
+    "/api/v1/reservations/",
+    "/api/v1/reservations/?maison={house}",
+    "/api/v1/checkins/",
+    "/api/v1/checkins/?maison={house}",
+    "/api/v1/checkins/checkouts/?maison={house}",
+    "/api/v1/finance/",
+    "/api/v1/finance/?maison={house}",
+    "/api/v1/finance/?maison={house}&type=entree&year=2024",
+    "/api/v1/finance/?year=2024&month=6",
+    "/api/v1/finance/summary/{house}",
+    "/api/v1/finance/summary/{house}?year=2024&month=6",
+    "/api/v1/finance/revenue/monthly?year=2024",
+    "/api/v1/finance/revenue/monthly?year=2024&houseId={house}",
+    "/api/v1/maintenance/",
+    "/api/v1/maintenance/types",
+    "/api/v1/maintenance/?status=non-resolue",
+    "/api/v1/maintenance/?maison={house}",
+    "/api/v1/maintenance/stats/summary",
+    "/api/v1/maintenance/stats/summary?houseId={house}",
+    "/api/v1/checklist/categories",
+    "/api/v1/checklist/items",
+    "/api/v1/checklist/items?maison={house}",
+    "/api/v1/checklist/status/{house}",
+    "/api/v1/checklist/readiness/{house}",
+    "/api/v1/checklist/progress/{house}",
+    "/api/v1/dashboard/",
+    "/api/v1/dashboard/metrics?date=2024-06-01",
+    "/api/v1/dashboard/occupancy?date=2024-06-01",
+    "/api/v1/dashboard/revenue?dateFrom=2024-06-01&dateTo=2024-06-30",
+    "/api/v1/dashboard/house-stats",
+    "/api/v1/dashboard/period-stats?year=2024",
+    "/api/v1/dashboard/period-stats?year=2024&month=6",
+]
+
+# Paginated listings, read two pages deep (the second one with a cursor)
+PAGED_ROUTES = [
+    "/api/v1/reservations/",
+    "/api/v1/reservations/?maison={house}",
+    "/api/v1/checkins/",
+    "/api/v1/checkins/?maison={house}",
+    "/api/v1/checkins/checkouts/",
+    "/api/v1/checkins/checkouts/?maison={house}",
+    "/api/v1/finance/",
+    "/api/v1/finance/?maison={house}",
+    "/api/v1/maintenance/",
+    "/api/v1/maintenance/?houseId={house}",
+    "/api/v1/checklist/items",
+    "/api/v1/checklist/items?maison={house}",
+]
+
+
+class StatementCapture:
+    """Collects the distinct statements (with their first parameters) per route."""
+
+    def __init__(self):
+        self.route = ""
+        self.statements: "OrderedDict[str, Tuple[str, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        params = parameters[0] if executemany and parameters else parameters
+        with self._lock:
+            self.statements.setdefault(statement, (self.route, params))
+
+
+def exercise_routes(client, capture: StatementCapture, house: str) -> None:
+    """Call every read route, then a create/update/delete round trip per resource."""
+
+    def call(method: str, path: str, page: bool = False, **kwargs):
+        capture.route = f"{method} {_ID.sub('{id}', path.split('?')[0])}" + (PAGE_MARK if page else "")
+        response = client.request(method, path, **kwargs)
+        if response.status_code >= 400:
+            print(f"warning: {method} {path} -> {response.status_code} {response.text[:200]}", file=sys.stderr)
+        return response.json() if response.status_code < 400 else {}
+
+    for path in GET_ROUTES:
+        call("GET", path.format(house=house))
+
+    for path in PAGED_ROUTES:
+        path = path.format(house=house) + ("&" if "?" in path else "?") + "limit=5"
+        cursor = call("GET", path, page=True).get("nextCursor")
+        if cursor:
+            call("GET", f"{path}&cursor={cursor}", page=True)
+
+    reservation = call("POST", "/api/v1/reservations/", json={
+        "nom": "Plan", "maison": house, "checkin": "2027-01-10", "checkout": "2027-01-12", "montantAvance": 100,
+    })
+    rid = reservation.get("id")
+    call("GET", f"/api/v1/reservations/{rid}")
+    call("PUT", f"/api/v1/reservations/{rid}", json={"montantAvance": 150})
+    call("GET", f"/api/v1/reservations/{rid}/availability?checkin=2027-01-10&checkout=2027-01-11")
+
+    checkin = call("POST", "/api/v1/checkins/", json={
+        "maison": house, "nom": "Plan", "dateArrivee": "2027-01-10", "dateDepart": "2027-01-12",
+        "avancePaye": 100, "paiementCheckin": 50, "montantTotal": 150, "inventaire": {},
+        "responsable": "x", "reservationId": rid,
+    })
+    cid = checkin.get("id")
+    call("GET", f"/api/v1/checkins/{cid}")
+    call("PUT", f"/api/v1/checkins/{cid}", json={"paiementCheckin": 70})
+    call("POST", f"/api/v1/checkins/{cid}/checkout", json={
+        "nom": "Plan", "dateDepart": "2027-01-12", "responsable": "x", "maison": house, "checkinId": cid,
+    })
+
+    issue = call("POST", "/api/v1/maintenance/", json={
+        "maison": house, "typePanne": "plomberie", "dateDeclaration": "2027-01-10",
+        "assigne": "bob", "statut": "non-resolue", "prixMainOeuvre": 30,
+    })
+    mid = issue.get("id")
+    call("GET", f"/api/v1/maintenance/{mid}")
+    call("PUT", f"/api/v1/maintenance/{mid}", json={"statut": "resolue"})
+
+    operation = call("POST", "/api/v1/finance/", json={
+        "date": "2027-01-10", "maison": house, "type": "sortie", "motif": "m", "montant": 5, "origine": "manuel",
+    })
+    fid = operation.get("id")
+    call("GET", f"/api/v1/finance/{fid}")
+    call("PUT", f"/api/v1/finance/{fid}", json={"montant": 6})
+
+    item = call("POST", "/api/v1/checklist/items", json={
+        "maison": house, "etape": 99, "categorie": "Catégorie 1", "description": "d",
+        "type": "nettoyage", "produitAUtiliser": "p",
+    })
+    iid = item.get("id")
+    # A category the residence doesn't have yet is created with the item
+    new_category_item = call("POST", "/api/v1/checklist/items", json={
+        "maison": house, "etape": 98, "categorie": "Catégorie plan", "description": "d",
+        "type": "nettoyage", "produitAUtiliser": "p",
+    })
+    call("GET", f"/api/v1/checklist/items/{iid}")
+    call("PUT", f"/api/v1/checklist/items/{iid}", json={"description": "d2"})
+    call("POST", f"/api/v1/checklist/status/{house}/complete", json={"taskId": iid, "completed": True})
+    call("POST", f"/api/v1/checklist/categories/{house}/complete", json={"categoryId": 1, "completed": True})
+
+    call("POST", "/api/v1/batch/", json={"operations": [
+        {"method": "POST", "resource": "/reservations/", "payload": {
+            "nom": "Batch", "maison": house, "checkin": "2027-02-10", "checkout": "2027-02-12", "montantAvance": 100,
+        }},
+        {"method": "POST", "resource": "/checkins/", "payload": {
+            "maison": house, "nom": "Batch", "dateArrivee": "2027-02-10", "dateDepart": "2027-02-12",
+            "avancePaye": 100, "paiementCheckin": 50, "montantTotal": 150, "inventaire": {},
+            "responsable": "x", "reservationId": "$0.id",
+        }},
+        {"method": "POST", "resource": f"/checklist/status/{house}/complete", "payload": {
+            "taskId": iid, "completed": False,
+        }},
+    ]})
+
+    call("DELETE", f"/api/v1/checklist/items/{iid}")
+    call("DELETE", f"/api/v1/checklist/items/{new_category_item.get('id')}")
+    call("DELETE", f"/api/v1/finance/{fid}")
+    call("DELETE", f"/api/v1/maintenance/{mid}")
+    call("DELETE", f"/api/v1/checkins/{cid}")
+    call("DELETE", f"/api/v1/reservations/{rid}")
+
+    # Change feed over the writes above: the whole log, then one page of it
+    call("GET", "/api/v1/changes/?since=0")
+    call("GET", "/api/v1/changes/?since=0&limit=5", page=True)
+
+
+_ID = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+_SCAN = re.compile(r"^SCAN (\w+)")
+PAGE_MARK = " (page)"
+
+
+def full_scans(plan: List[str]) -> List[str]:
+    """Large tables read in full according to a query plan."""
+    tables = []
+    for detail in plan:
+        match = _SCAN.match(detail)
+        if match and match.group(1) in HOT_TABLES:
+            tables.append(match.group(1))
+    return tables
+
+
+def page_costs(plan: List[str]) -> List[str]:
+    """Steps of a page query that grow with the rows before the page."""
+    steps = []
+    for detail in plan:
+        match = _SCAN.match(detail)
+        if match and match.group(1) in HOT_TABLES and "INDEX" not in detail:
+            steps.append(detail)
+        elif detail.startswith("USE TEMP B-TREE FOR ORDER BY"):
+            steps.append(detail)
+    return steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", help="Check a copy of this database instead of a seeded one")
+    parser.add_argument("--houses", type=int, default=12, help="Houses to seed (default: 12)")
+    parser.add_argument("--verbose", action="store_true", help="Print the plan of every statement")
+    args = parser.parse_args()
+
+    # Settings are read on first import of the app
+    os.environ.setdefault("DATABASE_ECHO", "False")
+    os.environ.setdefault("SQL_METRICS_ENABLED", "False")
+    if args.database:
+        path = os.path.join(tempfile.mkdtemp(prefix="rm-plans-"), "check.db")
+        shutil.copy(args.database, path)
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+        house = sqlite3.connect(path).execute("SELECT id FROM houses ORDER BY id LIMIT 1").fetchone()[0]
+    else:
+        path = prepare_database(houses=args.houses)
+        house = "maison-1"
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    from app.main import app
+
+    capture = StatementCapture()
+    event.listen(Engine, "before_cursor_execute", capture)
+    with TestClient(app) as client:
+        exercise_routes(client, capture, house)
+    event.remove(Engine, "before_cursor_execute", capture)
+
+    conn = sqlite3.connect(path)
+    rows, failures = [], 0
+    for statement, (route, params) in capture.statements.items():
+        if not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "WITH")):
+            continue
+        plan = [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {statement}", params or ())]
+        scanned = full_scans(plan)
+        # Unfiltered listings read the whole table whatever the indexes
+        filtered = " WHERE " in " ".join(statement.split()).upper()
+        if route.endswith(PAGE_MARK):
+            # A page walks an index in order and stops after LIMIT rows
+            if page_costs(plan):
+                failures += 1
+                status = "PAGE SORT"
+            elif args.verbose:
+                status = "ok"
+            else:
+                continue
+        elif scanned and filtered:
+            failures += 1
+            status = "FULL SCAN"
+        elif args.verbose:
+            status = "ok" if not scanned else "ok (unfiltered)"
+        else:
+            continue
+        rows.append([status, route, "; ".join(plan), " ".join(statement.split())[:120]])
+
+    if rows:
+        print_table(["status", "route", "plan", "statement"], rows)
+    print(f"{len(capture.statements)} statements checked, {failures} full scan(s) / sorted page(s) of large tables")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
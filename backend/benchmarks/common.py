@@ -0,0 +1,188 @@
+"""
+Shared helpers for the backend benchmarks.
+
+Every benchmark runs against a throw-away SQLite file seeded with synthetic
+data. Settings are read when the app is imported, so `prepare_database` must
+be called before anything from `app` is imported by the benchmark script.
+"""
+
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import date, timedelta
+from statistics import mean
+from typing import Dict, List, Optional, Sequence
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def prepare_database(
+    houses: int = 12,
+    reservations_per_house: int = 50,
+    checkins_per_house: int = 50,
+    operations_per_house: int = 200,
+    issues_per_house: int = 10,
+    items_per_house: int = 30,
+    categories: int = 6,
+    path: Optional[str] = None,
+    seed: int = 42,
+) -> str:
+    """
+    Create and seed a SQLite database, then point DATABASE_URL at it.
+    
+    Args:
+        houses: Number of houses to create
+        reservations_per_house: Reservations generated for each house
+        checkins_per_house: Check-ins generated for each house
+        operations_per_house: Financial operations generated for each house
+        issues_per_house: Maintenance issues generated for each house
+        items_per_house: Checklist items generated for each house
+        categories: Number of checklist categories
+        path: Database file to create (defaults to a temporary file)
+        seed: Random seed so runs are reproducible
+        
+    Returns:
+        Path of the seeded database file
+    """
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="rm-bench-"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+
+    from sqlalchemy import create_engine, insert
+    from app.core.database import Base
+    from app.models import (
+        House, Reservation, CheckIn, FinancialOperation, MaintenanceIssue,
+        MaintenanceType, ChecklistCategory, ChecklistItem, HouseCategoryStatus,
+    )
+
+    rng = random.Random(seed)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+
+    start = date(2024, 1, 1)
+    house_ids = [f"maison-{i + 1}" for i in range(houses)]
+
+    def day(offset_range: int = 730) -> date:
+        return start + timedelta(days=rng.randrange(offset_range))
+
+    with engine.begin() as conn:
+        conn.execute(insert(House), [{"id": h, "name": f"Mv{i + 1}"} for i, h in enumerate(house_ids)])
+        conn.execute(insert(MaintenanceType), [
+            {"id": "electricite", "label": "Électricité"},
+            {"id": "plomberie", "label": "Plomberie"},
+        ])
+        conn.execute(insert(ChecklistCategory), [{"id": i + 1, "name": f"Catégorie {i + 1}"} for i in range(categories)])
+
+        reservations, checkins, operations, issues, items, category_status = [], [], [], [], [], []
+        for house_id in house_ids:
+            for _ in range(reservations_per_house):
+                checkin = day()
+                reservations.append({
+                    "id": str(uuid.uuid4()), "house_id": house_id, "guest_name": "Guest",
+                    "phone": "0600000000", "email": "guest@example.com",
+                    "checkin_date": checkin, "checkout_date": checkin + timedelta(days=rng.randint(1, 10)),
+                    "advance_paid": float(rng.choice([0, 100, 200])),
+                })
+            for _ in range(checkins_per_house):
+                arrival = day()
+                checkins.append({
+                    "id": str(uuid.uuid4()), "reservation_id": rng.choice(reservations)["id"],
+                    "house_id": house_id, "guest_name": "Guest", "arrival_date": arrival,
+                    "departure_date": arrival + timedelta(days=rng.randint(1, 10)),
+                    "advance_paid": 100.0, "checkin_payment": 400.0, "total_amount": 500.0,
+                    "inventory": {"litsSimples": 2, "television": True}, "manager": "Manager",
+                })
+            for _ in range(operations_per_house):
+                operations.append({
+                    "id": str(uuid.uuid4()), "date": day(), "house_id": house_id,
+                    "type": rng.choice(["entree", "entree", "sortie"]), "motif": "Opération",
+                    "montant": float(rng.randint(10, 1000)), "origine": "manuel", "editable": True,
+                })
+            for _ in range(issues_per_house):
+                issues.append({
+                    "id": str(uuid.uuid4()), "house_id": house_id,
+                    "issue_type": rng.choice(["electricite", "plomberie"]), "reported_at": day(),
+                    "assigned_to": "Technicien", "status": rng.choice(["resolue", "non-resolue"]),
+                    "labor_cost": float(rng.randint(0, 300)),
+                })
+            for step in range(items_per_house):
+                items.append({
+                    "id": str(uuid.uuid4()), "house_id": house_id, "step_number": step + 1,
+                    "category_id": step % categories + 1, "description": "Tâche", "type": "nettoyage",
+                })
+            for category_id in range(1, categories + 1):
+                category_status.append({
+                    "id": str(uuid.uuid4()), "house_id": house_id, "category_id": category_id,
+                    "is_ready": rng.random() < 0.8,
+                })
+
+        for model, rows in (
+            (Reservation, reservations), (CheckIn, checkins), (FinancialOperation, operations),
+            (MaintenanceIssue, issues), (ChecklistItem, items), (HouseCategoryStatus, category_status),
+        ):
+            if rows:
+                conn.execute(insert(model), rows)
+
+    engine.dispose()
+    return path
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(samples: Sequence[float]) -> Dict[str, float]:
+    """Latency summary (in milliseconds) for a list of durations in seconds."""
+    return {
+        "count": len(samples),
+        "mean": mean(samples) * 1000 if samples else 0.0,
+        "p50": percentile(samples, 50) * 1000,
+        "p95": percentile(samples, 95) * 1000,
+        "p99": percentile(samples, 99) * 1000,
+    }
+
+
+def print_table(headers: List[str], rows: List[List]) -> None:
+    """Print rows as a fixed-width text table."""
+    formatted = [[f"{cell:.2f}" if isinstance(cell, float) else str(cell) for cell in row] for row in rows]
+    widths = [max(len(str(h)), *(len(r[i]) for r in formatted)) for i, h in enumerate(headers)]
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in formatted:
+        print("  ".join(cell.ljust(w) for cell, w in zip(row, widths)))
+
+
+@contextmanager
+def serve(app):
+    """Run the app with uvicorn in a background thread, yield its base URL."""
+    import uvicorn
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    # Long keep-alive: under heavy load the idle timer can fire before a queued request is read
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", timeout_keep_alive=300)
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join()